@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, Body
+from fastapi import APIRouter, Depends, Body, Query
 from typing import Dict, Any, Optional, List
+from backend.app.task.schema.editor import EditOperation
 from backend.app.task.service.editor_service import editor_service
 from backend.common.response import response_base, ResponseSchemaModel
 from backend.core.deps import CurrentSession
@@ -31,6 +32,24 @@ async def deduplicate(
     await editor_service.smart_deduplication(db, draft_id, config)
     return response_base.success(msg="去重处理成功")
 
+@router.post("/draft/{draft_id}/variants", summary="生成去重变体")
+async def generate_variants(
+    draft_id: int,
+    db: CurrentSession,
+    count: int = Body(1, ge=1, le=100, description="变体数量"),
+    config: Optional[Dict[str, Any]] = Body(None, description="去重配置"),
+    seeds: Optional[List[int]] = Body(None, description="随机种子列表 (复现已生成的变体, 指定时忽略 count)"),
+    output_dir: Optional[str] = Body(None, description="变体输出目录, 为空则使用草稿存储目录"),
+) -> ResponseSchemaModel:
+    """
+    一次生成多个去重变体, 每个变体写入新的草稿文件夹
+    
+    config 同智能去重; 返回的 seed 记录在变体目录的 draft_variant.json 中,
+    以相同的 seeds 再次调用即可复现
+    """
+    results = await editor_service.generate_variants(db, draft_id, count, config, seeds, output_dir)
+    return response_base.success(data=results, message="生成去重变体完成")
+
 @router.post("/draft/{draft_id}/filter", summary="添加滤镜")
 async def add_filter(
     draft_id: int,
@@ -93,6 +112,25 @@ async def add_subtitle(
     await editor_service.add_subtitle(db, draft_id, text, start_time, duration, style)
     return response_base.success(msg="添加字幕成功")
 
+@router.post("/draft/{draft_id}/subtitles/import", summary="批量导入字幕")
+async def import_subtitles(
+    draft_id: int,
+    db: CurrentSession,
+    subtitle_path: Optional[str] = Body(None, description="字幕文件路径 (.srt / .ass)"),
+    content: Optional[str] = Body(None, description="字幕文本 (与 subtitle_path 二选一)"),
+    subtitle_format: Optional[str] = Body(None, description="字幕格式: srt / ass, 为空则自动判断"),
+    style: Optional[Dict[str, Any]] = Body(None, description="默认字幕样式"),
+    time_offset: float = Body(0.0, description="整体时间偏移(秒)"),
+) -> ResponseSchemaModel:
+    """
+    批量导入 SRT / ASS 字幕
+
+    所有字幕在一次编辑中添加到文本轨道, style 参数同添加字幕;
+    ASS 字幕中样式定义的字号与颜色优先于 style
+    """
+    await editor_service.import_subtitles(db, draft_id, subtitle_path, content, subtitle_format, style, time_offset)
+    return response_base.success(message="导入字幕成功")
+
 @router.post("/draft/{draft_id}/split", summary="分割视频片段")
 async def split_video(
     draft_id: int,
@@ -168,15 +206,17 @@ async def remove_silence(
     db: CurrentSession,
     silence_threshold: float = Body(-40.0, description="静音阈值(dB)"),
     min_silence_duration: float = Body(0.5, description="最小静音时长(秒)"),
+    mode: str = Body("threshold", description="检测模式: threshold 固定电平阈值 / vad 语音活动检测"),
 ) -> ResponseSchemaModel:
     """
     删除草稿中的静音片段
     
     使用音频分析自动检测并删除静音部分
+    vad 模式按能量与过零率识别语音, 噪声底自适应, 不需要调整 silence_threshold
     需要安装: pip install pydub
     """
-    await editor_service.remove_silence(db, draft_id, silence_threshold, min_silence_duration)
-    return response_base.success(msg="删除静音片段成功")
+    await editor_service.remove_silence(db, draft_id, silence_threshold, min_silence_duration, mode)
+    return response_base.success(message="删除静音片段成功")
 
 @router.get("/draft/{draft_id}/highlights", summary="提取高光片段")
 async def extract_highlights(
@@ -184,16 +224,68 @@ async def extract_highlights(
     db: CurrentSession,
     threshold_percentile: float = 80.0,
     min_highlight_duration: float = 2.0,
+    window: float = Query(1.0, gt=0, description="窗口长度(秒), 可小于 1 秒"),
+    hop: Optional[float] = Query(None, gt=0, description="滑动窗口步长(秒)"),
+    top_k: Optional[int] = Query(None, ge=1, description="每个素材最多返回的片段数"),
+    max_duration: Optional[float] = Query(None, gt=0, description="每个素材的片段总时长上限(秒)"),
 ) -> ResponseSchemaModel:
     """
     提取草稿中的高光片段(音量峰值)
     
     返回高光片段的时间范围列表
+    指定 hop / top_k / max_duration 时按滑动窗口得分选取前 K 个互不重叠的片段 (例如 max_duration=60 为最精彩的 60 秒),
+    结果附带得分 score (dBFS)
     """
     highlights = await editor_service.extract_highlights(
-        db, draft_id, threshold_percentile, min_highlight_duration
+        db, draft_id, threshold_percentile, min_highlight_duration, window, hop, top_k, max_duration
     )
-    return response_base.success(data=highlights, msg="提取高光片段成功")
+    return response_base.success(data=highlights, message="提取高光片段成功")
+
+@router.get("/draft/{draft_id}/scenes", summary="检测镜头切换")
+async def detect_scenes(
+    draft_id: int,
+    db: CurrentSession,
+    threshold: float = Query(0.3, ge=0, le=1, description="相邻帧灰度直方图差阈值"),
+    region_ratio: float = Query(0.5, ge=0, le=1, description="相邻帧变化区域占比阈值"),
+    min_scene_duration: float = Query(1.0, ge=0, description="最短镜头时长(秒)"),
+) -> ResponseSchemaModel:
+    """
+    检测草稿视频片段中的镜头切换点 (适用于没有声音的空镜头)
+    
+    返回每个切换点的素材时间与时间线时间, 结果按素材内容缓存
+    需要安装 ffmpeg
+    """
+    scenes = await editor_service.detect_scenes(db, draft_id, threshold, region_ratio, min_scene_duration)
+    return response_base.success(data=scenes, message="检测镜头切换成功")
+
+@router.get("/draft/{draft_id}/beats", summary="检测音乐节拍")
+async def detect_beats(
+    draft_id: int,
+    db: CurrentSession,
+) -> ResponseSchemaModel:
+    """
+    检测草稿音频轨道中背景音乐的节拍与起音
+    
+    返回节拍速度 (BPM) 以及节拍、起音在时间线上的位置 (秒), 结果按素材内容缓存
+    """
+    beats = await editor_service.detect_beats(db, draft_id)
+    return response_base.success(data=beats, message="检测音乐节拍成功")
+
+@router.post("/draft/{draft_id}/snap-to-beats", summary="切点对齐节拍")
+async def snap_to_beats(
+    draft_id: int,
+    db: CurrentSession,
+    max_shift: float = Body(0.5, ge=0, description="切点最大移动距离(秒)"),
+    min_duration: float = Body(0.5, ge=0, description="片段最短时长(秒)"),
+    use_onsets: bool = Body(False, description="对齐到起音而不是节拍"),
+) -> ResponseSchemaModel:
+    """
+    把视频片段之间的切点对齐到背景音乐最近的节拍 (卡点)
+    
+    前一片段的出点与后一片段的入点同时移动, 轨道总时长不变
+    """
+    stats = await editor_service.snap_to_beats(db, draft_id, max_shift, min_duration, use_onsets)
+    return response_base.success(data=stats, message="切点对齐节拍成功")
 
 @router.post("/draft/{draft_id}/apply-template", summary="应用模板")
 async def apply_template(
@@ -242,3 +334,86 @@ async def batch_apply_template(
     results = await editor_service.batch_apply_template(db, draft_ids, template_config)
     return response_base.success(data=results, msg="批量应用模板完成")
 
+@router.post("/batch/remove-silence", summary="批量删除静音片段")
+async def batch_remove_silence(
+    db: CurrentSession,
+    draft_ids: List[int] = Body(..., description="草稿ID列表"),
+    silence_threshold: float = Body(-40.0, description="静音阈值(dB)"),
+    min_silence_duration: float = Body(0.5, description="最小静音时长(秒)"),
+    mode: str = Body("threshold", description="检测模式: threshold 固定电平阈值 / vad 语音活动检测"),
+) -> ResponseSchemaModel:
+    """
+    批量删除多个草稿中的静音片段
+    
+    多个草稿引用的同一素材只分析一次, 素材分析在进程池中并行执行
+    返回每个草稿的处理结果
+    """
+    results = await editor_service.batch_remove_silence(
+        db, draft_ids, silence_threshold, min_silence_duration, mode
+    )
+    return response_base.success(data=results, message="批量删除静音片段完成")
+
+@router.post("/draft/{draft_id}/undo", summary="撤销")
+async def undo(
+    draft_id: int,
+    db: CurrentSession,
+) -> ResponseSchemaModel:
+    """
+    撤销最近一次编辑 (需要 draft.persistence.mode: patch_log)
+    """
+    history = await editor_service.undo(db, draft_id)
+    return response_base.success(data=history, message="撤销成功")
+
+@router.post("/draft/{draft_id}/redo", summary="重做")
+async def redo(
+    draft_id: int,
+    db: CurrentSession,
+) -> ResponseSchemaModel:
+    """
+    重做最近一次撤销 (需要 draft.persistence.mode: patch_log)
+    """
+    history = await editor_service.redo(db, draft_id)
+    return response_base.success(data=history, message="重做成功")
+
+@router.get("/draft/{draft_id}/history", summary="编辑历史")
+async def get_history(
+    draft_id: int,
+    db: CurrentSession,
+) -> ResponseSchemaModel:
+    """
+    获取可撤销/可重做的步数
+    """
+    history = await editor_service.get_history(db, draft_id)
+    return response_base.success(data=history)
+
+@router.post("/draft/{draft_id}/compact", summary="合并补丁日志")
+async def compact(
+    draft_id: int,
+    db: CurrentSession,
+) -> ResponseSchemaModel:
+    """
+    把补丁日志合并为完整的 draft_content.json (在剪映中打开草稿前调用)
+    
+    合并后撤销/重做历史清空
+    """
+    compacted = await editor_service.compact(db, draft_id)
+    return response_base.success(data={"compacted": compacted}, message="合并完成" if compacted else "没有需要合并的补丁日志")
+
+@router.post("/draft/{draft_id}/batch", summary="批量编辑")
+async def batch_edit(
+    draft_id: int,
+    db: CurrentSession,
+    operations: List[EditOperation] = Body(..., embed=True, description="按顺序执行的操作列表"),
+) -> ResponseSchemaModel:
+    """
+    在一次加载/保存中按顺序执行多个编辑操作
+    
+    全部成功才保存; 任一操作失败则全部回滚, 错误响应的 data.results 中包含已执行操作的结果
+    
+    支持的操作: add_audio, add_filter, add_transition, add_text, split_segment, trim_segment,
+               adjust_brightness, adjust_contrast, adjust_saturation, adjust_color, deduplicate
+    """
+    results = await editor_service.batch_edit(
+        db, draft_id, [operation.model_dump() for operation in operations]
+    )
+    return response_base.success(data=results, message=f"批量编辑成功: {len(results)} 个操作")
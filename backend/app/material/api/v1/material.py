@@ -1,7 +1,9 @@
 """
 素材管理 API 路由
 """
-from fastapi import APIRouter, UploadFile, File, Form
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, BackgroundTasks, Body, UploadFile, File, Form, Query
 from backend.utils.logger import logger
 from backend.app.material.schema.material import (
     MaterialCreateParam,
@@ -25,6 +27,7 @@ router = APIRouter()
 @router.post("/materials/upload", summary="上传素材")
 async def upload_material(
     db: CurrentSession,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     name: str = Form(...),
     type: MaterialType = Form(...),
@@ -35,6 +38,7 @@ async def upload_material(
     上传素材文件
     
     :param db: 数据库会话
+    :param background_tasks: 后台任务（音视频素材上传后探测时长/分辨率/帧率）
     :param file: 上传的文件
     :param name: 素材名称
     :param type: 素材类型
@@ -88,6 +92,8 @@ async def upload_material(
     )
     
     material = await material_service.create(db, param)
+    if type in (MaterialType.VIDEO, MaterialType.AUDIO):
+        background_tasks.add_task(material_service.probe_media_background, material.id)
     
     logger.info(f"上传素材成功: {material.name}")
     return response_base.success(data=material, message="上传成功")
@@ -138,6 +144,46 @@ async def get_material(
     return response_base.success(data=material)
 
 
+@router.post("/materials/probe", summary="探测素材媒体信息")
+async def probe_materials(
+    db: CurrentSession,
+    ids: List[int] = Body(..., embed=True, description="素材 ID 列表")
+) -> ResponseSchemaModel[Dict[int, bool]]:
+    """
+    批量探测素材的时长/分辨率/帧率并写入素材表（用于补全已有素材，新上传的素材会自动探测）
+    
+    :param db: 数据库会话
+    :param ids: 素材 ID 列表
+    :return: {素材 ID: 是否成功}
+    """
+    result = await material_service.probe_media(db, ids)
+    return response_base.success(data=result, message="探测完成")
+
+
+@router.get("/materials/{pk}/waveform", summary="获取素材波形")
+async def get_material_waveform(
+    db: CurrentSession,
+    pk: int,
+    start: float = Query(0.0, ge=0, description="开始时间（秒）"),
+    end: Optional[float] = Query(None, gt=0, description="结束时间（秒），默认素材末尾"),
+    width: int = Query(1000, ge=1, le=20000, description="像素数（返回的点数）")
+) -> ResponseSchemaModel[dict]:
+    """
+    获取素材波形（任意缩放级别）
+    
+    首次请求时生成峰值金字塔，之后直接读取，不再解码素材
+    
+    :param db: 数据库会话
+    :param pk: 素材 ID
+    :param start: 开始时间（秒）
+    :param end: 结束时间（秒）
+    :param width: 像素数
+    :return: 波形数据
+    """
+    waveform = await material_service.get_waveform(db, pk, start, end, width)
+    return response_base.success(data=waveform)
+
+
 @router.put("/materials/{pk}", summary="更新素材信息")
 async def update_material(
     db: CurrentSession,
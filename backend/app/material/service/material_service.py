@@ -3,7 +3,7 @@
 """
 import os
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -19,11 +19,16 @@ from backend.app.material.schema.material import (
 )
 from backend.common.enums import MaterialType
 from backend.common.exception import (
+    BadRequestError,
     FileSizeError,
     FileFormatError,
     MaterialNotFoundError,
 )
+from backend.common.executor import blocking_executor
 from backend.core.conf import settings
+from backend.core import database
+from backend.integrations.jianying_api.media_probe import media_probe
+from backend.integrations.jianying_api.waveform import build_material_waveform, waveform_store
 from backend.utils.file_utils import (
     ensure_dir,
     get_file_size,
@@ -157,6 +162,115 @@ class MaterialService:
         logger.info(f"删除素材成功: {pk}")
         return True
     
+    @staticmethod
+    def _media_fields(material: Material, info: Dict[str, Any]) -> dict:
+        """
+        媒体信息 -> 素材表字段
+        
+        :param material: 素材对象
+        :param info: media_probe 探测结果
+        :return: 更新数据
+        """
+        extra_data = dict(material.extra_data or {})
+        extra_data['media_info'] = info
+        update_data = {'duration': info['duration'], 'extra_data': extra_data}
+        if info['width'] and info['height']:
+            update_data['resolution'] = f"{info['width']}x{info['height']}"
+        if info['fps']:
+            update_data['fps'] = int(round(info['fps']))
+        return update_data
+    
+    async def probe_media(self, db: AsyncSession, pks: List[int]) -> Dict[int, bool]:
+        """
+        探测素材的媒体信息并写入素材表（时长/分辨率/帧率，完整结果保存在 extra_data.media_info）
+        
+        NOTE: 所有素材的文件去重后在 media_probe 线程池中并行探测，结果按内容哈希缓存
+        
+        :param db: 数据库会话
+        :param pks: 素材 ID 列表
+        :return: {素材 ID: 是否成功}
+        """
+        materials = []
+        for pk in dict.fromkeys(pks):
+            material = await crud_material.get(db, pk)
+            if not material:
+                raise MaterialNotFoundError(pk)
+            materials.append(material)
+        
+        probable = [
+            material for material in materials
+            if material.type in (MaterialType.VIDEO.value, MaterialType.AUDIO.value)
+        ]
+        infos = await media_probe.aprobe_many(material.file_path for material in probable)
+        
+        result = {material.id: False for material in materials}
+        for material in probable:
+            info = infos[material.file_path]
+            if info is None:
+                continue
+            await crud_material.update(db, material.id, self._media_fields(material, info))
+            result[material.id] = True
+        
+        logger.info(f"探测素材媒体信息: {sum(result.values())}/{len(result)} 成功")
+        return result
+    
+    async def probe_media_background(self, pk: int) -> None:
+        """
+        上传后的后台探测（请求结束后执行，使用独立的数据库会话）
+        
+        :param pk: 素材 ID
+        """
+        async with database.async_session_maker() as db:
+            try:
+                await self.probe_media(db, [pk])
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"后台探测素材媒体信息失败: {pk}, {e}")
+    
+    async def get_waveform(
+        self,
+        db: AsyncSession,
+        pk: int,
+        start: float = 0.0,
+        end: Optional[float] = None,
+        width: int = 1000
+    ) -> dict:
+        """
+        获取素材波形（峰值金字塔）
+        
+        NOTE: 首次请求时解码素材并生成金字塔（进程池执行），之后的任意缩放只读取内存映射的 .npy 文件
+        
+        :param db: 数据库会话
+        :param pk: 素材 ID
+        :param start: 开始时间（秒）
+        :param end: 结束时间（秒），None 表示素材末尾
+        :param width: 像素数
+        :return: 波形数据，包含每个像素的最小/最大幅度（-1 ~ 1）
+        """
+        material = await crud_material.get(db, pk)
+        if not material:
+            raise MaterialNotFoundError(pk)
+        if material.type not in (MaterialType.VIDEO.value, MaterialType.AUDIO.value):
+            raise BadRequestError(f"素材类型不支持波形: {material.type}")
+        if not os.path.exists(material.file_path):
+            raise BadRequestError(f"素材文件不存在: {material.file_path}")
+        if end is not None and end <= start:
+            raise BadRequestError("结束时间必须大于开始时间")
+        
+        directory = await blocking_executor.run_io(waveform_store.directory, material.file_path)
+        if not waveform_store.exists(directory):
+            try:
+                await blocking_executor.run_cpu(build_material_waveform, material.file_path, directory)
+            except Exception as e:
+                logger.error(f"生成波形失败: {material.file_path}, {e}")
+                raise BadRequestError(f"素材解码失败: {e}")
+        
+        pyramid = await blocking_executor.run_io(waveform_store.open, directory)
+        waveform = await blocking_executor.run_io(pyramid.peaks, start, end, width)
+        waveform["duration"] = round(pyramid.duration, 6)
+        return waveform
+    
     async def get_list(
         self,
         db: AsyncSession,
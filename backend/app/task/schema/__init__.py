@@ -1,3 +1,4 @@
+from backend.app.task.schema.editor import EditOperation
 from backend.app.task.schema.task import TaskCreate, TaskUpdate, TaskInfo
 
-__all__ = ["TaskCreate", "TaskUpdate", "TaskInfo"]
+__all__ = ["EditOperation", "TaskCreate", "TaskUpdate", "TaskInfo"]
@@ -0,0 +1,12 @@
+"""
+编辑器 Schema 定义
+"""
+from typing import Any, Dict
+
+from pydantic import BaseModel, Field
+
+
+class EditOperation(BaseModel):
+    """批量编辑中的单个操作"""
+    op: str = Field(..., description="操作名称, 如 add_filter / split_segment / adjust_color")
+    params: Dict[str, Any] = Field(default_factory=dict, description="操作参数, 与 DraftEditor 对应方法的参数一致")
@@ -1,22 +1,42 @@
 """
 编辑器服务层 - 衔接 API 与 DraftEditor
 """
+import asyncio
 import os
-import json
-from typing import Dict, Any, Optional, List
+from typing import Callable, Dict, Any, Optional, List, Tuple
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 from backend.app.draft.crud.crud_draft import crud_draft
+from backend.common.draft_lock import draft_lock_registry
+from backend.common.draft_serializer import draft_serializer
+from backend.common.draft_store import PersistenceMode, draft_content_store
 from backend.common.exception import NotFoundError, BadRequestError
+from backend.common.executor import blocking_executor
+from backend.common.subtitle_parser import SUBTITLE_FORMATS
+from backend.core.conf import settings
 from backend.integrations.jianying_api.draft_editor import DraftEditor
+from backend.integrations.jianying_api.media_probe import media_probe
 from backend.integrations.py_jianying.effect_manager import effect_manager
 from backend.integrations.py_jianying.track_manager import track_manager
-from backend.integrations.jianying_api.smart_editor import smart_editor
+from backend.integrations.jianying_api.smart_editor import (
+    SILENCE_MODES,
+    smart_editor,
+    analyze_silence,
+    analyze_speech,
+    analyze_highlights,
+    analyze_scenes,
+    analyze_beats,
+)
 from backend.integrations.jianying_api.template_engine import template_engine
+from backend.integrations.jianying_api.variant_generator import build_variants, variant_generator
 
 class EditorService:
     """编辑器服务"""
 
+    # 静音/高光分析只需要的草稿子树
+    VIDEO_QUERY_PATHS = ("tracks", "materials.videos")
+    AUDIO_QUERY_PATHS = ("tracks", "materials.audios")
+
     async def add_music(
         self,
         db: AsyncSession,
@@ -37,25 +57,17 @@ class EditorService:
         if not os.path.exists(content_path):
             raise BadRequestError(message="草稿内容文件不存在，可能是新版本草稿(加密)")
 
+        # 在草稿锁外探测音乐时长（有缓存）
+        media_info = await media_probe.aprobe(music_path)
+
         try:
-            with open(content_path, "r", encoding="utf-8") as f:
-                content = json.load(f)
-
-            editor = DraftEditor(content)
-            if editor.add_audio(music_path, start_time, duration, volume):
-                # 保存回文件
-                new_content = editor.get_content()
-                # 备份
-                import shutil
-                shutil.copy(content_path, content_path + ".bak")
-                
-                with open(content_path, "w", encoding="utf-8") as f:
-                    json.dump(new_content, f, ensure_ascii=False, indent=2)
-                
+            if await self._edit_draft(
+                content_path,
+                lambda editor: editor.add_audio(music_path, start_time, duration, volume, media_info)
+            ):
                 logger.info(f"添加音乐成功: {draft_id}")
                 return True
-            else:
-                return False
+            return False
 
         except Exception as e:
             logger.error(f"编辑草稿失败: {e}")
@@ -79,27 +91,69 @@ class EditorService:
             raise BadRequestError(message="草稿内容文件不存在")
 
         try:
-            with open(content_path, "r", encoding="utf-8") as f:
-                content = json.load(f)
-
-            editor = DraftEditor(content)
-            if editor.deduplicate(config):
-                # 保存
-                new_content = editor.get_content()
-                import shutil
-                shutil.copy(content_path, content_path + ".bak")
-
-                with open(content_path, "w", encoding="utf-8") as f:
-                    json.dump(new_content, f, ensure_ascii=False, indent=2)
-                
+            if await self._edit_draft(content_path, lambda editor: editor.deduplicate(config)):
                 logger.info(f"去重成功: {draft_id}")
                 return True
-            else:
-                return False
+            return False
         except Exception as e:
             logger.error(f"去重失败: {e}")
             raise BadRequestError(message=str(e))
     
+    async def generate_variants(
+        self,
+        db: AsyncSession,
+        draft_id: int,
+        count: int = 1,
+        config: Optional[Dict[str, Any]] = None,
+        seeds: Optional[List[int]] = None,
+        output_dir: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        生成草稿的多个去重变体, 基础草稿只读取、解析一次
+        
+        :param db: 数据库会话
+        :param draft_id: 草稿 ID
+        :param count: 变体数量 (指定 seeds 时忽略)
+        :param config: 去重配置, 同智能去重
+        :param seeds: 随机种子列表, 用于复现已生成的变体
+        :param output_dir: 变体输出目录, 为 None 则使用草稿存储目录
+        :return: 每个变体的结果 (包含变体路径与种子)
+        """
+        draft = await crud_draft.get(db, draft_id)
+        if not draft:
+            raise NotFoundError()
+
+        content_path = os.path.join(draft.draft_path, "draft_content.json")
+        if not os.path.exists(content_path):
+            raise BadRequestError(message="草稿内容文件不存在")
+
+        def prepare() -> Tuple[List[List[tuple]], Any]:
+            content = draft_content_store.load(content_path)
+            jobs = variant_generator.plan(draft.draft_path, output_dir or settings.draft_path, count, config, seeds)
+            groups = variant_generator.partition(jobs, blocking_executor.cpu_workers)
+            if len(groups) <= 1:
+                # 只有一组时在当前进程中生成, 省去序列化与进程间传输
+                return groups, variant_generator.generate(content, jobs)
+            return groups, draft_serializer.dumps(content, compact=True)
+
+        try:
+            # 变体只读取基础草稿, 持有读锁即可; 多进程时序列化后即可释放
+            async with draft_lock_registry.read(content_path):
+                groups, prepared = await blocking_executor.run_io(prepare)
+            if len(groups) <= 1:
+                results = prepared
+            else:
+                # 分组提交到共享的 CPU 进程池, 每组只传输、解析一次基础草稿
+                grouped = await blocking_executor.map_cpu(build_variants, groups, prepared)
+                results = [result for group in grouped for result in group]
+            succeeded = sum(1 for result in results if result["success"])
+            logger.info(f"生成草稿变体完成: {draft_id} - {succeeded}/{len(results)} 个成功")
+            return results
+
+        except Exception as e:
+            logger.error(f"生成草稿变体失败: {e}")
+            raise BadRequestError(message=f"生成草稿变体失败: {str(e)}")
+    
     async def add_filter(
         self,
         db: AsyncSession,
@@ -127,12 +181,7 @@ class EditorService:
             raise BadRequestError(message="草稿内容文件不存在")
 
         try:
-            with open(content_path, "r", encoding="utf-8") as f:
-                content = json.load(f)
-
-            editor = DraftEditor(content)
-            if editor.add_filter(filter_name, intensity, segment_id):
-                self._save_draft_content(content_path, editor.get_content())
+            if await self._edit_draft(content_path, lambda editor: editor.add_filter(filter_name, intensity, segment_id)):
                 logger.info(f"添加滤镜成功: {draft_id} - {filter_name}")
                 return True
             return False
@@ -170,12 +219,10 @@ class EditorService:
             raise BadRequestError(message="草稿内容文件不存在")
 
         try:
-            with open(content_path, "r", encoding="utf-8") as f:
-                content = json.load(f)
-
-            editor = DraftEditor(content)
-            if editor.add_transition(transition_name, duration, from_segment_id, to_segment_id):
-                self._save_draft_content(content_path, editor.get_content())
+            if await self._edit_draft(
+                content_path,
+                lambda editor: editor.add_transition(transition_name, duration, from_segment_id, to_segment_id)
+            ):
                 logger.info(f"添加转场成功: {draft_id} - {transition_name}")
                 return True
             return False
@@ -213,11 +260,6 @@ class EditorService:
             raise BadRequestError(message="草稿内容文件不存在")
 
         try:
-            with open(content_path, "r", encoding="utf-8") as f:
-                content = json.load(f)
-
-            editor = DraftEditor(content)
-            
             # 解析样式配置
             if style is None:
                 style = {}
@@ -227,8 +269,12 @@ class EditorService:
             position_x = style.get("position_x", 0.5)
             position_y = style.get("position_y", 0.9)
             
-            if editor.add_text(text, start_time, duration, font_size, font_color, position_x, position_y):
-                self._save_draft_content(content_path, editor.get_content())
+            if await self._edit_draft(
+                content_path,
+                lambda editor: editor.add_text(
+                    text, start_time, duration, font_size, font_color, position_x, position_y
+                )
+            ):
                 logger.info(f"添加字幕成功: {draft_id} - {text}")
                 return True
             return False
@@ -237,6 +283,57 @@ class EditorService:
             logger.error(f"添加字幕失败: {e}")
             raise BadRequestError(message=f"添加字幕失败: {str(e)}")
     
+    async def import_subtitles(
+        self,
+        db: AsyncSession,
+        draft_id: int,
+        subtitle_path: Optional[str] = None,
+        content: Optional[str] = None,
+        subtitle_format: Optional[str] = None,
+        style: Optional[Dict[str, Any]] = None,
+        time_offset: float = 0.0
+    ) -> bool:
+        """
+        批量导入字幕 (SRT / ASS), 一次加载、一次保存草稿
+        
+        :param db: 数据库会话
+        :param draft_id: 草稿 ID
+        :param subtitle_path: 字幕文件路径 (与 content 二选一)
+        :param content: 字幕文本
+        :param subtitle_format: "srt" / "ass", 为 None 则自动判断
+        :param style: 默认字幕样式配置 (同 add_subtitle)
+        :param time_offset: 整体时间偏移(秒)
+        :return: 是否成功
+        """
+        if not subtitle_path and not content:
+            raise BadRequestError(message="必须提供字幕文件路径或字幕内容")
+        if subtitle_path and not os.path.isfile(subtitle_path):
+            raise BadRequestError(message=f"字幕文件不存在: {subtitle_path}")
+        if subtitle_format is not None and subtitle_format not in SUBTITLE_FORMATS:
+            raise BadRequestError(message=f"不支持的字幕格式: {subtitle_format}")
+
+        content_path = await self._draft_content_path(db, draft_id)
+        style = style or {}
+
+        try:
+            if await self._edit_draft(
+                content_path,
+                lambda editor: editor.import_subtitles(
+                    subtitle_path, content, subtitle_format,
+                    style.get("font_size", 48), style.get("font_color", "#FFFFFF"),
+                    style.get("position_x", 0.5), style.get("position_y", 0.9), time_offset
+                )
+            ):
+                logger.info(f"导入字幕成功: {draft_id}")
+                return True
+            raise BadRequestError(message="导入字幕失败: 未解析到任何字幕")
+
+        except BadRequestError:
+            raise
+        except Exception as e:
+            logger.error(f"导入字幕失败: {e}")
+            raise BadRequestError(message=f"导入字幕失败: {str(e)}")
+    
     async def split_video(
         self,
         db: AsyncSession,
@@ -262,12 +359,7 @@ class EditorService:
             raise BadRequestError(message="草稿内容文件不存在")
 
         try:
-            with open(content_path, "r", encoding="utf-8") as f:
-                content = json.load(f)
-
-            editor = DraftEditor(content)
-            if editor.split_segment(segment_id, split_time):
-                self._save_draft_content(content_path, editor.get_content())
+            if await self._edit_draft(content_path, lambda editor: editor.split_segment(segment_id, split_time)):
                 logger.info(f"分割视频成功: {draft_id} - {segment_id}")
                 return True
             return False
@@ -303,12 +395,7 @@ class EditorService:
             raise BadRequestError(message="草稿内容文件不存在")
 
         try:
-            with open(content_path, "r", encoding="utf-8") as f:
-                content = json.load(f)
-
-            editor = DraftEditor(content)
-            if editor.trim_segment(segment_id, start_time, end_time):
-                self._save_draft_content(content_path, editor.get_content())
+            if await self._edit_draft(content_path, lambda editor: editor.trim_segment(segment_id, start_time, end_time)):
                 logger.info(f"裁剪视频成功: {draft_id} - {segment_id}")
                 return True
             return False
@@ -342,22 +429,7 @@ class EditorService:
             raise BadRequestError(message="草稿内容文件不存在")
 
         try:
-            with open(content_path, "r", encoding="utf-8") as f:
-                content = json.load(f)
-
-            editor = DraftEditor(content)
-            
-            # 应用各种调整
-            success = True
-            if "brightness" in adjustments:
-                success = success and editor.adjust_brightness(segment_id, adjustments["brightness"])
-            if "contrast" in adjustments:
-                success = success and editor.adjust_contrast(segment_id, adjustments["contrast"])
-            if "saturation" in adjustments:
-                success = success and editor.adjust_saturation(segment_id, adjustments["saturation"])
-            
-            if success:
-                self._save_draft_content(content_path, editor.get_content())
+            if await self._edit_draft(content_path, lambda editor: editor.adjust_color(segment_id, adjustments)):
                 logger.info(f"调整颜色成功: {draft_id} - {segment_id}")
                 return True
             return False
@@ -397,15 +469,18 @@ class EditorService:
             if position is None:
                 position = {"x": 0.5, "y": 0.5}
             
-            success = effect_manager.add_sticker(
-                draft.draft_path,
-                sticker_path,
-                start_time,
-                duration,
-                position.get("x", 0.5),
-                position.get("y", 0.5),
-                scale
-            )
+            # 先在事件循环中等待写锁，effect_manager 内部的加锁会识别为已持有
+            async with draft_lock_registry.write(os.path.join(draft.draft_path, "draft_content.json")):
+                success = await blocking_executor.run_io(
+                    effect_manager.add_sticker,
+                    draft.draft_path,
+                    sticker_path,
+                    start_time,
+                    duration,
+                    position.get("x", 0.5),
+                    position.get("y", 0.5),
+                    scale
+                )
             
             if success:
                 logger.info(f"添加贴纸成功: {draft_id}")
@@ -416,6 +491,89 @@ class EditorService:
             logger.error(f"添加贴纸失败: {e}")
             raise BadRequestError(message=f"添加贴纸失败: {str(e)}")
     
+    async def _edit_draft(self, content_path: str, edit: Callable[[DraftEditor], bool]) -> bool:
+        """
+        持有草稿写锁, 在 I/O 线程池中完成 加载 -> 编辑 -> 保存, 不阻塞事件循环
+        
+        :param content_path: 草稿内容文件路径
+        :param edit: 编辑函数, 返回 False 时放弃修改
+        :return: 是否成功
+        """
+        def run() -> bool:
+            content = draft_content_store.load(content_path)
+            try:
+                editor = DraftEditor(content)
+                if not edit(editor):
+                    draft_content_store.invalidate(content_path)
+                    return False
+                self._save_draft_content(content_path, editor.get_content())
+                return True
+            except Exception:
+                draft_content_store.invalidate(content_path)
+                raise
+        
+        async with draft_lock_registry.write(content_path):
+            return await blocking_executor.run_io(run)
+    
+    async def _collect_video_paths(self, content_path: str) -> List[str]:
+        """
+        持有草稿读锁, 只读查询草稿并收集视频素材路径
+        
+        :param content_path: 草稿内容文件路径
+        :return: 素材路径列表
+        """
+        content = await self._query_draft(content_path, self.VIDEO_QUERY_PATHS)
+        return await blocking_executor.run_io(smart_editor.collect_video_paths, content)
+    
+    async def _query_draft(self, content_path: str, paths: tuple) -> Dict:
+        """
+        持有草稿读锁, 在 I/O 线程池中只读查询草稿的部分内容
+        
+        :param content_path: 草稿内容文件路径
+        :param paths: 以点分隔的路径, 见 DraftContentStore.query
+        :return: 只包含指定路径的草稿字典 (独立副本, 释放读锁后仍可安全读取)
+        """
+        async with draft_lock_registry.read(content_path):
+            return await blocking_executor.run_io(draft_content_store.query, content_path, paths)
+    
+    @staticmethod
+    async def _analyze_media(analyzer: Callable, media_paths: List[str], *params) -> Dict[str, Any]:
+        """
+        每个素材作为一个任务提交到 CPU 进程池并行分析, 结果按 media_paths 顺序合并
+        
+        :param analyzer: 批量分析函数 (analyze_silence / analyze_highlights)
+        :param media_paths: 去重后的素材路径列表
+        :param params: 分析参数
+        :return: {路径: 分析结果}
+        """
+        results = await blocking_executor.map_cpu(analyzer, [[path] for path in media_paths], *params)
+        merged: Dict[str, Any] = {}
+        for result in results:
+            merged.update(result)
+        return merged
+    
+    @staticmethod
+    def _check_silence_mode(mode: str) -> None:
+        """校验删除静音的检测模式"""
+        if mode not in SILENCE_MODES:
+            raise BadRequestError(message=f"不支持的检测模式: {mode}, 可选: {', '.join(SILENCE_MODES)}")
+    
+    async def _analyze_silence(
+        self,
+        media_paths: List[str],
+        mode: str,
+        silence_threshold: float,
+        min_silence_duration: float
+    ) -> Dict[str, Any]:
+        """
+        按检测模式并行分析素材
+        
+        :return: threshold 模式为 {路径: 静音片段列表}, vad 模式为 {路径: 语音片段列表}
+        """
+        if mode == "vad":
+            return await self._analyze_media(analyze_speech, media_paths, min_silence_duration)
+        return await self._analyze_media(analyze_silence, media_paths, silence_threshold, min_silence_duration)
+    
     def _save_draft_content(self, content_path: str, content: Dict):
         """
         保存草稿内容并备份
@@ -423,29 +581,28 @@ class EditorService:
         :param content_path: 草稿内容文件路径
         :param content: 草稿内容
         """
-        import shutil
-        # 备份
-        shutil.copy(content_path, content_path + ".bak")
-        # 保存
-        with open(content_path, "w", encoding="utf-8") as f:
-            json.dump(content, f, ensure_ascii=False, indent=2)
+        # 原子写入，旧版本轮转为 .bak.N，并刷新解析缓存
+        draft_content_store.save(content_path, content)
     
     async def remove_silence(
         self,
         db: AsyncSession,
         draft_id: int,
         silence_threshold: float = -40.0,
-        min_silence_duration: float = 0.5
+        min_silence_duration: float = 0.5,
+        mode: str = "threshold"
     ) -> bool:
         """
         删除草稿中的静音片段
         
         :param db: 数据库会话
         :param draft_id: 草稿 ID
-        :param silence_threshold: 静音阈值 (dB)
+        :param silence_threshold: 静音阈值 (dB), 仅 threshold 模式使用
         :param min_silence_duration: 最小静音时长(秒)
+        :param mode: 检测模式, 见 SILENCE_MODES
         :return: 是否成功
         """
+        self._check_silence_mode(mode)
         draft = await crud_draft.get(db, draft_id)
         if not draft:
             raise NotFoundError()
@@ -455,30 +612,103 @@ class EditorService:
             raise BadRequestError(message="草稿内容文件不存在")
 
         try:
-            with open(content_path, "r", encoding="utf-8") as f:
-                content = json.load(f)
+            # 音频解码与静音检测在进程池中按素材并行执行
+            media_paths = await self._collect_video_paths(content_path)
+            analysis = await self._analyze_silence(media_paths, mode, silence_threshold, min_silence_duration)
 
-            # 使用智能编辑器删除静音
-            new_content = smart_editor.remove_silence(
-                content,
-                silence_threshold,
-                min_silence_duration
-            )
-            
-            self._save_draft_content(content_path, new_content)
+            # 使用智能编辑器删除静音 (失败时不保存, 缓存中被部分修改的草稿失效)
+            if not await self._edit_draft(
+                content_path,
+                lambda editor: smart_editor.remove_silence(
+                    editor.get_content(),
+                    silence_threshold,
+                    min_silence_duration,
+                    analysis=analysis,
+                    mode=mode
+                ) is not None
+            ):
+                raise BadRequestError(message="删除静音片段失败")
             logger.info(f"删除静音片段成功: {draft_id}")
             return True
 
+        except BadRequestError:
+            raise
         except Exception as e:
             logger.error(f"删除静音片段失败: {e}")
             raise BadRequestError(message=f"删除静音片段失败: {str(e)}")
     
+    async def batch_remove_silence(
+        self,
+        db: AsyncSession,
+        draft_ids: List[int],
+        silence_threshold: float = -40.0,
+        min_silence_duration: float = 0.5,
+        mode: str = "threshold"
+    ) -> List[Dict[str, Any]]:
+        """
+        批量删除多个草稿中的静音片段
+        
+        NOTE: 先收集全部草稿引用的素材并去重, 每个素材只分析一次 (多个草稿共享同一素材时不重复解码),
+        分析任务与单个草稿的删除静音共用同一个 CPU 进程池; 各草稿只取自己素材的分析结果编辑,
+        结果顺序与 draft_ids 一致
+        
+        :param db: 数据库会话
+        :param draft_ids: 草稿 ID 列表
+        :param silence_threshold: 静音阈值 (dB), 仅 threshold 模式使用
+        :param min_silence_duration: 最小静音时长(秒)
+        :param mode: 检测模式, 见 SILENCE_MODES
+        :return: 处理结果列表
+        """
+        self._check_silence_mode(mode)
+        results: List[Dict[str, Any]] = [{"draft_id": draft_id, "success": False} for draft_id in draft_ids]
+        drafts: Dict[int, tuple] = {}
+        for i, draft_id in enumerate(draft_ids):
+            try:
+                content_path = await self._draft_content_path(db, draft_id)
+                drafts[i] = (content_path, await self._collect_video_paths(content_path))
+            except Exception as e:
+                results[i]["error"] = str(e) or "草稿不存在"
+
+        # 全部草稿的素材去重 (保持首次出现的顺序), 并行分析
+        media_paths = list(dict.fromkeys(path for _, paths in drafts.values() for path in paths))
+        try:
+            analysis = await self._analyze_silence(media_paths, mode, silence_threshold, min_silence_duration)
+        except Exception as e:
+            logger.error(f"批量静音检测失败: {e}")
+            raise BadRequestError(message=f"批量静音检测失败: {str(e)}")
+
+        async def edit(i: int, content_path: str, paths: List[str]) -> None:
+            draft_analysis = {path: analysis[path] for path in paths}
+            try:
+                results[i]["success"] = await self._edit_draft(
+                    content_path,
+                    lambda editor: smart_editor.remove_silence(
+                        editor.get_content(),
+                        silence_threshold,
+                        min_silence_duration,
+                        analysis=draft_analysis,
+                        mode=mode
+                    ) is not None
+                )
+            except Exception as e:
+                results[i]["error"] = str(e)
+
+        # 不同草稿持有各自的写锁, 编辑在 I/O 线程池中并发执行
+        await asyncio.gather(*(edit(i, *drafts[i]) for i in sorted(drafts)))
+        succeeded = sum(1 for result in results if result["success"])
+        logger.info(f"批量删除静音片段: {succeeded}/{len(draft_ids)} 个成功, 分析素材 {len(media_paths)} 个")
+        return results
+    
     async def extract_highlights(
         self,
         db: AsyncSession,
         draft_id: int,
         threshold_percentile: float = 80.0,
-        min_highlight_duration: float = 2.0
+        min_highlight_duration: float = 2.0,
+        window: float = 1.0,
+        hop: Optional[float] = None,
+        top_k: Optional[int] = None,
+        max_duration: Optional[float] = None
     ) -> List[Dict]:
         """
         提取草稿中的高光片段
@@ -487,6 +717,10 @@ class EditorService:
         :param draft_id: 草稿 ID
         :param threshold_percentile: 音量阈值百分位
         :param min_highlight_duration: 最小高光时长(秒)
+        :param window: 窗口长度(秒)
+        :param hop: 滑动窗口步长(秒), 指定 hop / top_k / max_duration 时按得分选取前 K 个片段
+        :param top_k: 每个素材最多返回的片段数
+        :param max_duration: 每个素材的片段总时长上限(秒)
         :return: 高光片段列表
         """
         draft = await crud_draft.get(db, draft_id)
@@ -498,14 +732,29 @@ class EditorService:
             raise BadRequestError(message="草稿内容文件不存在")
 
         try:
-            with open(content_path, "r", encoding="utf-8") as f:
-                content = json.load(f)
+            # 只需要视频轨道与视频素材, 大草稿不构建其他子树
+            content = await self._query_draft(content_path, self.VIDEO_QUERY_PATHS)
+            
+            # 音频解码与高光检测在进程池中按素材并行执行
+            media_paths = await blocking_executor.run_io(smart_editor.collect_video_paths, content)
+            analysis = await self._analyze_media(
+                analyze_highlights,
+                media_paths,
+                threshold_percentile,
+                min_highlight_duration,
+                window,
+                hop,
+                top_k,
+                max_duration
+            )
 
-            # 使用智能编辑器提取高光
-            highlights = smart_editor.extract_highlights(
+            # 使用智能编辑器提取高光 (基于同一份查询结果, 不修改草稿)
+            highlights = await blocking_executor.run_io(
+                smart_editor.extract_highlights,
                 content,
                 threshold_percentile,
-                min_highlight_duration
+                min_highlight_duration,
+                analysis=analysis
             )
             
             logger.info(f"提取高光片段成功: {draft_id}")
@@ -515,6 +764,129 @@ class EditorService:
             logger.error(f"提取高光片段失败: {e}")
             raise BadRequestError(message=f"提取高光片段失败: {str(e)}")
     
+    async def detect_scenes(
+        self,
+        db: AsyncSession,
+        draft_id: int,
+        threshold: float = 0.3,
+        region_ratio: float = 0.5,
+        min_scene_duration: float = 1.0
+    ) -> List[Dict]:
+        """
+        检测草稿视频片段中的镜头切换点
+        
+        :param db: 数据库会话
+        :param draft_id: 草稿 ID
+        :param threshold: 直方图差阈值 (0-1)
+        :param region_ratio: 变化区域占比阈值 (0-1)
+        :param min_scene_duration: 最短镜头时长(秒)
+        :return: 切换点列表
+        """
+        content_path = await self._draft_content_path(db, draft_id)
+
+        try:
+            content = await self._query_draft(content_path, self.VIDEO_QUERY_PATHS)
+            
+            # 视频解码与镜头切换检测在进程池中按素材并行执行
+            media_paths = await blocking_executor.run_io(smart_editor.collect_video_paths, content)
+            analysis = await self._analyze_media(
+                analyze_scenes, media_paths, threshold, region_ratio, min_scene_duration
+            )
+            scenes = await blocking_executor.run_io(
+                smart_editor.detect_scenes,
+                content,
+                threshold,
+                region_ratio,
+                min_scene_duration,
+                analysis=analysis
+            )
+            
+            logger.info(f"镜头切换检测成功: {draft_id}")
+            return scenes
+
+        except Exception as e:
+            logger.error(f"镜头切换检测失败: {e}")
+            raise BadRequestError(message=f"镜头切换检测失败: {str(e)}")
+    
+    async def _analyze_beats(self, content_path: str) -> Dict[str, Any]:
+        """
+        检测草稿音频轨道中音乐的节拍
+        
+        :param content_path: 草稿内容文件路径
+        :return: {"tempo": {路径: BPM}, "beats": 节拍时间线时间列表, "onsets": 起音时间线时间列表}
+        """
+        content = await self._query_draft(content_path, self.AUDIO_QUERY_PATHS)
+        media_paths = await blocking_executor.run_io(smart_editor.collect_media_paths, content, "audio")
+        if not media_paths:
+            raise BadRequestError(message="草稿中没有可分析的音乐")
+        # 音频解码与节拍检测在进程池中按素材并行执行
+        analysis = await self._analyze_media(analyze_beats, media_paths)
+        return {
+            "tempo": {path: result["tempo"] for path, result in analysis.items() if result},
+            "beats": await blocking_executor.run_io(smart_editor.beat_times, content, analysis),
+            "onsets": await blocking_executor.run_io(smart_editor.beat_times, content, analysis, "onsets"),
+        }
+    
+    async def detect_beats(self, db: AsyncSession, draft_id: int) -> Dict[str, Any]:
+        """
+        检测草稿中背景音乐的节拍
+        
+        :param db: 数据库会话
+        :param draft_id: 草稿 ID
+        :return: {"tempo": {路径: BPM}, "beats": 节拍时间线时间列表, "onsets": 起音时间线时间列表}
+        """
+        content_path = await self._draft_content_path(db, draft_id)
+        try:
+            result = await self._analyze_beats(content_path)
+            logger.info(f"节拍检测成功: {draft_id}")
+            return result
+        except BadRequestError:
+            raise
+        except Exception as e:
+            logger.error(f"节拍检测失败: {e}")
+            raise BadRequestError(message=f"节拍检测失败: {str(e)}")
+    
+    async def snap_to_beats(
+        self,
+        db: AsyncSession,
+        draft_id: int,
+        max_shift: float = 0.5,
+        min_duration: float = 0.5,
+        use_onsets: bool = False
+    ) -> Dict[str, int]:
+        """
+        把视频片段之间的切点对齐到背景音乐的节拍
+        
+        :param db: 数据库会话
+        :param draft_id: 草稿 ID
+        :param max_shift: 切点最大移动距离 (秒)
+        :param min_duration: 片段最短时长 (秒)
+        :param use_onsets: 对齐到起音而不是节拍
+        :return: {"boundaries": 切点数, "snapped": 移动的切点数}
+        """
+        content_path = await self._draft_content_path(db, draft_id)
+        try:
+            analysis = await self._analyze_beats(content_path)
+            points = analysis["onsets" if use_onsets else "beats"]
+            if not points:
+                raise BadRequestError(message="未检测到节拍")
+
+            stats: Dict[str, int] = {}
+
+            def snap(editor: DraftEditor) -> bool:
+                stats.update(smart_editor.snap_to_beats(editor.get_content(), points, max_shift, min_duration))
+                # 没有移动任何切点时不保存
+                return stats["snapped"] > 0
+
+            await self._edit_draft(content_path, snap)
+            logger.info(f"切点对齐节拍成功: {draft_id}")
+            return stats
+        except BadRequestError:
+            raise
+        except Exception as e:
+            logger.error(f"切点对齐节拍失败: {e}")
+            raise BadRequestError(message=f"切点对齐节拍失败: {str(e)}")
+    
     async def apply_template(
         self,
         db: AsyncSession,
@@ -538,16 +910,17 @@ class EditorService:
             raise BadRequestError(message="草稿内容文件不存在")
 
         try:
-            with open(content_path, "r", encoding="utf-8") as f:
-                content = json.load(f)
-
-            # 使用模板引擎应用模板
-            new_content = template_engine.apply_template(content, template_config)
-            
-            self._save_draft_content(content_path, new_content)
+            # 使用模板引擎应用模板（失败时放弃修改，不保存部分应用的草稿）
+            if not await self._edit_draft(
+                content_path,
+                lambda editor: template_engine.apply_template(editor.get_content(), template_config) is not None
+            ):
+                raise BadRequestError(message="应用模板失败")
             logger.info(f"应用模板成功: {draft_id}")
             return True
 
+        except BadRequestError:
+            raise
         except Exception as e:
             logger.error(f"应用模板失败: {e}")
             raise BadRequestError(message=f"应用模板失败: {str(e)}")
@@ -584,5 +957,138 @@ class EditorService:
         
         return results
 
+    async def batch_edit(
+        self,
+        db: AsyncSession,
+        draft_id: int,
+        operations: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        批量编辑草稿: 一次加载、顺序执行全部操作、一次保存
+        
+        NOTE: 全部成功才保存，任一操作失败则丢弃全部修改
+        
+        :param db: 数据库会话
+        :param draft_id: 草稿 ID
+        :param operations: 操作列表 [{"op": "add_filter", "params": {...}}, ...]
+        :return: 每个操作的执行结果
+        """
+        draft = await crud_draft.get(db, draft_id)
+        if not draft:
+            raise NotFoundError()
+
+        content_path = os.path.join(draft.draft_path, "draft_content.json")
+        if not os.path.exists(content_path):
+            raise BadRequestError(message="草稿内容文件不存在")
+
+        results = []
+
+        def apply_all(editor: DraftEditor) -> bool:
+            for index, operation in enumerate(operations):
+                op = operation.get("op")
+                result = {"index": index, "op": op, "success": False}
+                results.append(result)
+                try:
+                    result["success"] = editor.apply_operation(op, operation.get("params"))
+                    if not result["success"]:
+                        result["error"] = "操作未生效"
+                except ValueError as e:
+                    result["error"] = str(e)
+
+                if not result["success"]:
+                    # 抛出后缓存中已被修改的草稿对象会被丢弃，磁盘文件保持不变
+                    raise BadRequestError(
+                        message=f"批量编辑失败: 第 {index + 1} 个操作 {op} 执行失败，全部操作已回滚",
+                        data={"results": results}
+                    )
+            return True
+
+        try:
+            await self._edit_draft(content_path, apply_all)
+            logger.info(f"批量编辑成功: {draft_id} - {len(operations)} 个操作")
+            return results
+
+        except BadRequestError:
+            raise
+        except Exception as e:
+            logger.error(f"批量编辑失败: {e}")
+            raise BadRequestError(message=f"批量编辑失败: {str(e)}", data={"results": results})
+
+    async def _draft_content_path(self, db: AsyncSession, draft_id: int) -> str:
+        """
+        获取草稿内容文件路径
+        
+        :param db: 数据库会话
+        :param draft_id: 草稿 ID
+        :return: draft_content.json 路径
+        """
+        draft = await crud_draft.get(db, draft_id)
+        if not draft:
+            raise NotFoundError()
+
+        content_path = os.path.join(draft.draft_path, "draft_content.json")
+        if not os.path.exists(content_path):
+            raise BadRequestError(message="草稿内容文件不存在")
+        return content_path
+
+    async def undo(self, db: AsyncSession, draft_id: int) -> Dict[str, Any]:
+        """
+        撤销最近一次编辑 (需要 draft.persistence.mode: patch_log)
+        
+        :param db: 数据库会话
+        :param draft_id: 草稿 ID
+        :return: 撤销后的历史状态
+        """
+        return await self._step_history(db, draft_id, "undo")
+
+    async def redo(self, db: AsyncSession, draft_id: int) -> Dict[str, Any]:
+        """
+        重做最近一次撤销 (需要 draft.persistence.mode: patch_log)
+        
+        :param db: 数据库会话
+        :param draft_id: 草稿 ID
+        :return: 重做后的历史状态
+        """
+        return await self._step_history(db, draft_id, "redo")
+
+    async def _step_history(self, db: AsyncSession, draft_id: int, op: str) -> Dict[str, Any]:
+        """执行撤销/重做"""
+        content_path = await self._draft_content_path(db, draft_id)
+        if draft_content_store.persistence != PersistenceMode.PATCH_LOG:
+            raise BadRequestError(message="撤销/重做需要启用补丁日志: draft.persistence.mode = patch_log")
+
+        async with draft_lock_registry.write(content_path):
+            step = draft_content_store.undo if op == "undo" else draft_content_store.redo
+            if not await blocking_executor.run_io(step, content_path):
+                raise BadRequestError(message="没有可撤销的操作" if op == "undo" else "没有可重做的操作")
+            history = await blocking_executor.run_io(draft_content_store.history, content_path)
+
+        logger.info(f"{'撤销' if op == 'undo' else '重做'}成功: {draft_id}")
+        return history
+
+    async def get_history(self, db: AsyncSession, draft_id: int) -> Dict[str, Any]:
+        """
+        获取撤销/重做历史
+        
+        :param db: 数据库会话
+        :param draft_id: 草稿 ID
+        :return: {"mode": 持久化模式, "undo": 可撤销步数, "redo": 可重做步数}
+        """
+        content_path = await self._draft_content_path(db, draft_id)
+        async with draft_lock_registry.read(content_path):
+            return await blocking_executor.run_io(draft_content_store.history, content_path)
+
+    async def compact(self, db: AsyncSession, draft_id: int) -> bool:
+        """
+        把补丁日志合并为完整快照
+        
+        :param db: 数据库会话
+        :param draft_id: 草稿 ID
+        :return: 是否执行了合并 (没有补丁日志时为 False)
+        """
+        content_path = await self._draft_content_path(db, draft_id)
+        async with draft_lock_registry.write(content_path):
+            return await blocking_executor.run_io(draft_content_store.compact, content_path)
+
 editor_service = EditorService()
 
@@ -12,7 +12,9 @@ from backend.app.material.crud.crud_material import crud_material
 from backend.app.template.crud.crud_template import crud_template
 from backend.app.template.model.template import Template
 from backend.app.template.schema.template import TemplateCreate, TemplateUpdate
+from backend.common.draft_lock import draft_lock_registry
 from backend.common.exception import NotFoundError, BadRequestError
+from backend.common.executor import blocking_executor
 from backend.integrations.py_jianying import template_manager as py_template_manager
 
 
@@ -145,11 +147,13 @@ class TemplateService:
             raise NotFoundError(msg=f"草稿不存在: {draft_id}")
         
         # 从草稿创建模板
-        template_dir = py_template_manager.create_template_from_draft(
-            draft.draft_path,
-            template_name,
-            description
-        )
+        async with draft_lock_registry.read(os.path.join(draft.draft_path, "draft_content.json")):
+            template_dir = await blocking_executor.run_io(
+                py_template_manager.create_template_from_draft,
+                draft.draft_path,
+                template_name,
+                description
+            )
         
         if not template_dir:
             raise BadRequestError(message="从草稿创建模板失败")
@@ -222,11 +226,13 @@ class TemplateService:
             str_materials_mapping = {k: str(v) for k, v in materials_mapping.items()}
             
             # 应用模板
-            success = py_template_manager.apply_template(
-                draft.draft_path,
-                temp_template_path,
-                str_materials_mapping
-            )
+            async with draft_lock_registry.write(os.path.join(draft.draft_path, "draft_content.json")):
+                success = await blocking_executor.run_io(
+                    py_template_manager.apply_template,
+                    draft.draft_path,
+                    temp_template_path,
+                    str_materials_mapping
+                )
             
             if not success:
                 raise BadRequestError(message="应用模板失败")
@@ -0,0 +1,221 @@
+"""
+媒体分析结果缓存
+
+NOTE: 静音/高光检测每次都要用 pydub 解码整个媒体文件，同一素材被多个片段、多个草稿引用，
+重复执行同一草稿的分析也会重复解码
+1. 缓存键 = (媒体内容哈希, 分析器, 参数)，内容哈希与路径无关，素材被复制或改名后仍能命中
+2. 结果以 JSON 文件保存在磁盘上（进程池中的工作进程与服务进程共享），写入为原子操作
+3. 总大小超过上限时按最近使用时间（命中时刷新文件 mtime）淘汰最旧的条目
+
+内容哈希: 文件大小 + 头部/中部/尾部各 hash_sample_size 字节的 BLAKE2b（媒体文件通常为 GB 级，
+完整哈希的开销接近一次解码），hash_sample_size 为 0 时哈希整个文件；
+同一进程内按 (路径, mtime, 大小) 记住哈希，文件未变化时不重复读取
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from loguru import logger
+
+from backend.core.conf import app_config, settings
+from backend.utils.file_utils import atomic_write
+
+
+class AnalysisCache:
+    """媒体分析结果磁盘缓存（LRU）"""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_size: Optional[int] = None,
+        hash_sample_size: Optional[int] = None,
+        enabled: Optional[bool] = None
+    ):
+        """
+        :param cache_dir: 缓存目录
+        :param max_size: 缓存总大小上限（字节）
+        :param hash_sample_size: 内容哈希的采样大小（字节），0 表示哈希整个文件
+        :param enabled: 是否启用
+        """
+        self.cache_dir = cache_dir or app_config.get(
+            'analysis_cache.path', os.path.join(settings.storage_root, 'cache', 'analysis')
+        )
+        self.max_size = max_size if max_size is not None else app_config.get('analysis_cache.max_size', 268435456)
+        self.hash_sample_size = hash_sample_size if hash_sample_size is not None else app_config.get(
+            'analysis_cache.hash_sample_size', 1048576
+        )
+        self.enabled = enabled if enabled is not None else app_config.get('analysis_cache.enabled', True)
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+        # 缓存目录总大小，首次写入时扫描一次
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def content_hash(self, media_path: str) -> str:
+        """
+        媒体内容哈希
+
+        :param media_path: 媒体文件路径
+        :return: 十六进制哈希
+        """
+        stat = os.stat(media_path)
+        memo_key = (os.path.abspath(media_path), stat.st_mtime_ns, stat.st_size)
+        cached = self._hashes.get(memo_key)
+        if cached is not None:
+            return cached
+
+        digest = hashlib.blake2b(str(stat.st_size).encode(), digest_size=20)
+        sample = self.hash_sample_size
+        with open(media_path, 'rb') as f:
+            if not sample or stat.st_size <= sample * 3:
+                for chunk in iter(lambda: f.read(1048576), b''):
+                    digest.update(chunk)
+            else:
+                for offset in (0, (stat.st_size - sample) // 2, stat.st_size - sample):
+                    f.seek(offset)
+                    digest.update(f.read(sample))
+        content_hash = digest.hexdigest()
+        self._hashes[memo_key] = content_hash
+        return content_hash
+
+    def _entry_path(self, media_path: str, analyzer: str, params: Dict[str, Any]) -> str:
+        key = json.dumps(
+            [self.content_hash(media_path), analyzer, params], sort_keys=True, separators=(',', ':')
+        )
+        name = hashlib.blake2b(key.encode(), digest_size=20).hexdigest()
+        return os.path.join(self.cache_dir, name[:2], name + '.json')
+
+    def get(self, media_path: str, analyzer: str, params: Dict[str, Any]) -> Optional[Any]:
+        """
+        读取缓存
+
+        :param media_path: 媒体文件路径
+        :param analyzer: 分析器名称（含版本，算法变化时更换）
+        :param params: 分析参数
+        :return: 分析结果，未命中时返回 None
+        """
+        if not self.enabled:
+            return None
+        entry_path = self._entry_path(media_path, analyzer, params)
+        try:
+            with open(entry_path, 'rb') as f:
+                result = json.loads(f.read())
+            # 刷新最近使用时间
+            os.utime(entry_path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, media_path: str, analyzer: str, params: Dict[str, Any], result: Any) -> None:
+        """
+        写入缓存
+
+        :param media_path: 媒体文件路径
+        :param analyzer: 分析器名称
+        :param params: 分析参数
+        :param result: 分析结果（可 JSON 序列化）
+        """
+        if not self.enabled:
+            return
+        entry_path = self._entry_path(media_path, analyzer, params)
+        data = json.dumps(result, separators=(',', ':')).encode('utf-8')
+        try:
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+            atomic_write(entry_path, data)
+        except OSError as e:
+            logger.warning(f"写入分析缓存失败: {e}")
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan()[1]
+            else:
+                self._size += len(data)
+            if self._size > self.max_size:
+                self._evict()
+
+    def get_or_compute(
+        self,
+        media_path: str,
+        analyzer: str,
+        params: Dict[str, Any],
+        compute: Callable[[], Any]
+    ) -> Any:
+        """
+        读取缓存，未命中时计算并写入（compute 抛出异常时不写入）
+
+        :param media_path: 媒体文件路径
+        :param analyzer: 分析器名称
+        :param params: 分析参数
+        :param compute: 计算函数
+        :return: 分析结果
+        """
+        result = self.get(media_path, analyzer, params)
+        if result is None:
+            result = compute()
+            self.put(media_path, analyzer, params, result)
+        return result
+
+    def _scan(self) -> Tuple[list, int]:
+        """扫描缓存目录: ([(mtime, 大小, 路径), ...], 总大小)"""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+                total += stat.st_size
+        return entries, total
+
+    def _evict(self) -> None:
+        """按最近使用时间淘汰，直到总大小降到上限的 90%"""
+        entries, total = self._scan()
+        target = self.max_size * 0.9
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # 其他进程已淘汰
+                pass
+            total -= size
+            removed += 1
+        self._size = total
+        logger.debug(f"分析缓存淘汰 {removed} 个条目, 当前 {total} 字节")
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            for _, _, path in self._scan()[0]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._size = 0
+
+    @property
+    def stats(self) -> dict:
+        """缓存状态"""
+        return {
+            'enabled': self.enabled,
+            'cache_dir': self.cache_dir,
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+# 全局分析缓存实例
+analysis_cache = AnalysisCache()
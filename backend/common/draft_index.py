@@ -0,0 +1,255 @@
+"""
+草稿索引
+
+NOTE: 按 ID 查找片段/素材原本需要逐轨道、逐片段线性扫描，批量操作（例如对每个片段调色）因此退化为 O(n²)
+1. 片段: segment_id -> (轨道, 位置)
+2. 素材: material_id -> (素材类别, 素材)，素材类别即 materials 下的键（videos/audios/texts/...）
+3. 轨道: 轨道类型 -> 轨道列表
+各部分在首次查询时构建；通过索引的 add_*/insert_*/set_* 方法修改草稿时增量更新
+
+绕过索引直接修改草稿（例如 py_jianying 管理器或旧代码）也是安全的:
+命中的条目会校验 ID，结构签名（列表对象与长度）变化后的未命中会触发重建
+"""
+from typing import Dict, List, Optional, Tuple
+
+
+class DraftIndex:
+    """草稿内容索引"""
+
+    def __init__(self, content: dict):
+        """
+        :param content: 草稿内容（draft_content.json 的字典对象）
+        """
+        self.content = content
+        self._segments: Optional[Dict[str, Tuple[dict, int]]] = None
+        self._segments_signature: Optional[tuple] = None
+        self._materials: Optional[Dict[str, Tuple[str, dict]]] = None
+        self._materials_signature: Optional[tuple] = None
+        self._tracks: Optional[Dict[str, List[dict]]] = None
+        self._tracks_signature: Optional[tuple] = None
+
+    # ==================== 结构签名 ====================
+
+    def _track_list(self) -> list:
+        return self.content.get("tracks") or []
+
+    def _material_lists(self) -> List[Tuple[str, list]]:
+        return [
+            (category, materials)
+            for category, materials in (self.content.get("materials") or {}).items()
+            if isinstance(materials, list)
+        ]
+
+    def _segment_signature(self) -> tuple:
+        return tuple(
+            (id(segments), len(segments))
+            for segments in (track.get("segments") or () for track in self._track_list())
+        )
+
+    def _material_signature(self) -> tuple:
+        return tuple((id(materials), len(materials)) for _, materials in self._material_lists())
+
+    def _track_signature(self) -> tuple:
+        tracks = self._track_list()
+        return id(tracks), len(tracks)
+
+    # ==================== 构建 ====================
+
+    def _build_segments(self) -> None:
+        self._segments = {}
+        for track in self._track_list():
+            self._index_positions(track, 0)
+        self._segments_signature = self._segment_signature()
+
+    def _build_materials(self) -> None:
+        self._materials = {}
+        for category, materials in self._material_lists():
+            for material in materials:
+                material_id = material.get("id") if isinstance(material, dict) else None
+                if material_id is not None:
+                    # 与线性查找一致: 同一 ID 重复出现时返回第一个
+                    self._materials.setdefault(material_id, (category, material))
+        self._materials_signature = self._material_signature()
+
+    def _build_tracks(self) -> None:
+        self._tracks = {}
+        for track in self._track_list():
+            self._tracks.setdefault(track.get("type"), []).append(track)
+        self._tracks_signature = self._track_signature()
+
+    def _index_positions(self, track: dict, start: int) -> None:
+        """登记轨道中从 start 开始的片段位置"""
+        segments = track.get("segments") or []
+        for position in range(start, len(segments)):
+            segment_id = segments[position].get("id")
+            if segment_id is not None:
+                self._segments[segment_id] = (track, position)
+
+    def invalidate(self) -> None:
+        """丢弃索引，下次查询时重建"""
+        self._segments = self._materials = self._tracks = None
+
+    # ==================== 查询 ====================
+
+    def locate(self, segment_id: str) -> Optional[Tuple[dict, int]]:
+        """
+        定位片段
+
+        :param segment_id: 片段 ID
+        :return: (轨道, 片段在轨道中的位置)，不存在时返回 None
+        """
+        if self._segments is None:
+            self._build_segments()
+        found = self._lookup_segment(segment_id)
+        if found is False:
+            self._build_segments()
+            found = self._lookup_segment(segment_id)
+        return found or None
+
+    def _lookup_segment(self, segment_id: str):
+        """
+        :return: (轨道, 位置)；确定不存在时返回 None；索引可能过期时返回 False
+        """
+        hit = self._segments.get(segment_id)
+        if hit is not None:
+            track, position = hit
+            segments = track.get("segments") or []
+            if position < len(segments) and segments[position].get("id") == segment_id:
+                return hit
+            return False
+        return None if self._segments_signature == self._segment_signature() else False
+
+    def segment(self, segment_id: str, track_id: Optional[str] = None) -> Optional[dict]:
+        """
+        查找片段
+
+        :param segment_id: 片段 ID
+        :param track_id: 轨道 ID，指定时片段必须位于该轨道
+        :return: 片段对象
+        """
+        found = self.locate(segment_id)
+        if found is None:
+            return None
+        track, position = found
+        if track_id is not None and track.get("id") != track_id:
+            return None
+        return track["segments"][position]
+
+    def material(self, material_id: str, category: Optional[str] = None) -> Optional[dict]:
+        """
+        查找素材
+
+        :param material_id: 素材 ID
+        :param category: 素材类别（materials 下的键），指定时类别必须一致
+        :return: 素材对象
+        """
+        if self._materials is None:
+            self._build_materials()
+        hit = self._materials.get(material_id)
+        if (hit is None or hit[1].get("id") != material_id) and \
+                self._materials_signature != self._material_signature():
+            self._build_materials()
+            hit = self._materials.get(material_id)
+        if hit is None or hit[1].get("id") != material_id:
+            return None
+        if category is not None and hit[0] != category:
+            return None
+        return hit[1]
+
+    def tracks(self, track_type: str) -> List[dict]:
+        """
+        指定类型的轨道
+
+        :param track_type: 轨道类型 video/audio/text/...
+        :return: 轨道列表（按草稿中的顺序）
+        """
+        if self._tracks is None or self._tracks_signature != self._track_signature():
+            self._build_tracks()
+        return self._tracks.get(track_type, [])
+
+    def first_track(self, track_type: str) -> Optional[dict]:
+        """
+        指定类型的第一条轨道
+
+        :param track_type: 轨道类型
+        :return: 轨道对象，不存在时返回 None
+        """
+        tracks = self.tracks(track_type)
+        return tracks[0] if tracks else None
+
+    # ==================== 增量更新 ====================
+
+    def add_track(self, track: dict) -> dict:
+        """
+        追加轨道
+
+        :param track: 轨道对象
+        :return: 轨道对象
+        """
+        self.content.setdefault("tracks", []).append(track)
+        if self._tracks is not None:
+            self._tracks.setdefault(track.get("type"), []).append(track)
+            self._tracks_signature = self._track_signature()
+        if self._segments is not None:
+            self._index_positions(track, 0)
+            self._segments_signature = self._segment_signature()
+        return track
+
+    def add_material(self, category: str, material: dict) -> dict:
+        """
+        追加素材
+
+        :param category: 素材类别（materials 下的键）
+        :param material: 素材对象
+        :return: 素材对象
+        """
+        self.content.setdefault("materials", {}).setdefault(category, []).append(material)
+        if self._materials is not None:
+            material_id = material.get("id")
+            if material_id is not None:
+                self._materials.setdefault(material_id, (category, material))
+            self._materials_signature = self._material_signature()
+        return material
+
+    def append_segment(self, track: dict, segment: dict) -> dict:
+        """
+        在轨道末尾追加片段
+
+        :param track: 轨道对象
+        :param segment: 片段对象
+        :return: 片段对象
+        """
+        return self.insert_segment(track, len(track.get("segments") or []), segment)
+
+    def insert_segment(self, track: dict, position: int, segment: dict) -> dict:
+        """
+        在轨道指定位置插入片段
+
+        :param track: 轨道对象
+        :param position: 插入位置
+        :param segment: 片段对象
+        :return: 片段对象
+        """
+        track.setdefault("segments", []).insert(position, segment)
+        if self._segments is not None:
+            # 插入点之后的片段位置整体后移
+            self._index_positions(track, position)
+            self._segments_signature = self._segment_signature()
+        return segment
+
+    def set_segments(self, track: dict, segments: List[dict]) -> None:
+        """
+        替换轨道的全部片段
+
+        :param track: 轨道对象
+        :param segments: 新的片段列表
+        """
+        if self._segments is not None:
+            for segment in track.get("segments") or []:
+                hit = self._segments.get(segment.get("id"))
+                if hit is not None and hit[0] is track:
+                    del self._segments[segment.get("id")]
+        track["segments"] = segments
+        if self._segments is not None:
+            self._index_positions(track, 0)
+            self._segments_signature = self._segment_signature()
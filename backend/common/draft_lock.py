@@ -0,0 +1,293 @@
+"""
+草稿读写锁
+
+NOTE: 同一草稿的并发编辑都是 加载 -> 修改 -> 保存，没有互斥时后写入者会静默覆盖先写入者
+1. 每个草稿一把读写锁: 读操作可以并行，写操作独占
+2. 公平排队（FIFO），排在读者之后的写者不会被后来的读者饿死
+3. 同一把锁同时支持 async（事件循环中等待，不阻塞）与同步（线程中阻塞等待）两种用法:
+       async with draft_lock_registry.write(content_path): ...
+       with draft_lock_registry.read(content_path): ...
+4. 锁不绑定线程: 在事件循环中获取、在线程池中完成编辑是允许的
+5. 持有关系记录在 contextvars 中，同一上下文（包括经 blocking_executor.run_io
+   进入线程池的调用）内对同一草稿的嵌套加锁直接通过，不会自锁
+
+NOTE: 同步用法会阻塞当前线程，在事件循环或 I/O 线程池中调用加锁的同步方法前，
+应先用 async with 获取锁，避免等待者占满线程池而持有者无法执行
+"""
+import asyncio
+import contextvars
+import functools
+import inspect
+import os
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+# 当前上下文持有的草稿锁 {规范化路径: 是否为写锁}
+_held_locks: contextvars.ContextVar[Dict[str, bool]] = contextvars.ContextVar('draft_held_locks', default={})
+
+
+class _Waiter:
+    """排队中的加锁请求"""
+
+    __slots__ = ('exclusive', 'granted', 'event', 'loop', 'future')
+
+    def __init__(self, exclusive: bool, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.exclusive = exclusive
+        self.granted = False
+        self.loop = loop
+        if loop is None:
+            self.event = threading.Event()
+            self.future = None
+        else:
+            self.event = None
+            self.future = loop.create_future()
+
+    def wake(self) -> None:
+        """唤醒等待者（持有 mutex 时调用）"""
+        self.granted = True
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self) -> None:
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class DraftRWLock:
+    """公平读写锁，可同时用于协程与线程"""
+
+    def __init__(self):
+        self._mutex = threading.Lock()
+        self._readers = 0
+        self._writer = False
+        self._waiters: Deque[_Waiter] = deque()
+
+    @property
+    def locked(self) -> bool:
+        """是否有持有者"""
+        return self._writer or self._readers > 0
+
+    def _try_acquire(self, exclusive: bool) -> bool:
+        """无需排队时直接获取（持有 mutex 时调用）"""
+        if self._writer or self._waiters:
+            return False
+        if exclusive:
+            if self._readers:
+                return False
+            self._writer = True
+        else:
+            self._readers += 1
+        return True
+
+    def _dispatch(self) -> None:
+        """按 FIFO 顺序把锁交给队首等待者，连续的读者一起放行（持有 mutex 时调用）"""
+        while self._waiters and not self._writer:
+            waiter = self._waiters[0]
+            if waiter.exclusive:
+                if self._readers:
+                    return
+                self._writer = True
+            else:
+                self._readers += 1
+            self._waiters.popleft()
+            waiter.wake()
+
+    def acquire(self, exclusive: bool) -> None:
+        """
+        同步获取（阻塞当前线程）
+
+        :param exclusive: True 为写锁，False 为读锁
+        """
+        with self._mutex:
+            if self._try_acquire(exclusive):
+                return
+            waiter = _Waiter(exclusive)
+            self._waiters.append(waiter)
+        waiter.event.wait()
+
+    async def acquire_async(self, exclusive: bool) -> None:
+        """
+        异步获取（只挂起当前协程）
+
+        :param exclusive: True 为写锁，False 为读锁
+        """
+        with self._mutex:
+            if self._try_acquire(exclusive):
+                return
+            waiter = _Waiter(exclusive, asyncio.get_running_loop())
+            self._waiters.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._mutex:
+                if waiter.granted:
+                    # 已经拿到锁但协程被取消，交还给下一个等待者
+                    self._release_locked(exclusive)
+                else:
+                    self._waiters.remove(waiter)
+                    self._dispatch()
+            raise
+
+    def release(self, exclusive: bool) -> None:
+        """
+        释放锁
+
+        :param exclusive: 与获取时一致
+        """
+        with self._mutex:
+            self._release_locked(exclusive)
+
+    def _release_locked(self, exclusive: bool) -> None:
+        if exclusive:
+            if not self._writer:
+                raise RuntimeError("释放未持有的写锁")
+            self._writer = False
+        else:
+            if self._readers <= 0:
+                raise RuntimeError("释放未持有的读锁")
+            self._readers -= 1
+        self._dispatch()
+
+
+class _LockGuard:
+    """加锁上下文，同时支持 with 与 async with"""
+
+    __slots__ = ('_registry', '_path', '_exclusive', '_lock', '_token')
+
+    def __init__(self, registry: "DraftLockRegistry", path: str, exclusive: bool):
+        self._registry = registry
+        self._path = path
+        self._exclusive = exclusive
+        self._lock: Optional[DraftRWLock] = None
+        self._token: Optional[contextvars.Token] = None
+
+    def _is_held(self) -> bool:
+        """当前上下文是否已持有该草稿的锁"""
+        held = _held_locks.get().get(self._path)
+        if held is None:
+            return False
+        if self._exclusive and not held:
+            raise RuntimeError(f"持有读锁时不能升级为写锁: {self._path}")
+        return True
+
+    def _mark_held(self) -> None:
+        self._token = _held_locks.set({**_held_locks.get(), self._path: self._exclusive})
+
+    def __enter__(self):
+        if self._is_held():
+            return self
+        self._lock = self._registry._checkout(self._path)
+        try:
+            self._lock.acquire(self._exclusive)
+        except BaseException:
+            self._registry._checkin(self._path)
+            raise
+        self._mark_held()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._lock is None:
+            return
+        _held_locks.reset(self._token)
+        self._lock.release(self._exclusive)
+        self._registry._checkin(self._path)
+        self._lock = None
+
+    async def __aenter__(self):
+        if self._is_held():
+            return self
+        self._lock = self._registry._checkout(self._path)
+        try:
+            await self._lock.acquire_async(self._exclusive)
+        except BaseException:
+            self._registry._checkin(self._path)
+            raise
+        self._mark_held()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.__exit__(exc_type, exc, tb)
+
+
+class DraftLockRegistry:
+    """
+    按草稿路径管理读写锁
+
+    NOTE: 锁在没有持有者和等待者时自动回收
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks: Dict[str, Tuple[DraftRWLock, int]] = {}
+
+    @staticmethod
+    def _normalize(content_path: str) -> str:
+        """规范化路径作为锁键，与草稿缓存一致"""
+        return os.path.normcase(os.path.abspath(content_path))
+
+    def _checkout(self, path: str) -> DraftRWLock:
+        with self._lock:
+            lock, refs = self._locks.get(path, (None, 0))
+            if lock is None:
+                lock = DraftRWLock()
+            self._locks[path] = (lock, refs + 1)
+            return lock
+
+    def _checkin(self, path: str) -> None:
+        with self._lock:
+            lock, refs = self._locks[path]
+            if refs <= 1:
+                del self._locks[path]
+            else:
+                self._locks[path] = (lock, refs - 1)
+
+    def read(self, content_path: str) -> _LockGuard:
+        """
+        读锁（共享）
+
+        :param content_path: draft_content.json 路径
+        """
+        return _LockGuard(self, self._normalize(content_path), exclusive=False)
+
+    def write(self, content_path: str) -> _LockGuard:
+        """
+        写锁（独占）
+
+        :param content_path: draft_content.json 路径
+        """
+        return _LockGuard(self, self._normalize(content_path), exclusive=True)
+
+    def stats(self) -> dict:
+        """当前活跃的锁数量"""
+        with self._lock:
+            return {'active': len(self._locks)}
+
+
+# 全局草稿锁实例
+draft_lock_registry = DraftLockRegistry()
+
+
+def draft_locked(exclusive: bool = True, path_arg: str = 'draft_path') -> Callable:
+    """
+    装饰器: 按草稿目录参数对整个同步方法加读/写锁
+
+    :param exclusive: True 为写锁，False 为读锁
+    :param path_arg: 草稿目录参数名
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            draft_path = signature.bind(*args, **kwargs).arguments[path_arg]
+            content_path = os.path.join(draft_path, "draft_content.json")
+            guard = draft_lock_registry.write(content_path) if exclusive else draft_lock_registry.read(content_path)
+            with guard:
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
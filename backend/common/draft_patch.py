@@ -0,0 +1,263 @@
+"""
+草稿增量补丁
+
+NOTE: 用于 draft.persistence.mode = patch_log 的持久化模式
+1. diff: 对比保存前后的草稿，生成 JSON Patch 风格的正向操作与逆向操作
+2. apply_patch: 按 JSON Pointer 路径应用操作
+3. PatchLog: draft_content.json 旁的追加式日志 draft_content.json.patchlog（JSON Lines）
+4. PatchHistory: 由日志重放得到的撤销/重做栈
+
+日志格式（每行一条记录）:
+    {"op": "base", "token": "<快照长度>:<crc32>"}     首行，标识日志所基于的快照
+    {"op": "edit", "do": [...], "undo": [...]}        一次保存
+    {"op": "undo"} / {"op": "redo"}                   撤销/重做
+快照被其他程序（例如剪映本身）改写后 token 不再匹配，日志整体失效
+"""
+import copy
+import os
+import zlib
+from typing import Any, List, Optional, Tuple
+
+from backend.common.draft_serializer import DraftSerializer
+
+
+def _escape(token: Any) -> str:
+    return str(token).replace('~', '~0').replace('/', '~1')
+
+
+def _unescape(token: str) -> str:
+    return token.replace('~1', '/').replace('~0', '~')
+
+
+def _split(path: str) -> List[str]:
+    return [_unescape(token) for token in path.split('/')[1:]] if path else []
+
+
+def diff(old: Any, new: Any) -> Tuple[List[dict], List[dict]]:
+    """
+    对比两个草稿对象
+
+    NOTE: 未修改的子树通过 C 实现的 == 整体比较后跳过，开销远小于完整序列化
+
+    :param old: 保存前的草稿（基线）
+    :param new: 保存时的草稿
+    :return: (正向操作, 逆向操作)，逆向操作已按撤销时的执行顺序排列
+    """
+    forward: List[dict] = []
+    inverse: List[dict] = []
+    _diff(old, new, '', forward, inverse)
+    inverse.reverse()
+    return forward, inverse
+
+
+def _same(old: Any, new: Any) -> bool:
+    """同类型且相等（容器的比较在 C 层完成，遇到第一个差异即返回）"""
+    return old is new or (type(old) is type(new) and old == new)
+
+
+def _diff(old: Any, new: Any, path: str, forward: List[dict], inverse: List[dict]) -> None:
+    # NOTE: 相等性检查只在父节点逐个子节点进行，避免每一层祖先重复比较未修改的兄弟子树
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key, old_value in old.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in new:
+                forward.append({'op': 'remove', 'path': child})
+                inverse.append({'op': 'add', 'path': child, 'value': old_value})
+            elif not _same(old_value, new[key]):
+                _diff(old_value, new[key], child, forward, inverse)
+        for key, new_value in new.items():
+            if key not in old:
+                child = f"{path}/{_escape(key)}"
+                forward.append({'op': 'add', 'path': child, 'value': new_value})
+                inverse.append({'op': 'remove', 'path': child})
+        return
+
+    if isinstance(old, list) and isinstance(new, list):
+        # 跳过公共前缀与后缀，只处理中间变化的区域
+        prefix = 0
+        limit = min(len(old), len(new))
+        while prefix < limit and _same(old[prefix], new[prefix]):
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and _same(old[-1 - suffix], new[-1 - suffix]):
+            suffix += 1
+        old_middle = old[prefix:len(old) - suffix]
+        new_middle = new[prefix:len(new) - suffix]
+
+        if len(old_middle) == len(new_middle):
+            for offset, (old_item, new_item) in enumerate(zip(old_middle, new_middle)):
+                if not _same(old_item, new_item):
+                    _diff(old_item, new_item, f"{path}/{prefix + offset}", forward, inverse)
+            return
+
+        for offset in range(len(old_middle) - 1, -1, -1):
+            child = f"{path}/{prefix + offset}"
+            forward.append({'op': 'remove', 'path': child})
+            inverse.append({'op': 'add', 'path': child, 'value': old_middle[offset]})
+        for offset, new_item in enumerate(new_middle):
+            child = f"{path}/{prefix + offset}"
+            forward.append({'op': 'add', 'path': child, 'value': new_item})
+            inverse.append({'op': 'remove', 'path': child})
+        return
+
+    if not _same(old, new):
+        forward.append({'op': 'replace', 'path': path, 'value': new})
+        inverse.append({'op': 'replace', 'path': path, 'value': old})
+
+
+def apply_patch(doc: Any, operations: List[dict]) -> Any:
+    """
+    应用补丁（原地修改）
+
+    NOTE: 写入的值会先深拷贝，补丁对象可以安全地重复应用到多个文档
+
+    :param doc: 草稿对象
+    :param operations: 操作列表
+    :return: 应用后的草稿对象（根路径被替换时为新对象）
+    """
+    for operation in operations:
+        tokens = _split(operation['path'])
+        op = operation['op']
+        if not tokens:
+            doc = copy.deepcopy(operation['value'])
+            continue
+
+        parent = doc
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        last = tokens[-1]
+
+        if isinstance(parent, list):
+            index = len(parent) if last == '-' else int(last)
+            if op == 'add':
+                parent.insert(index, copy.deepcopy(operation['value']))
+            elif op == 'remove':
+                del parent[index]
+            else:
+                parent[index] = copy.deepcopy(operation['value'])
+        else:
+            if op == 'remove':
+                del parent[last]
+            else:
+                parent[last] = copy.deepcopy(operation['value'])
+    return doc
+
+
+class PatchHistory:
+    """撤销/重做栈"""
+
+    def __init__(self):
+        self.applied: List[dict] = []
+        self.undone: List[dict] = []
+
+    def replay(self, doc: Any, record: dict) -> Any:
+        """
+        重放一条日志记录
+
+        :param doc: 草稿对象
+        :param record: 日志记录
+        :return: 重放后的草稿对象
+        """
+        op = record.get('op')
+        if op == 'edit':
+            doc = apply_patch(doc, record['do'])
+            self.applied.append(record)
+            self.undone.clear()
+        elif op == 'undo' and self.applied:
+            entry = self.applied.pop()
+            doc = apply_patch(doc, entry['undo'])
+            self.undone.append(entry)
+        elif op == 'redo' and self.undone:
+            entry = self.undone.pop()
+            doc = apply_patch(doc, entry['do'])
+            self.applied.append(entry)
+        return doc
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self.applied)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self.undone)
+
+
+class PatchLog:
+    """草稿补丁日志文件"""
+
+    SUFFIX = '.patchlog'
+
+    def __init__(self, serializer: DraftSerializer):
+        """
+        :param serializer: 草稿序列化器（日志每行为一个紧凑 JSON）
+        """
+        self.serializer = serializer
+
+    @classmethod
+    def log_path(cls, content_path: str) -> str:
+        """日志文件路径"""
+        return content_path + cls.SUFFIX
+
+    @staticmethod
+    def base_token(snapshot: bytes) -> str:
+        """
+        快照标识
+
+        :param snapshot: 快照文件内容
+        """
+        return f"{len(snapshot)}:{zlib.crc32(snapshot):08x}"
+
+    def read(self, content_path: str, token: str) -> Optional[List[dict]]:
+        """
+        读取日志记录
+
+        :param content_path: draft_content.json 路径
+        :param token: 当前快照标识
+        :return: 记录列表（不含首行）；日志不存在或与快照不匹配时返回 None
+        """
+        try:
+            with open(self.log_path(content_path), 'rb') as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return None
+        if not lines:
+            return None
+
+        header = self.serializer.loads(lines[0])
+        if header.get('op') != 'base' or header.get('token') != token:
+            return None
+
+        records = []
+        for line in lines[1:]:
+            try:
+                records.append(self.serializer.loads(line))
+            except ValueError:
+                # 追加时崩溃留下的不完整末行
+                break
+        return records
+
+    def append(self, content_path: str, records: List[dict], token: Optional[str] = None) -> int:
+        """
+        追加记录并 fsync
+
+        :param content_path: draft_content.json 路径
+        :param records: 记录列表
+        :param token: 新建日志时写入首行的快照标识
+        :return: 写入的字节数
+        """
+        if token is not None:
+            records = [{'op': 'base', 'token': token}] + records
+        data = b''.join(self.serializer.dumps(record, compact=True) + b'\n' for record in records)
+        mode = 'wb' if token is not None else 'ab'
+        with open(self.log_path(content_path), mode) as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        return len(data)
+
+    def remove(self, content_path: str) -> None:
+        """删除日志"""
+        try:
+            os.remove(self.log_path(content_path))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,183 @@
+"""
+波纹编辑
+
+NOTE: split_segment / trim_segment 每次只处理一个片段且不移动后续片段，逐个应用大量剪切会反复扫描并留下空隙
+RippleEngine 接收完整的剪切列表（要删除或要保留的时间线区间），对所有轨道一次排序扫描:
+1. 剪切区间排序合并，前缀和记录每个时间点之前被删除的总时长
+2. 每个片段用二分查找定位与之相交的剪切区间（O(log m)），拆出保留部分
+3. 保留部分的新起点 = 原起点 - 之前被删除的总时长，视频/音频/文本等所有轨道按同一映射移动，保持同步
+4. 经 TrackTimeline 向量化计算后一次性写回
+整体复杂度 O((n + m) log m)，n 为片段数，m 为剪切区间数；时间单位均为微秒（时间线时间）
+
+NOTE: 片段内的关键帧时间相对片段起点，拆分后的后半部分不会随之平移
+"""
+from typing import Dict, Iterable, Sequence, Tuple
+
+from loguru import logger
+
+from backend.common.draft_index import DraftIndex
+from backend.common.draft_timeline import TrackTimeline, np
+
+
+def merge_ranges(ranges: Iterable[Sequence[int]]) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    排序并合并重叠或相邻的区间
+
+    :param ranges: [(起点, 终点), ...]，忽略长度不为正的区间
+    :return: (起点数组, 终点数组)，按起点递增且互不相交
+    """
+    pairs = np.asarray(list(ranges), dtype=np.int64).reshape(-1, 2)
+    pairs = pairs[pairs[:, 1] > pairs[:, 0]]
+    if not len(pairs):
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    pairs = pairs[np.argsort(pairs[:, 0], kind='stable')]
+    starts, ends = pairs[:, 0], pairs[:, 1]
+    reach = np.maximum.accumulate(ends)
+    # 起点超过之前所有区间的最远终点时开始新的合并组
+    new_group = np.ones(len(starts), dtype=bool)
+    new_group[1:] = starts[1:] > reach[:-1]
+    group = np.cumsum(new_group) - 1
+    merged_ends = np.zeros(group[-1] + 1, dtype=np.int64)
+    np.maximum.at(merged_ends, group, ends)
+    return starts[new_group], merged_ends
+
+
+def subtract_ranges(starts: "np.ndarray", ends: "np.ndarray", cut_starts: "np.ndarray",
+                    cut_ends: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    区间集合差: 属于第一组、且不属于第二组的部分
+
+    :param starts: 第一组起点（merge_ranges 的结果）
+    :param ends: 第一组终点
+    :param cut_starts: 第二组起点（merge_ranges 的结果）
+    :param cut_ends: 第二组终点
+    :return: (起点数组, 终点数组)，按起点递增且互不相交
+    """
+    if not len(starts) or not len(cut_starts):
+        return starts, ends
+    # 所有端点把数轴分成若干基本区间，每个基本区间整体属于或不属于某一组
+    points = np.unique(np.concatenate((starts, ends, cut_starts, cut_ends)))
+    left, right = points[:-1], points[1:]
+    selected = _contains(starts, ends, left) & ~_contains(cut_starts, cut_ends, left)
+    return merge_ranges(np.column_stack((left[selected], right[selected])))
+
+
+def _contains(starts: "np.ndarray", ends: "np.ndarray", points: "np.ndarray") -> "np.ndarray":
+    """每个点是否落在某个 [起点, 终点) 内（区间互不相交且有序）"""
+    at = np.searchsorted(starts, points, side='right') - 1
+    return (at >= 0) & (points < ends[np.maximum(at, 0)])
+
+
+class RippleEngine:
+    """波纹编辑引擎"""
+
+    def __init__(self, index: DraftIndex):
+        """
+        :param index: 草稿索引（写回片段时保持索引同步）
+        """
+        self.index = index
+
+    def _tracks(self):
+        return [track for track in self.index.content.get("tracks") or [] if track.get("segments")]
+
+    def timeline_end(self) -> int:
+        """所有轨道的最大结束时间（微秒）"""
+        end = 0
+        for track in self._tracks():
+            for segment in track["segments"]:
+                target = segment.get("target_timerange") or {}
+                end = max(end, target.get("start", 0) + target.get("duration", 0))
+        return end
+
+    def keep(self, ranges: Iterable[Sequence[int]]) -> Dict[str, int]:
+        """
+        只保留给定的时间线区间，其余部分删除并前移
+
+        :param ranges: 要保留的 [(起点, 终点), ...]（微秒）
+        :return: 统计信息，见 delete
+        """
+        starts, ends = merge_ranges(ranges)
+        # 保留区间在 [0, 时间线结束) 内的补集即删除区间
+        gap_starts = np.concatenate(([0], ends))
+        gap_ends = np.concatenate((starts, [self.timeline_end()]))
+        return self.delete(zip(gap_starts.tolist(), gap_ends.tolist()))
+
+    def delete(self, ranges: Iterable[Sequence[int]]) -> Dict[str, int]:
+        """
+        删除给定的时间线区间，后面的内容前移填补（所有轨道同步）
+
+        :param ranges: 要删除的 [(起点, 终点), ...]（微秒），可无序、可重叠
+        :return: {"cuts": 合并后的区间数, "removed": 删除的总时长, "segments": 处理后的片段数,
+                  "dropped": 整段删除的片段数, "split": 被拆分产生的新片段数}
+        """
+        cut_starts, cut_ends = merge_ranges(ranges)
+        stats = {"cuts": len(cut_starts), "removed": int((cut_ends - cut_starts).sum()),
+                 "segments": 0, "dropped": 0, "split": 0}
+        if not len(cut_starts):
+            return stats
+
+        # removed_before[i] = 前 i 个剪切区间的总时长
+        removed_before = np.concatenate(([0], np.cumsum(cut_ends - cut_starts)))
+
+        for track in self._tracks():
+            timeline = TrackTimeline(track)
+            counts = self._apply(timeline, cut_starts, cut_ends, removed_before)
+            timeline.commit(self.index)
+            for key, value in counts.items():
+                stats[key] += value
+
+        content = self.index.content
+        if "duration" in content:
+            content["duration"] = self.timeline_end()
+        logger.info(f"波纹删除 {stats['cuts']} 个区间, 共 {stats['removed'] / 1000000:.2f} 秒")
+        return stats
+
+    @staticmethod
+    def _apply(timeline: TrackTimeline, cut_starts: "np.ndarray", cut_ends: "np.ndarray",
+               removed_before: "np.ndarray") -> Dict[str, int]:
+        """对一条轨道应用剪切（向量化）"""
+        seg_start = timeline.target_start
+        seg_end = seg_start + timeline.target_duration
+
+        # 与片段相交的剪切区间: [lo, hi)
+        lo = np.searchsorted(cut_ends, seg_start, side='right')
+        hi = np.searchsorted(cut_starts, seg_end, side='left')
+        overlaps = np.maximum(hi - lo, 0)
+
+        # 每个片段最多拆成 overlaps + 1 段: 第 k 段为第 k-1 个剪切终点到第 k 个剪切起点
+        pieces = overlaps + 1
+        rows = np.repeat(np.arange(len(timeline)), pieces)
+        k = np.arange(len(rows)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+        cut = np.repeat(lo, pieces) + k
+        last = k == np.repeat(overlaps, pieces)
+
+        piece_start = np.where(k == 0, seg_start[rows], cut_ends[np.minimum(cut - 1, len(cut_ends) - 1)])
+        piece_end = np.where(last, seg_end[rows], cut_starts[np.minimum(cut, len(cut_starts) - 1)])
+        piece_start = np.maximum(piece_start, seg_start[rows])
+        piece_end = np.minimum(piece_end, seg_end[rows])
+        keep = piece_end > piece_start
+        rows, piece_start, piece_end = rows[keep], piece_start[keep], piece_end[keep]
+
+        # 新起点: 减去起点之前（终点不晚于起点）的剪切总时长
+        new_start = piece_start - removed_before[np.searchsorted(cut_ends, piece_start, side='right')]
+
+        # 素材区间按速度换算；未被剪切的片段保持原值
+        untouched = (overlaps == 0)[rows]
+        speed = timeline.speed[rows]
+        offset = np.rint((piece_start - seg_start[rows]) * speed).astype(np.int64)
+        source_start = np.where(untouched, timeline.source_start[rows], timeline.source_start[rows] + offset)
+        source_duration = np.where(
+            untouched,
+            timeline.source_duration[rows],
+            np.rint((piece_end - piece_start) * speed).astype(np.int64)
+        )
+
+        before = len(timeline)
+        kept_rows = np.unique(rows)
+        timeline.replace(rows, source_start, source_duration, new_start, piece_end - piece_start)
+        return {
+            "segments": len(rows),
+            "dropped": before - len(kept_rows),
+            "split": len(rows) - len(kept_rows),
+        }
@@ -0,0 +1,160 @@
+"""
+草稿序列化
+
+支持:
+1. compact（默认）与 pretty 两种输出模式
+2. 可选的 orjson 原生后端，未安装时回退到标准库 json
+3. 可选的 ijson 流式解析，只构建只读查询需要的子树（未安装时由调用方回退到完整解析）
+"""
+import json
+from typing import Any, Sequence
+
+from loguru import logger
+
+from backend.core.conf import app_config
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - 可选依赖
+    ijson = None
+
+
+class SerializerMode:
+    """序列化模式"""
+    COMPACT = "compact"  # 紧凑输出，体积最小
+    PRETTY = "pretty"  # 两空格缩进，便于调试
+
+
+class SerializerBackend:
+    """序列化后端"""
+    AUTO = "auto"  # 优先 orjson，未安装时使用标准库
+    ORJSON = "orjson"
+    JSON = "json"
+
+
+class DraftSerializer:
+    """
+    草稿序列化器
+
+    NOTE: 输出始终为 UTF-8 且不转义非 ASCII 字符，与剪映原始文件一致
+    """
+
+    def __init__(self, mode: str | None = None, backend: str | None = None):
+        """
+        :param mode: 输出模式 compact / pretty
+        :param backend: 序列化后端 auto / orjson / json
+        """
+        mode = mode or app_config.get('draft.serializer.mode', SerializerMode.COMPACT)
+        backend = backend or app_config.get('draft.serializer.backend', SerializerBackend.AUTO)
+
+        if mode not in (SerializerMode.COMPACT, SerializerMode.PRETTY):
+            logger.warning(f"未知的序列化模式 {mode}，使用 {SerializerMode.COMPACT}")
+            mode = SerializerMode.COMPACT
+
+        if backend == SerializerBackend.ORJSON and orjson is None:
+            logger.warning("未安装 orjson，回退到标准库 json: pip install orjson")
+            backend = SerializerBackend.JSON
+        elif backend not in (SerializerBackend.ORJSON, SerializerBackend.JSON):
+            backend = SerializerBackend.ORJSON if orjson is not None else SerializerBackend.JSON
+
+        self.mode = mode
+        self.backend = backend
+
+    def dumps(self, content: Any, compact: bool = False) -> bytes:
+        """
+        序列化草稿内容
+
+        :param content: 草稿内容
+        :param compact: 忽略 mode 强制紧凑输出（用于单行记录）
+        :return: UTF-8 编码的 JSON
+        """
+        pretty = self.mode == SerializerMode.PRETTY and not compact
+        if self.backend == SerializerBackend.ORJSON:
+            option = orjson.OPT_NON_STR_KEYS
+            if pretty:
+                option |= orjson.OPT_INDENT_2
+            try:
+                return orjson.dumps(content, option=option)
+            except TypeError as e:
+                # orjson 不支持超过 64 位的整数等少数情况，交给标准库处理
+                logger.debug(f"orjson 序列化失败，回退到标准库: {e}")
+
+        if pretty:
+            text = json.dumps(content, ensure_ascii=False, indent=2)
+        else:
+            text = json.dumps(content, ensure_ascii=False, separators=(',', ':'))
+        return text.encode('utf-8')
+
+    def loads(self, data: bytes) -> Any:
+        """
+        解析草稿内容
+
+        :param data: UTF-8 编码的 JSON
+        :return: 草稿内容
+        """
+        if self.backend == SerializerBackend.ORJSON:
+            return orjson.loads(data)
+        return json.loads(data.decode('utf-8'))
+
+    @property
+    def streaming(self) -> bool:
+        """是否支持流式解析（已安装 ijson）"""
+        return ijson is not None
+
+    def load_paths(self, file_path: str, paths: Sequence[str]) -> dict:
+        """
+        流式解析草稿文件，只构建指定路径的子树
+
+        NOTE: 未请求的子树只做词法分析、不创建对象，峰值内存与请求的子树大小相当；
+        每个路径各扫描一遍文件
+
+        :param file_path: 草稿文件路径
+        :param paths: 以点分隔的路径，例如 ("tracks", "materials.videos")
+        :return: 与草稿结构一致、只包含指定路径的字典（不存在的路径省略）
+        """
+        result = {}
+        with open(file_path, 'rb') as f:
+            for path in paths:
+                f.seek(0)
+                for value in ijson.items(f, path, use_float=True):
+                    _set_path(result, path, value)
+                    break
+        return result
+
+
+def _set_path(result: dict, path: str, value: Any) -> None:
+    *parents, last = path.split('.')
+    for key in parents:
+        result = result.setdefault(key, {})
+    result[last] = value
+
+
+def select_paths(content: dict, paths: Sequence[str]) -> dict:
+    """
+    从完整草稿中选取指定路径，结构与 DraftSerializer.load_paths 一致
+
+    NOTE: 选取的子树与原草稿共享引用
+
+    :param content: 草稿内容
+    :param paths: 以点分隔的路径
+    :return: 只包含指定路径的字典
+    """
+    result = {}
+    for path in paths:
+        value = content
+        for key in path.split('.'):
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            _set_path(result, path, value)
+    return result
+
+
+# 全局序列化器实例
+draft_serializer = DraftSerializer()
@@ -0,0 +1,435 @@
+"""
+草稿内容存储
+
+NOTE: 所有编辑路径共享的 draft_content.json 加载入口
+1. 按 (路径, mtime, 文件大小) 校验的解析缓存
+2. 基于内存预算的 LRU 淘汰
+3. 同一草稿的并发加载共享一次解析
+4. 可选的补丁日志持久化（draft.persistence.mode = patch_log）:
+   保存时只把增量追加到 draft_content.json.patchlog，加载时重放，
+   达到条数/体积阈值后合并为完整快照；日志同时提供撤销/重做
+5. 只读查询 query(): 大草稿未缓存时流式解析，只构建需要的子树
+"""
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from backend.common.draft_patch import PatchHistory, PatchLog, apply_patch, diff
+from backend.common.draft_serializer import DraftSerializer, draft_serializer, select_paths
+from backend.core.conf import app_config
+from backend.utils.file_utils import atomic_write
+
+
+class PersistenceMode:
+    """持久化模式"""
+    SNAPSHOT = "snapshot"  # 每次保存写完整快照（默认）
+    PATCH_LOG = "patch_log"  # 追加增量日志，定期合并为快照
+
+
+@dataclass
+class _CacheEntry:
+    """缓存条目"""
+    key: Tuple[int, int, int, int]  # (快照 mtime_ns, 快照大小, 日志 mtime_ns, 日志大小)
+    content: dict
+    cost: int  # 估算的内存占用（字节）
+    baseline: Optional[dict] = None  # patch_log 模式下与磁盘状态一致的副本，用于计算增量
+    history: Optional[PatchHistory] = None
+    token: Optional[str] = None  # 快照标识，见 PatchLog.base_token
+    log_records: int = 0
+
+
+class DraftContentStore:
+    """
+    草稿内容存储
+
+    NOTE: 返回的草稿对象在调用方之间共享，不做拷贝
+    修改了草稿对象的调用方必须通过 save() 保存（或写入后调用 put()），
+    或调用 invalidate() 丢弃缓存（放弃修改或保存失败时）
+    """
+
+    def __init__(
+        self,
+        max_memory: int | None = None,
+        size_factor: float | None = None,
+        serializer: DraftSerializer | None = None,
+        backup_generations: int | None = None,
+        persistence: str | None = None
+    ):
+        """
+        :param max_memory: 缓存内存预算（字节）
+        :param size_factor: 解析后对象内存占用相对文件大小的估算系数
+        :param serializer: 草稿序列化器
+        :param backup_generations: 保存时保留的历史版本数量
+        :param persistence: 持久化模式 snapshot / patch_log
+        """
+        self.serializer = serializer or draft_serializer
+        self.persistence = persistence or app_config.get('draft.persistence.mode', PersistenceMode.SNAPSHOT)
+        if self.persistence not in (PersistenceMode.SNAPSHOT, PersistenceMode.PATCH_LOG):
+            logger.warning(f"未知的持久化模式 {self.persistence}，使用 {PersistenceMode.SNAPSHOT}")
+            self.persistence = PersistenceMode.SNAPSHOT
+        self.compact_records = app_config.get('draft.persistence.compact_records', 200)
+        self.compact_ratio = app_config.get('draft.persistence.compact_ratio', 0.5)
+        self.compact_min_size = app_config.get('draft.persistence.compact_min_size', 1048576)
+        self.patch_log = PatchLog(self.serializer)
+        self.backup_generations = backup_generations if backup_generations is not None else app_config.get(
+            'draft.backup_generations', 2
+        )
+        self.max_memory = max_memory if max_memory is not None else app_config.get(
+            'draft.cache.max_memory', 1073741824
+        )
+        self.size_factor = size_factor if size_factor is not None else app_config.get(
+            'draft.cache.size_factor', 6
+        )
+        self.stream_min_size = app_config.get('draft.query.stream_min_size', 16777216)
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._memory = 0
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, Tuple[threading.Lock, int]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.streamed = 0
+
+    @staticmethod
+    def _normalize(content_path: str) -> str:
+        """规范化路径作为缓存键"""
+        return os.path.normcase(os.path.abspath(content_path))
+
+    @staticmethod
+    def _stat_key(content_path: str) -> Tuple[int, int, int, int]:
+        """读取快照与补丁日志的 (mtime_ns, size)"""
+        stat = os.stat(content_path)
+        try:
+            log_stat = os.stat(PatchLog.log_path(content_path))
+            log_key = (log_stat.st_mtime_ns, log_stat.st_size)
+        except FileNotFoundError:
+            log_key = (0, 0)
+        return stat.st_mtime_ns, stat.st_size, *log_key
+
+    @contextmanager
+    def _loading(self, path: str):
+        """同一路径的加载互斥，保证并发请求只解析一次"""
+        with self._lock:
+            lock, refs = self._load_locks.get(path, (None, 0))
+            if lock is None:
+                lock = threading.Lock()
+            self._load_locks[path] = (lock, refs + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._lock:
+                lock, refs = self._load_locks[path]
+                if refs <= 1:
+                    del self._load_locks[path]
+                else:
+                    self._load_locks[path] = (lock, refs - 1)
+
+    def _read(self, path: str, key: Tuple[int, int, int, int]) -> _CacheEntry:
+        """从磁盘解析草稿内容，存在有效的补丁日志时重放"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        content = self.serializer.loads(data)
+        entry = _CacheEntry(key=key, content=content, cost=int(key[1] * self.size_factor))
+
+        patch_log = self.persistence == PersistenceMode.PATCH_LOG
+        if not patch_log and not key[3]:
+            return entry
+
+        entry.token = PatchLog.base_token(data)
+        records = self.patch_log.read(path, entry.token)
+        if records is None and key[3]:
+            logger.warning(f"补丁日志与快照不匹配（快照可能被外部修改），已忽略: {PatchLog.log_path(path)}")
+
+        entry.history = PatchHistory()
+        for record in records or []:
+            entry.content = entry.history.replay(entry.content, record)
+        entry.log_records = len(records or [])
+
+        if patch_log:
+            # 基线与缓存对象相互独立，重新解析一份并重放同样的记录
+            baseline = self.serializer.loads(data)
+            baseline_history = PatchHistory()
+            for record in records or []:
+                baseline = baseline_history.replay(baseline, record)
+            entry.baseline = baseline
+            entry.cost *= 2
+        return entry
+
+    def load(self, content_path: str) -> dict:
+        """
+        加载草稿内容
+
+        :param content_path: draft_content.json 路径
+        :return: 草稿内容（共享对象）
+        """
+        path = self._normalize(content_path)
+        with self._loading(path):
+            return self._load_entry(path).content
+
+    def _load_entry(self, path: str) -> _CacheEntry:
+        """加载缓存条目（调用方持有 _loading）"""
+        key = self._stat_key(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.key == key:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        entry = self._read(path, key)
+        self._store(path, entry)
+        return entry
+
+    def query(self, content_path: str, paths: Sequence[str]) -> dict:
+        """
+        只读查询草稿的部分内容
+
+        NOTE: 已缓存时从缓存对象中选取后经序列化往返复制一份（调用方需持有草稿读锁，
+        返回后缓存对象被写锁下的编辑原地修改也不受影响）；
+        未缓存、草稿不小于 stream_min_size 且安装了 ijson 时流式解析，结果不写入缓存；
+        其余情况（包括存在需要重放的补丁日志）走完整加载
+
+        :param content_path: draft_content.json 路径
+        :param paths: 以点分隔的路径，例如 ("tracks", "materials.videos")
+        :return: 与草稿结构一致、只包含指定路径的字典
+        """
+        path = self._normalize(content_path)
+        key = self._stat_key(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.key == key:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return self._detached(entry.content, paths)
+
+        if self.serializer.streaming and not key[3] and key[1] >= self.stream_min_size:
+            with self._lock:
+                self.streamed += 1
+            return self.serializer.load_paths(path, paths)
+        return self._detached(self.load(content_path), paths)
+
+    def _detached(self, content: dict, paths: Sequence[str]) -> dict:
+        """选取指定路径并复制（与缓存对象不共享引用）"""
+        return self.serializer.loads(self.serializer.dumps(select_paths(content, paths), compact=True))
+
+    def save(self, content_path: str, content: dict) -> None:
+        """
+        保存草稿内容，同时刷新缓存
+
+        NOTE: snapshot 模式原子写入完整快照，旧版本按 backup_generations 轮转保留为 draft_content.json.bak.N
+        patch_log 模式只追加增量，无法计算增量（未缓存、快照被外部修改）或达到合并阈值时写入快照
+
+        :param content_path: draft_content.json 路径
+        :param content: 草稿内容
+        """
+        path = self._normalize(content_path)
+        try:
+            if self.persistence == PersistenceMode.PATCH_LOG and self._append_patch(path, content):
+                return
+            self._write_snapshot(path, content)
+        except Exception:
+            self.invalidate(content_path)
+            raise
+
+    def _append_patch(self, path: str, content: dict) -> bool:
+        """
+        追加增量记录
+
+        :return: 是否已追加（False 表示需要写入快照）
+        """
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is None or entry.baseline is None or entry.key != self._stat_key(path):
+            return False
+        if entry.log_records + 1 >= self.compact_records:
+            return False
+
+        forward, inverse = diff(entry.baseline, content)
+        entry.content = content
+        if not forward:
+            return True
+
+        # 经序列化往返得到与草稿对象不共享引用的记录
+        record = self.serializer.loads(self.serializer.dumps({'op': 'edit', 'do': forward, 'undo': inverse}, compact=True))
+        self._append_records(path, entry, [record])
+        entry.baseline = apply_patch(entry.baseline, record['do'])
+        entry.history.applied.append(record)
+        entry.history.undone.clear()
+
+        # 小草稿的单条记录（含快照标识）就可能超过体积比例，日志达到最小体积前不按比例合并，否则每次保存都会清空撤销历史
+        if entry.key[3] >= max(entry.key[1] * self.compact_ratio, self.compact_min_size):
+            logger.debug(f"补丁日志超过快照体积阈值，合并: {path}")
+            self._write_snapshot(path, content)
+        return True
+
+    def _append_records(self, path: str, entry: _CacheEntry, records: list) -> None:
+        """写入日志并刷新缓存键"""
+        # 日志不存在或已失效时新建（首行写入快照标识）
+        self.patch_log.append(path, records, token=None if entry.log_records else entry.token)
+        entry.log_records += len(records)
+        entry.key = self._stat_key(path)
+
+    def _write_snapshot(self, path: str, content: dict) -> None:
+        """原子写入完整快照，删除已合并的补丁日志"""
+        data = self.serializer.dumps(content)
+        atomic_write(path, data, self.backup_generations)
+        # 快照写入后旧日志的快照标识已不匹配，删除失败也不会被重放
+        self.patch_log.remove(path)
+
+        entry = _CacheEntry(key=self._stat_key(path), content=content, cost=int(len(data) * self.size_factor))
+        if self.persistence == PersistenceMode.PATCH_LOG:
+            entry.baseline = self.serializer.loads(data)
+            entry.history = PatchHistory()
+            entry.token = PatchLog.base_token(data)
+            entry.cost *= 2
+        self._store(path, entry)
+
+    def compact(self, content_path: str) -> bool:
+        """
+        把补丁日志合并为完整快照（例如交给剪映打开或导出之前）
+
+        NOTE: 合并后撤销/重做历史清空
+
+        :param content_path: draft_content.json 路径
+        :return: 是否执行了合并
+        """
+        path = self._normalize(content_path)
+        with self._loading(path):
+            entry = self._load_entry(path)
+            if not entry.key[3]:
+                return False
+            self._write_snapshot(path, entry.content)
+            logger.info(f"补丁日志已合并为快照: {path}")
+            return True
+
+    def undo(self, content_path: str) -> bool:
+        """
+        撤销最近一次保存（patch_log 模式）
+
+        :param content_path: draft_content.json 路径
+        :return: 是否撤销（没有可撤销的记录时返回 False）
+        """
+        return self._step(content_path, 'undo')
+
+    def redo(self, content_path: str) -> bool:
+        """
+        重做最近一次撤销（patch_log 模式）
+
+        :param content_path: draft_content.json 路径
+        :return: 是否重做（没有可重做的记录时返回 False）
+        """
+        return self._step(content_path, 'redo')
+
+    def _step(self, content_path: str, op: str) -> bool:
+        """执行撤销/重做并追加日志记录"""
+        path = self._normalize(content_path)
+        with self._loading(path):
+            entry = self._load_entry(path)
+            if entry.baseline is None:
+                return False
+            history = entry.history
+            if not (history.can_undo if op == 'undo' else history.can_redo):
+                return False
+
+            record = {'op': op}
+            try:
+                self._append_records(path, entry, [record])
+                operations = history.applied[-1]['undo'] if op == 'undo' else history.undone[-1]['do']
+                entry.content = history.replay(entry.content, record)
+                entry.baseline = apply_patch(entry.baseline, operations)
+            except Exception:
+                self.invalidate(content_path)
+                raise
+            return True
+
+    def history(self, content_path: str) -> dict:
+        """
+        撤销/重做历史
+
+        :param content_path: draft_content.json 路径
+        :return: {"mode": 持久化模式, "undo": 可撤销步数, "redo": 可重做步数}
+        """
+        path = self._normalize(content_path)
+        with self._loading(path):
+            entry = self._load_entry(path)
+        history = entry.history if entry.baseline is not None else None
+        return {
+            'mode': self.persistence,
+            'undo': len(history.applied) if history else 0,
+            'redo': len(history.undone) if history else 0,
+        }
+
+    def put(self, content_path: str, content: dict) -> None:
+        """
+        外部写入草稿文件后写回缓存
+
+        :param content_path: draft_content.json 路径
+        :param content: 刚写入磁盘的草稿内容
+        """
+        path = self._normalize(content_path)
+        try:
+            key = self._stat_key(path)
+        except OSError:
+            self.invalidate(content_path)
+            return
+        self._store(path, _CacheEntry(key=key, content=content, cost=int(key[1] * self.size_factor)))
+
+    def invalidate(self, content_path: str) -> None:
+        """
+        丢弃缓存
+
+        :param content_path: draft_content.json 路径
+        """
+        path = self._normalize(content_path)
+        with self._lock:
+            entry = self._entries.pop(path, None)
+            if entry is not None:
+                self._memory -= entry.cost
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._memory = 0
+
+    def stats(self) -> dict:
+        """缓存统计信息"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'memory': self._memory,
+                'max_memory': self.max_memory,
+                'hits': self.hits,
+                'misses': self.misses,
+                'streamed': self.streamed,
+                'persistence': self.persistence,
+            }
+
+    def _store(self, path: str, entry: _CacheEntry) -> None:
+        """写入缓存并按 LRU 淘汰超出预算的条目"""
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._memory -= old.cost
+
+            if entry.cost > self.max_memory:
+                logger.debug(f"草稿超过缓存预算，不缓存: {path}")
+                return
+
+            while self._entries and self._memory + entry.cost > self.max_memory:
+                evicted_path, evicted = self._entries.popitem(last=False)
+                self._memory -= evicted.cost
+                logger.debug(f"淘汰草稿缓存: {evicted_path}")
+
+            self._entries[path] = entry
+            self._memory += entry.cost
+
+
+# 全局草稿存储实例
+draft_content_store = DraftContentStore()
@@ -0,0 +1,184 @@
+"""
+阻塞任务执行器
+
+NOTE: async 接口中的草稿读写、编辑与媒体分析都是阻塞操作，
+直接在事件循环中执行会让同一 worker 上的其他请求全部等待
+1. I/O 线程池: 草稿加载/保存/编辑（需要与草稿缓存共享内存对象）
+2. CPU 进程池: 音频解码与分析等重计算（函数与参数必须可 pickle），map_cpu 按素材拆分为多个任务并行
+3. 事件循环延迟监控: 用于确认事件循环保持响应
+"""
+import asyncio
+import contextvars
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Iterable, List, Optional
+
+from loguru import logger
+
+from backend.core.conf import app_config
+
+
+class BlockingExecutor:
+    """有界线程池 + 进程池"""
+
+    def __init__(self, io_workers: Optional[int] = None, cpu_workers: Optional[int] = None):
+        """
+        :param io_workers: I/O 线程数
+        :param cpu_workers: CPU 进程数
+        """
+        cpu_count = os.cpu_count() or 1
+        self.io_workers = io_workers or app_config.get('executor.io_workers', min(32, cpu_count + 4))
+        self.cpu_workers = cpu_workers or app_config.get('executor.cpu_workers', max(1, cpu_count - 1))
+        self._io_pool: Optional[ThreadPoolExecutor] = None
+        self._cpu_pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def io_pool(self) -> ThreadPoolExecutor:
+        """I/O 线程池（按需创建）"""
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="draft-io")
+        return self._io_pool
+
+    @property
+    def cpu_pool(self) -> ProcessPoolExecutor:
+        """CPU 进程池（按需创建）"""
+        if self._cpu_pool is None:
+            self._cpu_pool = ProcessPoolExecutor(max_workers=self.cpu_workers)
+        return self._cpu_pool
+
+    async def run_io(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        在 I/O 线程池中执行阻塞函数
+
+        NOTE: 与 asyncio.to_thread 一样复制当前 contextvars（草稿锁的持有关系依赖它）
+
+        :param func: 阻塞函数
+        :return: 函数返回值
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self.io_pool, partial(context.run, func, *args, **kwargs))
+
+    async def run_cpu(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        在 CPU 进程池中执行计算密集函数
+
+        NOTE: func 必须是模块级函数，参数与返回值需可 pickle
+
+        :param func: 计算函数
+        :return: 函数返回值
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.cpu_pool, partial(func, *args, **kwargs))
+
+    async def map_cpu(self, func: Callable, items: Iterable, *args, **kwargs) -> List[Any]:
+        """
+        把每个元素作为单独的任务提交到 CPU 进程池并行执行
+
+        :param func: 计算函数（模块级函数），调用形式为 func(item, *args, **kwargs)
+        :param items: 元素列表（例如去重后的素材路径）
+        :return: 与 items 顺序一致的结果列表
+        """
+        return list(await asyncio.gather(*(self.run_cpu(func, item, *args, **kwargs) for item in items)))
+
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭线程池与进程池"""
+        if self._io_pool is not None:
+            self._io_pool.shutdown(wait=wait)
+            self._io_pool = None
+        if self._cpu_pool is not None:
+            self._cpu_pool.shutdown(wait=wait)
+            self._cpu_pool = None
+
+    def stats(self) -> dict:
+        """执行器状态"""
+        return {
+            'io_workers': self.io_workers,
+            'cpu_workers': self.cpu_workers,
+            'io_pending': self._io_pool._work_queue.qsize() if self._io_pool is not None else 0,
+        }
+
+
+class LoopLagMonitor:
+    """
+    事件循环延迟监控
+
+    周期性 sleep(interval)，实际唤醒时间与预期时间之差即为事件循环延迟
+    """
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        warn_threshold: Optional[float] = None,
+        window: int = 600
+    ):
+        """
+        :param interval: 采样间隔（秒）
+        :param warn_threshold: 延迟超过该值时记录警告（秒）
+        :param window: 保留的采样数量
+        """
+        self.interval = interval or app_config.get('executor.loop_lag.interval', 0.5)
+        self.warn_threshold = warn_threshold or app_config.get('executor.loop_lag.warn_threshold', 0.2)
+        self._samples: deque = deque(maxlen=window)
+        self._max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """在当前事件循环中启动监控"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止监控"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def reset(self) -> None:
+        """清空采样"""
+        self._samples.clear()
+        self._max_lag = 0.0
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, time.perf_counter() - expected))
+
+    def record(self, lag: float) -> None:
+        """
+        记录一次延迟采样
+
+        :param lag: 延迟（秒）
+        """
+        self._samples.append(lag)
+        self._max_lag = max(self._max_lag, lag)
+        if lag >= self.warn_threshold:
+            logger.warning(f"事件循环延迟 {lag * 1000:.0f}ms")
+
+    def stats(self) -> dict:
+        """延迟统计（毫秒）"""
+        samples = sorted(self._samples)
+        if not samples:
+            return {'samples': 0, 'last_ms': 0.0, 'p50_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+        return {
+            'samples': len(samples),
+            'last_ms': round(self._samples[-1] * 1000, 2),
+            'p50_ms': round(samples[len(samples) // 2] * 1000, 2),
+            'p99_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000, 2),
+            'max_ms': round(self._max_lag * 1000, 2),
+        }
+
+
+# 全局执行器实例
+blocking_executor = BlockingExecutor()
+
+# 全局事件循环延迟监控实例
+loop_lag_monitor = LoopLagMonitor()
@@ -0,0 +1,167 @@
+"""
+草稿素材注册表
+
+NOTE: 重复应用模板时滤镜、转场等素材会不断追加到 materials 中，草稿越来越大，之后每次加载都更慢
+1. intern: 按 (素材类别, 类型, 特效 ID, 参数) 判重，等价素材已存在时直接复用（哈希查找）
+2. compact: 删除没有任何片段/素材引用的素材，以及完全相同的重复素材
+"""
+import json
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from loguru import logger
+
+from backend.common.draft_index import DraftIndex
+
+
+class MaterialRegistry:
+    """草稿素材注册表"""
+
+    def __init__(self, index: DraftIndex):
+        """
+        :param index: 草稿索引（新增素材经索引写入草稿，保持索引同步）
+        """
+        self.index = index
+        self._fingerprints: Optional[Dict[tuple, dict]] = None
+        self._signature: Optional[tuple] = None
+
+    @staticmethod
+    def fingerprint(category: str, material: dict) -> Tuple[str, Optional[str], Optional[str], str]:
+        """
+        素材指纹
+
+        :param category: 素材类别（materials 下的键）
+        :param material: 素材对象
+        :return: (素材类别, 类型, 特效 ID, 其余参数的规范化 JSON)
+        """
+        effect_id = material.get("effect_id") or material.get("id")
+        params = {key: value for key, value in material.items() if key not in ("id", "effect_id", "type")}
+        return (
+            category,
+            material.get("type"),
+            effect_id,
+            json.dumps(params, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str),
+        )
+
+    def _material_lists(self):
+        return [
+            (category, materials)
+            for category, materials in (self.index.content.get("materials") or {}).items()
+            if isinstance(materials, list)
+        ]
+
+    def _current_signature(self) -> tuple:
+        return tuple((id(materials), len(materials)) for _, materials in self._material_lists())
+
+    def _build(self) -> None:
+        self._fingerprints = {}
+        for category, materials in self._material_lists():
+            for material in materials:
+                if isinstance(material, dict):
+                    self._fingerprints.setdefault(self.fingerprint(category, material), material)
+        self._signature = self._current_signature()
+
+    def find(self, category: str, material: dict) -> Optional[dict]:
+        """
+        查找等价素材
+
+        :param category: 素材类别
+        :param material: 素材对象
+        :return: 已存在的等价素材，不存在时返回 None
+        """
+        key = self.fingerprint(category, material)
+        if self._fingerprints is None or self._signature != self._current_signature():
+            self._build()
+        existing = self._fingerprints.get(key)
+        if existing is not None and self.fingerprint(category, existing) != key:
+            # 素材在登记后被原地修改过
+            self._build()
+            existing = self._fingerprints.get(key)
+        return existing
+
+    def intern(self, category: str, material: dict) -> dict:
+        """
+        登记素材: 等价素材已存在时复用，否则追加到草稿
+
+        :param category: 素材类别
+        :param material: 素材对象
+        :return: 草稿中实际使用的素材对象（引用时使用其 id）
+        """
+        existing = self.find(category, material)
+        if existing is not None:
+            return existing
+        self.index.add_material(category, material)
+        self._fingerprints[self.fingerprint(category, material)] = material
+        self._signature = self._current_signature()
+        return material
+
+    def _collect_references(self) -> Set[str]:
+        """
+        收集草稿中引用的所有字符串（素材自身的 id 字段除外）
+
+        NOTE: 不依赖具体的引用字段名（material_id / extra_material_refs / transition.id ...），
+        任何位置出现的素材 ID 都视为被引用，宁可少删也不误删
+        """
+        references: Set[str] = set()
+        material_ids = {
+            id(material)
+            for _, materials in self._material_lists()
+            for material in materials
+            if isinstance(material, dict)
+        }
+        stack = [self.index.content]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                skip_id = id(node) in material_ids
+                for key, value in node.items():
+                    if isinstance(value, str):
+                        if not (skip_id and key == "id"):
+                            references.add(value)
+                    elif isinstance(value, (dict, list)):
+                        stack.append(value)
+            elif isinstance(node, list):
+                for value in node:
+                    if isinstance(value, str):
+                        references.add(value)
+                    elif isinstance(value, (dict, list)):
+                        stack.append(value)
+        return references
+
+    def compact(self, categories: Optional[Iterable[str]] = None) -> int:
+        """
+        删除未被引用的素材与完全相同的重复素材
+
+        :param categories: 需要压缩的素材类别，None 表示全部
+        :return: 删除的素材数量
+        """
+        categories = set(categories) if categories is not None else None
+        references = self._collect_references()
+
+        removed = 0
+        for category, materials in self._material_lists():
+            if categories is not None and category not in categories:
+                continue
+            kept = []
+            seen: Set[tuple] = set()
+            for material in materials:
+                if not isinstance(material, dict) or material.get("id") is None:
+                    kept.append(material)
+                    continue
+                if material["id"] not in references:
+                    continue
+                # 只合并 ID 也相同的重复素材，不同 ID 的等价素材各自仍被引用
+                key = (material["id"], self.fingerprint(category, material))
+                if key in seen:
+                    continue
+                seen.add(key)
+                kept.append(material)
+            if len(kept) != len(materials):
+                removed += len(materials) - len(kept)
+                materials[:] = kept
+
+        if removed:
+            # 被删除的素材可能仍在索引中
+            self.index.invalidate()
+            self._fingerprints = None
+            logger.debug(f"已清理 {removed} 个未引用或重复的素材")
+        return removed
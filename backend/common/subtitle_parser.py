@@ -0,0 +1,178 @@
+"""
+字幕解析（SRT / ASS）
+
+NOTE: 长视频的字幕文件有数千行，解析按行流式进行，不把整个文件读入内存再切分:
+1. iter_srt / iter_ass 逐行读取，每解析完一条字幕就产出一个 SubtitleCue
+2. ASS 的 [V4+ Styles] 每个样式只解析一次，同一样式的字幕共享同一个样式字典
+时间单位均为微秒（与草稿一致）
+"""
+import io
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, Optional, Union
+
+SUBTITLE_FORMATS = ("srt", "ass")
+
+# 00:01:02,345 --> 00:01:04,000（也兼容 . 作为毫秒分隔符）
+_SRT_TIME = re.compile(
+    r"(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})\s*-->\s*(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})"
+)
+# ASS 覆盖标签 {\b1}、SRT 中的 HTML 标签 <i>
+_ASS_TAG = re.compile(r"\{[^}]*\}")
+_HTML_TAG = re.compile(r"</?[a-zA-Z][^>]*>")
+
+
+@dataclass
+class SubtitleCue:
+    """一条字幕"""
+    start: int  # 开始时间（微秒）
+    end: int  # 结束时间（微秒）
+    text: str
+    style: Optional[dict] = None  # 字幕样式（font_size / font_color / position_x / position_y），None 表示使用默认样式
+
+
+def _us(hours: str, minutes: str, seconds: str, fraction: str) -> int:
+    """时间字段 -> 微秒（fraction 为小数部分的数字串）"""
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000000 + int(fraction.ljust(6, "0")[:6])
+
+
+def iter_srt(lines: Iterable[str]) -> Iterator[SubtitleCue]:
+    """
+    流式解析 SRT
+
+    :param lines: 文本行（文件对象即可）
+    :return: 字幕生成器
+    """
+    start = end = None
+    text_lines = []
+    for line in lines:
+        line = line.strip("\ufeff\r\n")
+        if start is None:
+            match = _SRT_TIME.search(line)
+            if match:
+                groups = match.groups()
+                start, end = _us(*groups[:4]), _us(*groups[4:])
+            # 序号行与多余空行直接跳过
+            continue
+        if line.strip():
+            text_lines.append(_HTML_TAG.sub("", line))
+            continue
+        if text_lines:
+            yield SubtitleCue(start, end, "\n".join(text_lines))
+        start = end = None
+        text_lines = []
+    if start is not None and text_lines:
+        yield SubtitleCue(start, end, "\n".join(text_lines))
+
+
+def _ass_color(value: str) -> Optional[str]:
+    """ASS 颜色 &HAABBGGRR -> #RRGGBB"""
+    digits = value.strip().lstrip("&Hh").rstrip("&")
+    try:
+        number = int(digits, 16)
+    except ValueError:
+        return None
+    blue, green, red = (number >> 16) & 0xFF, (number >> 8) & 0xFF, number & 0xFF
+    return f"#{red:02X}{green:02X}{blue:02X}"
+
+
+def _ass_time(value: str) -> int:
+    """ASS 时间 H:MM:SS.cc -> 微秒"""
+    hours, minutes, seconds = value.strip().split(":")
+    whole, _, fraction = seconds.partition(".")
+    return _us(hours, minutes, whole, fraction or "0")
+
+
+def iter_ass(lines: Iterable[str]) -> Iterator[SubtitleCue]:
+    """
+    流式解析 ASS / SSA
+
+    :param lines: 文本行（文件对象即可）
+    :return: 字幕生成器（style 为该字幕所用样式，同名样式共享同一个字典）
+    """
+    section = ""
+    style_format = ["name", "fontname", "fontsize", "primarycolour"]
+    event_format = ["layer", "start", "end", "style", "name", "marginl", "marginr", "marginv", "effect", "text"]
+    styles: Dict[str, dict] = {}
+    for line in lines:
+        line = line.strip("\ufeff\r\n").strip()
+        if not line or line.startswith(";"):
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            section = line.lower()
+            continue
+        key, _, value = line.partition(":")
+        key = key.strip().lower()
+        if key == "format":
+            fields = [field.strip().lower() for field in value.split(",")]
+            if section == "[events]":
+                event_format = fields
+            else:
+                style_format = fields
+        elif key == "style":
+            values = dict(zip(style_format, (field.strip() for field in value.split(","))))
+            style = {}
+            if values.get("fontsize"):
+                style["font_size"] = int(float(values["fontsize"]))
+            color = _ass_color(values.get("primarycolour", ""))
+            if color:
+                style["font_color"] = color
+            styles[values.get("name", "")] = style
+        elif key == "dialogue":
+            # Text 为最后一列，本身可能包含逗号
+            fields = value.split(",", len(event_format) - 1)
+            if len(fields) < len(event_format):
+                continue
+            values = dict(zip(event_format, fields))
+            text = _ASS_TAG.sub("", values.get("text", ""))
+            text = text.replace("\\N", "\n").replace("\\n", "\n").replace("\\h", " ").strip()
+            if not text:
+                continue
+            yield SubtitleCue(
+                _ass_time(values["start"]),
+                _ass_time(values["end"]),
+                text,
+                styles.get(values.get("style", "").strip().lstrip("*")),
+            )
+
+
+def detect_format(text: str, file_path: Optional[str] = None) -> str:
+    """
+    根据文件扩展名或内容判断字幕格式
+
+    :param text: 字幕文本（文件开头部分即可）
+    :param file_path: 字幕文件路径，扩展名为 .srt / .ass / .ssa 时直接以扩展名为准
+    :return: "srt" 或 "ass"
+    """
+    extension = os.path.splitext(file_path)[1].lower() if file_path else ""
+    if extension in (".ass", ".ssa"):
+        return "ass"
+    if extension == ".srt":
+        return "srt"
+    head = text[:4096].lower()
+    return "ass" if "[script info]" in head or "[events]" in head else "srt"
+
+
+def iter_subtitles(source: Union[str, Iterable[str]], subtitle_format: Optional[str] = None,
+                   is_path: bool = False) -> Iterator[SubtitleCue]:
+    """
+    流式解析字幕
+
+    :param source: 字幕文本、文本行迭代器，或 is_path 为 True 时的字幕文件路径
+    :param subtitle_format: "srt" / "ass"，None 时自动判断（行迭代器默认按 SRT 解析）
+    :param is_path: source 是否为文件路径
+    :return: 字幕生成器
+    """
+    if is_path:
+        with open(source, "r", encoding="utf-8-sig", errors="replace") as f:
+            if subtitle_format is None:
+                subtitle_format = detect_format(f.read(4096), source)
+                f.seek(0)
+            yield from (iter_ass if subtitle_format == "ass" else iter_srt)(f)
+        return
+
+    if isinstance(source, str):
+        subtitle_format = subtitle_format or detect_format(source)
+        source = io.StringIO(source)
+    yield from (iter_ass if subtitle_format == "ass" else iter_srt)(source)
@@ -0,0 +1,126 @@
+"""
+流式音频解码
+
+NOTE: pydub 的 AudioSegment.from_file 把整条音轨解码为 PCM 放在内存中，
+2 小时 48kHz 立体声约 1.3GB，转成数组时还要再复制一次
+1. ffmpeg 子进程解码，-ac 1 混为单声道，-ar 降采样（默认 16kHz，包络分析不需要更高的采样率），
+   以 s16le 原始 PCM 写入管道
+2. 按固定大小的块读取管道（复用同一个缓冲区），逐块送入 EnvelopeBuilder，
+   内存占用只取决于块大小，与媒体时长无关
+"""
+import shutil
+import subprocess
+import tempfile
+from typing import Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+from backend.core.conf import app_config
+from backend.integrations.jianying_api.audio_envelope import AudioEnvelope, EnvelopeBuilder, np
+
+
+def ffmpeg_binary() -> Optional[str]:
+    """
+    ffmpeg 可执行文件路径
+
+    :return: 配置 audio_analysis.ffmpeg_path 或 PATH 中的 ffmpeg，不存在时返回 None
+    """
+    return app_config.get('audio_analysis.ffmpeg_path') or shutil.which("ffmpeg")
+
+
+def iter_ffmpeg_blocks(arguments: List[str], block_bytes: int) -> Iterator[Tuple[bytearray, int]]:
+    """
+    运行 ffmpeg 并按固定大小的块读取标准输出
+
+    NOTE: 每次产出同一个缓冲区，只在下一次迭代前有效；只有最后一块可能不满
+
+    :param arguments: ffmpeg 参数（不含可执行文件，输出为 "-" 即标准输出）
+    :param block_bytes: 每块字节数
+    :return: (缓冲区, 有效字节数) 生成器
+    """
+    binary = ffmpeg_binary()
+    if not binary:
+        raise RuntimeError("未找到 ffmpeg, 请安装 ffmpeg 或配置 audio_analysis.ffmpeg_path")
+
+    buffer = bytearray(block_bytes)
+    view = memoryview(buffer)
+    # 错误输出写入临时文件: 同时读两个管道时，stderr 写满会让 ffmpeg 阻塞
+    stderr = tempfile.TemporaryFile()
+    process = subprocess.Popen([binary, "-nostdin", "-v", "error", *arguments], stdout=subprocess.PIPE, stderr=stderr)
+    try:
+        while True:
+            filled = 0
+            while filled < block_bytes:
+                read = process.stdout.readinto(view[filled:])
+                if not read:
+                    break
+                filled += read
+            if filled:
+                yield buffer, filled
+            if filled < block_bytes:
+                break
+        if process.wait() != 0:
+            stderr.seek(0)
+            error = stderr.read().decode("utf-8", errors="replace").strip()
+            raise RuntimeError(f"ffmpeg 解码失败: {error or process.returncode}")
+    finally:
+        if process.poll() is None:
+            # 调用方提前结束迭代
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        stderr.close()
+
+
+def iter_pcm_blocks(
+    media_path: str,
+    sample_rate: int = 16000,
+    block_seconds: float = 10.0
+) -> Iterator["np.ndarray"]:
+    """
+    流式解码为单声道 16 位 PCM
+
+    NOTE: 产出的数组引用同一个缓冲区，只在下一次迭代前有效
+
+    :param media_path: 音频/视频文件路径
+    :param sample_rate: 输出采样率
+    :param block_seconds: 每块时长（秒）
+    :return: int16 采样块生成器
+    """
+    if np is None:
+        raise ImportError("需要安装 numpy: pip install numpy")
+
+    arguments = [
+        "-i", media_path, "-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "-acodec", "pcm_s16le", "-",
+    ]
+    block_bytes = max(2, int(sample_rate * block_seconds)) * 2
+    for buffer, filled in iter_ffmpeg_blocks(arguments, block_bytes):
+        # 采样为 2 字节，不足一个采样的尾部字节丢弃
+        usable = filled // 2 * 2
+        if usable:
+            yield np.frombuffer(buffer, dtype=np.int16, count=usable // 2)
+
+
+def decode_envelope(
+    media_path: str,
+    hop: float = 0.01,
+    sample_rate: Optional[int] = None,
+    block_seconds: Optional[float] = None
+) -> AudioEnvelope:
+    """
+    流式解码并计算包络
+
+    :param media_path: 音频/视频文件路径
+    :param hop: 帧长（秒）
+    :param sample_rate: 解码采样率，None 时使用配置 audio_analysis.sample_rate
+    :param block_seconds: 每块时长（秒），None 时使用配置 audio_analysis.block_seconds
+    :return: 音频包络
+    """
+    sample_rate = sample_rate or app_config.get('audio_analysis.sample_rate', 16000)
+    block_seconds = block_seconds or app_config.get('audio_analysis.block_seconds', 10.0)
+    builder = EnvelopeBuilder(sample_rate, 1, hop)
+    for block in iter_pcm_blocks(media_path, sample_rate, block_seconds):
+        builder.feed(block)
+    envelope = builder.finish()
+    logger.debug(f"流式解码完成: {media_path}, {envelope.duration:.1f} 秒")
+    return envelope
@@ -0,0 +1,444 @@
+"""
+音频包络
+
+NOTE: 静音检测与高光检测原本各自解码一次音频，高光检测在 Python 循环中按秒计算音量，
+并且以 sample_rate 作为每秒的采样数，立体声交错采样时窗口只有半秒
+1. AudioEnvelope 每个文件只计算一次: 交错采样按声道数 reshape 后混为单声道，
+   再按 hop（默认 10ms）reshape 为帧，得到每帧的均方能量与峰值
+2. 任意窗口长度的 RMS 由帧能量的前缀和（cumsum）相减得到
+3. 静音、高光、响度检测都是包络上的向量化运算，结果以秒为单位
+4. top_highlights 以亚秒级滑动窗口计分，用堆在总时长预算内选出前 K 个互不重叠的高光
+5. speech 为语音活动检测: 同一遍计算的短时能量与过零率，配合自适应噪声底与拖尾平滑
+6. EnvelopeBuilder 按块增量计算（配合 audio_decoder 流式解码），内存占用与媒体时长无关
+
+幅度均归一化到满刻度 1.0，dBFS = 20 * log10(RMS)
+NumPy 为可选依赖，未安装时创建包络抛出 ImportError
+"""
+import heapq
+from typing import List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - 可选依赖
+    np = None
+
+# 计算 dBFS 时的下限，避免 log10(0)
+MIN_DBFS = -120.0
+
+
+def _runs(mask: "np.ndarray") -> "np.ndarray":
+    """
+    连续为 True 的区间
+
+    :param mask: 布尔数组
+    :return: [[起始下标, 结束下标), ...]，形状 (n, 2)
+    """
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.column_stack((np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+def default_full_scale(samples: "np.ndarray") -> float:
+    """满刻度幅度: 整数按位宽推断，浮点为 1.0"""
+    return float(2 ** (samples.dtype.itemsize * 8 - 1)) if samples.dtype.kind in "iu" else 1.0
+
+
+def to_mono(samples: "np.ndarray", channels: int, full_scale: float) -> "np.ndarray":
+    """
+    交错采样 -> 归一化到满刻度 1.0 的单声道 float64
+
+    :param samples: 交错排列的采样
+    :param channels: 声道数
+    :param full_scale: 满刻度幅度
+    :return: 单声道采样（新数组，不引用输入缓冲区）
+    """
+    if channels == 1:
+        mono = samples.astype(np.float64)
+    else:
+        mono = samples.reshape(-1, channels).mean(axis=1, dtype=np.float64)
+    mono /= full_scale
+    return mono
+
+
+class AudioEnvelope:
+    """单声道音频包络"""
+
+    def __init__(self, energy: "np.ndarray", peak: "np.ndarray", hop: float, duration: float,
+                 zcr: Optional["np.ndarray"] = None):
+        """
+        :param energy: 每帧均方能量（归一化幅度的平方均值）
+        :param peak: 每帧峰值（归一化幅度）
+        :param hop: 帧长（秒）
+        :param duration: 音频时长（秒）
+        :param zcr: 每帧过零率（次/秒），None 表示未计算
+        """
+        if np is None:
+            raise ImportError("需要安装 numpy: pip install numpy")
+        self.energy = energy
+        self.peak = peak
+        self.zcr = zcr
+        self.hop = hop
+        self.duration = duration
+        self._cumulative: Optional["np.ndarray"] = None
+
+    def __len__(self) -> int:
+        return len(self.energy)
+
+    @classmethod
+    def from_samples(
+        cls,
+        samples: "np.ndarray",
+        sample_rate: int,
+        channels: int = 1,
+        hop: float = 0.01,
+        full_scale: Optional[float] = None
+    ) -> "AudioEnvelope":
+        """
+        由完整的 PCM 采样计算包络
+
+        :param samples: 交错排列的采样（整数或浮点）
+        :param sample_rate: 采样率
+        :param channels: 声道数
+        :param hop: 帧长（秒）
+        :param full_scale: 满刻度幅度，None 时整数按位宽推断、浮点为 1.0
+        :return: 音频包络
+        """
+        builder = EnvelopeBuilder(sample_rate, channels, hop, full_scale)
+        builder.feed(samples)
+        return builder.finish()
+
+    def _smooth_runs(self, mask: "np.ndarray", min_on: float, min_off: float) -> "np.ndarray":
+        """去掉短于 min_on 秒的 True 区间，再填平短于 min_off 秒的 False 间隔，返回 [[起始帧, 结束帧), ...]"""
+        runs = _runs(mask)
+        runs = runs[(runs[:, 1] - runs[:, 0]) * self.hop >= min_on - 1e-9]
+        if len(runs) > 1:
+            # 间隔不短于 min_off 的位置才断开
+            breaks = np.flatnonzero((runs[1:, 0] - runs[:-1, 1]) * self.hop >= min_off - 1e-9) + 1
+            runs = np.column_stack((
+                runs[np.concatenate(([0], breaks)), 0],
+                runs[np.concatenate((breaks - 1, [len(runs) - 1])), 1],
+            ))
+        return runs
+
+    def noise_floor(self, window: float = 5.0, percentile: float = 10.0) -> "np.ndarray":
+        """
+        自适应噪声底（每帧，dBFS）
+
+        每 window 秒取帧电平的 percentile 百分位，与相邻块取最小（整块都是语音时不抬高噪声底），
+        再在块中心之间线性插值
+
+        :param window: 块长度（秒）
+        :param percentile: 百分位（0-100）
+        :return: dBFS 数组
+        """
+        levels = self.rms_dbfs()
+        count = len(levels)
+        block = self._frames(window)
+        blocks = np.pad(levels, (0, (-count) % block), mode='edge').reshape(-1, block)
+        floor = np.percentile(blocks, percentile, axis=1)
+        floor = np.minimum(floor, np.minimum(np.r_[floor[:1], floor[:-1]], np.r_[floor[1:], floor[-1:]]))
+        centers = (np.arange(len(floor)) + 0.5) * block
+        return np.interp(np.arange(count), centers, floor)
+
+    def speech(
+        self,
+        margin_db: float = 12.0,
+        min_silence: float = 0.5,
+        hangover: float = 0.3,
+        min_speech: float = 0.1,
+        floor_window: float = 5.0,
+        hum_zcr: float = 200.0,
+        unvoiced_zcr: float = 3000.0
+    ) -> List[Tuple[float, float]]:
+        """
+        语音活动检测（VAD）: 短时能量 + 过零率
+
+        1. 浊音: 电平高于自适应噪声底 margin_db，且过零率高于 hum_zcr（排除低频嗡声）
+        2. 清音/呼吸: 电平高于噪声底 margin_db / 2，且过零率高于 unvoiced_zcr（噪声状高频成分）
+        3. 拖尾（hangover）: 语音帧之后 hangover 秒内仍视为语音，避免切掉词尾与换气
+        4. 去掉短于 min_speech 的语音区间，填平短于 min_silence 的间隔
+
+        :param margin_db: 浊音高出噪声底的电平（dB）
+        :param min_silence: 最小静音时长（秒），更短的间隔并入语音
+        :param hangover: 拖尾时长（秒）
+        :param min_speech: 最小语音时长（秒）
+        :param floor_window: 噪声底的块长度（秒）
+        :param hum_zcr: 浊音的最低过零率（次/秒）
+        :param unvoiced_zcr: 清音的最低过零率（次/秒）
+        :return: 语音区间 [(开始秒, 结束秒), ...]
+        """
+        count = len(self.energy)
+        if not count:
+            return []
+        levels = self.rms_dbfs()
+        floor = self.noise_floor(floor_window)
+        # 没有过零率时只按能量判断
+        zcr = self.zcr if self.zcr is not None else np.full(count, hum_zcr + 1.0)
+        mask = ((levels > floor + margin_db) & (zcr > hum_zcr)) | \
+               ((levels > floor + margin_db / 2) & (zcr > unvoiced_zcr))
+
+        # 拖尾: 当前帧或之前 hang 帧内有语音帧（前缀和相减）
+        hang = int(round(hangover / self.hop))
+        if hang:
+            cumulative = np.concatenate(([0], np.cumsum(mask)))
+            frames = np.arange(count)
+            mask = cumulative[frames + 1] - cumulative[np.maximum(frames - hang, 0)] > 0
+
+        runs = self._smooth_runs(mask, min_speech, min_silence)
+        return [
+            (round(start * self.hop, 6), round(min(end * self.hop, self.duration), 6))
+            for start, end in runs.tolist()
+        ]
+
+    def _frames(self, seconds: float) -> int:
+        """秒 -> 帧数（至少 1 帧）"""
+        return max(1, int(round(seconds / self.hop)))
+
+    def _prefix_sums(self) -> "np.ndarray":
+        """帧能量前缀和（首项为 0），[a, b) 帧的能量和 = cumulative[b] - cumulative[a]"""
+        if self._cumulative is None:
+            self._cumulative = np.concatenate(([0.0], np.cumsum(self.energy)))
+        return self._cumulative
+
+    def _window_energy(self, window: float) -> Tuple["np.ndarray", int]:
+        """不重叠窗口的均方能量（由帧能量前缀和相减），返回 (能量, 每个窗口的帧数)"""
+        hops = self._frames(window)
+        # 最后一个窗口可能不足 hops 帧
+        bounds = np.append(np.arange(0, len(self.energy), hops), len(self.energy))
+        sums = np.diff(self._prefix_sums()[bounds])
+        return sums / np.diff(bounds), hops
+
+    @staticmethod
+    def to_dbfs(energy: "np.ndarray") -> "np.ndarray":
+        """均方能量 -> dBFS"""
+        return np.maximum(10 * np.log10(np.maximum(energy, 1e-20)), MIN_DBFS)
+
+    def rms_dbfs(self, window: Optional[float] = None) -> "np.ndarray":
+        """
+        每帧（或每个窗口）的 RMS 电平
+
+        :param window: 窗口长度（秒），None 表示按帧
+        :return: dBFS 数组
+        """
+        energy = self.energy if window is None else self._window_energy(window)[0]
+        return self.to_dbfs(energy)
+
+    def _ranges(self, mask: "np.ndarray", step: float, min_duration: float) -> List[Tuple[float, float]]:
+        runs = _runs(mask)
+        if not len(runs):
+            return []
+        runs = runs[(runs[:, 1] - runs[:, 0]) * step >= min_duration - 1e-9]
+        return [
+            (round(start * step, 6), round(min(end * step, self.duration), 6))
+            for start, end in runs.tolist()
+        ]
+
+    def silence(self, threshold_db: float = -40.0, min_duration: float = 0.5) -> List[Tuple[float, float]]:
+        """
+        静音区间: 帧电平低于阈值且持续不短于 min_duration
+
+        :param threshold_db: 静音阈值（dBFS）
+        :param min_duration: 最小静音时长（秒）
+        :return: [(开始秒, 结束秒), ...]
+        """
+        return self._ranges(self.rms_dbfs() < threshold_db, self.hop, min_duration)
+
+    def loud(self, threshold_db: float, min_duration: float = 0.0, window: Optional[float] = None) -> List[Tuple[float, float]]:
+        """
+        响度不低于阈值的区间
+
+        :param threshold_db: 响度阈值（dBFS）
+        :param min_duration: 最小时长（秒）
+        :param window: 计算电平的窗口长度（秒），None 表示按帧
+        :return: [(开始秒, 结束秒), ...]
+        """
+        step = self.hop if window is None else self._window_energy(window)[1] * self.hop
+        return self._ranges(self.rms_dbfs(window) >= threshold_db, step, min_duration)
+
+    def highlights(
+        self,
+        threshold_percentile: float = 80.0,
+        min_duration: float = 2.0,
+        window: float = 1.0
+    ) -> List[Tuple[float, float]]:
+        """
+        高光区间: 窗口 RMS 不低于全部窗口的 threshold_percentile 百分位，且持续不短于 min_duration
+
+        :param threshold_percentile: 阈值百分位（0-100）
+        :param min_duration: 最小高光时长（秒）
+        :param window: 窗口长度（秒）
+        :return: [(开始秒, 结束秒), ...]
+        """
+        energy, hops = self._window_energy(window)
+        if not len(energy):
+            return []
+        threshold = np.percentile(energy, threshold_percentile)
+        return self._ranges(energy >= threshold, hops * self.hop, min_duration)
+
+    def _best_window(self, start: int, end: int, frames: int) -> int:
+        """[start, end) 帧内平均能量最高的 frames 帧窗口的起始帧"""
+        cumulative = self._prefix_sums()
+        sums = cumulative[start + frames:end + 1] - cumulative[start:end - frames + 1]
+        return start + int(np.argmax(sums))
+
+    def top_highlights(
+        self,
+        window: float = 5.0,
+        hop: float = 1.0,
+        top_k: Optional[int] = None,
+        max_duration: Optional[float] = None,
+        threshold_percentile: float = 80.0,
+        min_duration: float = 0.0
+    ) -> List[Tuple[float, float, float]]:
+        """
+        按得分选出前 K 个互不重叠的高光区间
+
+        1. 长度 window、步长 hop 的滑动窗口，平均能量由帧能量前缀和相减得到（O(n)）
+        2. 不低于 threshold_percentile 百分位的候选窗口，相互重叠的合并为一个区间，按区间平均能量计分；
+           未指定 max_duration 时每个区间截取为其中得分最高的 window 长度（不短于 min_duration）
+        3. 区间放入最大堆，依次取得分最高的区间，直到取满 top_k 个或总时长达到 max_duration；
+           超出剩余时长的区间截取其中得分最高的一段（不短于 window）
+
+        :param window: 窗口长度（秒，可小于 1 秒）
+        :param hop: 窗口步长（秒）
+        :param top_k: 最多返回的区间数，None 表示不限
+        :param max_duration: 区间总时长上限（秒），None 表示不限
+        :param threshold_percentile: 候选窗口的得分百分位阈值（0-100）
+        :param min_duration: 最小区间时长（秒）
+        :return: [(开始秒, 结束秒, 得分 dBFS), ...]，按开始时间排序
+        """
+        total = len(self.energy)
+        if not total or top_k == 0:
+            return []
+        cumulative = self._prefix_sums()
+        window_frames = min(self._frames(window), total)
+        starts = np.arange(0, total - window_frames + 1, self._frames(hop))
+        scores = cumulative[starts + window_frames] - cumulative[starts]
+
+        candidates = starts[scores >= np.percentile(scores, threshold_percentile)]
+        # 窗口长度固定，起始帧不超过上一个窗口的结束帧即重叠
+        breaks = np.flatnonzero(candidates[1:] > candidates[:-1] + window_frames) + 1
+        region_starts = candidates[np.concatenate(([0], breaks))]
+        region_ends = candidates[np.concatenate((breaks - 1, [len(candidates) - 1]))] + window_frames
+        keep = (region_ends - region_starts) * self.hop >= min_duration - 1e-9
+        region_starts, region_ends = region_starts[keep], region_ends[keep]
+        min_frames = max(window_frames, self._frames(min_duration) if min_duration > 0 else 1)
+        if max_duration is None:
+            # 区间长度不随重叠窗口的数量增长
+            for number, (start, end) in enumerate(zip(region_starts.tolist(), region_ends.tolist())):
+                if end - start > min_frames:
+                    region_starts[number] = self._best_window(start, end, min_frames)
+                    region_ends[number] = region_starts[number] + min_frames
+        region_scores = (cumulative[region_ends] - cumulative[region_starts]) / (region_ends - region_starts)
+
+        heap = [(-score, start, end) for score, start, end in
+                zip(region_scores.tolist(), region_starts.tolist(), region_ends.tolist())]
+        heapq.heapify(heap)
+        remaining = total if max_duration is None else self._frames(max_duration)
+        selected = []
+        while heap and remaining >= min_frames and (top_k is None or len(selected) < top_k):
+            score, start, end = heapq.heappop(heap)
+            if end - start > remaining:
+                start = self._best_window(start, end, remaining)
+                end = start + remaining
+                score = -float(cumulative[end] - cumulative[start]) / remaining
+            selected.append((start, end, -score))
+            remaining -= end - start
+
+        return [
+            (round(start * self.hop, 6), round(min(end * self.hop, self.duration), 6),
+             round(float(self.to_dbfs(np.array([score]))[0]), 2))
+            for start, end, score in sorted(selected)
+        ]
+
+    def loudness(self) -> dict:
+        """
+        整体响度
+
+        :return: {"rms_dbfs": 整体 RMS 电平, "peak_dbfs": 峰值电平, "silence_ratio": -60dBFS 以下的帧占比}
+        """
+        if not len(self.energy):
+            return {"rms_dbfs": MIN_DBFS, "peak_dbfs": MIN_DBFS, "silence_ratio": 1.0}
+        return {
+            "rms_dbfs": float(self.to_dbfs(np.array([self.energy.mean()]))[0]),
+            "peak_dbfs": float(self.to_dbfs(np.array([self.peak.max() ** 2]))[0]),
+            "silence_ratio": float((self.rms_dbfs() < -60.0).mean()),
+        }
+
+
+class EnvelopeBuilder:
+    """
+    增量计算包络
+
+    PCM 数据按块送入，每块只处理完整的帧，不足一帧的采样留到下一块；
+    内存占用只与块大小和包络长度（每秒 1 / hop 个值）有关，与媒体时长无关
+    """
+
+    def __init__(self, sample_rate: int, channels: int = 1, hop: float = 0.01, full_scale: Optional[float] = None):
+        """
+        :param sample_rate: 采样率
+        :param channels: 声道数（交错排列）
+        :param hop: 帧长（秒）
+        :param full_scale: 满刻度幅度，None 时按第一块的数据类型推断
+        """
+        if np is None:
+            raise ImportError("需要安装 numpy: pip install numpy")
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.hop_samples = max(1, int(round(hop * sample_rate)))
+        self.full_scale = full_scale
+        self._carry: Optional["np.ndarray"] = None
+        self._energy: List["np.ndarray"] = []
+        self._peak: List["np.ndarray"] = []
+        self._zcr: List["np.ndarray"] = []
+        self._frames = 0
+
+    def _mono(self, samples: "np.ndarray") -> "np.ndarray":
+        """交错采样 -> 归一化的单声道 float64"""
+        if self.full_scale is None:
+            self.full_scale = default_full_scale(samples)
+        return to_mono(samples, self.channels, self.full_scale)
+
+    def _crossings(self, frames: "np.ndarray") -> "np.ndarray":
+        """每帧过零率（次/秒），帧之间的过零不计"""
+        signs = np.signbit(frames)
+        return np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) * (self.sample_rate / frames.shape[1])
+
+    def feed(self, samples: "np.ndarray") -> None:
+        """
+        送入一块交错排列的 PCM 采样（调用返回后即可复用该缓冲区）
+
+        :param samples: 采样数组
+        """
+        if self._carry is not None and len(self._carry):
+            samples = np.concatenate((self._carry, samples))
+        block = self.hop_samples * self.channels
+        usable = len(samples) // block * block
+        # 剩余不足一帧的采样复制保留（samples 可能是调用方复用的缓冲区）
+        self._carry = samples[usable:].copy()
+        if not usable:
+            return
+        frames = self._mono(samples[:usable]).reshape(-1, self.hop_samples)
+        self._energy.append(np.einsum('ij,ij->i', frames, frames) / self.hop_samples)
+        self._peak.append(np.abs(frames).max(axis=1))
+        self._zcr.append(self._crossings(frames))
+        self._frames += usable // self.channels
+
+    def finish(self) -> AudioEnvelope:
+        """
+        处理剩余采样（最后一帧按实际采样数计算能量）并生成包络
+
+        :return: 音频包络
+        """
+        tail = self._carry if self._carry is not None else np.zeros(0)
+        tail = tail[:len(tail) // self.channels * self.channels]
+        if len(tail):
+            mono = self._mono(tail)
+            self._energy.append(np.array([np.dot(mono, mono) / len(mono)]))
+            self._peak.append(np.array([np.abs(mono).max()]))
+            self._zcr.append(self._crossings(mono.reshape(1, -1)))
+            self._frames += len(mono)
+        self._carry = None
+        energy = np.concatenate(self._energy) if self._energy else np.zeros(0)
+        peak = np.concatenate(self._peak) if self._peak else np.zeros(0)
+        zcr = np.concatenate(self._zcr) if self._zcr else np.zeros(0)
+        return AudioEnvelope(energy, peak, self.hop_samples / self.sample_rate, self._frames / self.sample_rate, zcr)
@@ -3,35 +3,84 @@
 """
 import uuid
 import random
-import copy
-from typing import Dict, List, Optional, Union, Tuple
+from typing import Dict, Iterable, List, Optional, Union, Tuple
 from loguru import logger
 
+from backend.common.draft_index import DraftIndex
+from backend.common.draft_ripple import RippleEngine
+from backend.common.draft_timeline import clone_segments
+from backend.common.material_registry import MaterialRegistry
+from backend.common.subtitle_parser import SubtitleCue, iter_subtitles
+from backend.integrations.jianying_api.media_probe import duration_us, media_probe
+
 class DraftEditor:
     """
     剪映草稿编辑器
     用于对草稿内容(draft_content.json)进行高级编辑
     """
 
+    # 批量编辑支持的操作: 操作名 -> 方法名 (参数与对应方法一致)
+    BATCH_OPERATIONS = {
+        "add_audio": "add_audio",
+        "add_filter": "add_filter",
+        "add_transition": "add_transition",
+        "add_text": "add_text",
+        "import_subtitles": "import_subtitles",
+        "split_segment": "split_segment",
+        "trim_segment": "trim_segment",
+        "adjust_brightness": "adjust_brightness",
+        "adjust_contrast": "adjust_contrast",
+        "adjust_saturation": "adjust_saturation",
+        "adjust_color": "adjust_color",
+        "deduplicate": "deduplicate",
+        "compact_materials": "compact_materials",
+        "ripple_delete": "ripple_delete",
+        "ripple_keep": "ripple_keep",
+    }
+
     def __init__(self, content: Dict):
         """
         初始化编辑器
         :param content: 草稿内容的字典对象 (draft_content.json)
         """
         self.content = content
-        self.tracks = self.content.get("tracks", [])
-        self.materials = self.content.get("materials", {})
+        self.tracks = self.content.setdefault("tracks", [])
+        self.materials = self.content.setdefault("materials", {})
         
         # 确保 materials 结构存在
         topic_types = ["videos", "audios", "stickers", "effects", "transitions", "filters"]
         for topic in topic_types:
             if topic not in self.materials:
                 self.materials[topic] = []
+        
+        # 片段/素材/轨道索引, 编辑操作通过索引修改草稿以保持索引同步
+        self.index = DraftIndex(self.content)
+        # 素材注册表, 滤镜/转场等素材按 (类型, 特效 ID, 参数) 复用, 避免重复追加
+        self.material_registry = MaterialRegistry(self.index)
+        # 去重使用的随机数生成器, 指定种子时可复现
+        self._rng = random
 
     def get_content(self) -> Dict:
         """获取编辑后的内容"""
         return self.content
 
+    def apply_operation(self, op: str, params: Optional[Dict] = None) -> bool:
+        """
+        按名称执行一个编辑操作
+        
+        :param op: 操作名称, 见 BATCH_OPERATIONS
+        :param params: 操作参数, 与对应方法的参数一致
+        :return: 是否成功
+        """
+        method_name = self.BATCH_OPERATIONS.get(op)
+        if not method_name:
+            raise ValueError(f"不支持的操作: {op}")
+        
+        try:
+            return bool(getattr(self, method_name)(**(params or {})))
+        except TypeError as e:
+            raise ValueError(f"操作 {op} 参数错误: {e}")
+
     def _generate_id(self) -> str:
         """生成唯一 ID"""
         return str(uuid.uuid4()).upper()
@@ -54,17 +103,29 @@ class DraftEditor:
                 max_duration = track_duration
         return max_duration
 
-    def add_audio(self, file_path: str, start_time: int = 0, duration: int = -1, volume: float = 1.0) -> bool:
+    def add_audio(
+        self,
+        file_path: str,
+        start_time: int = 0,
+        duration: int = -1,
+        volume: float = 1.0,
+        media_info: Optional[Dict] = None
+    ) -> bool:
         """
         添加背景音乐
         :param file_path: 音频文件绝对路径
         :param start_time: 插入起始时间 (微秒)
-        :param duration: 持续时长 (微秒)，-1 表示使用音频全长或对齐视频长度
+        :param duration: 持续时长 (微秒)，-1 表示对齐视频长度（没有视频时使用音频全长），不超过音频全长
         :param volume: 音量 (0.0 - 1.0)
+        :param media_info: 已探测的媒体信息 (应在草稿锁外用 media_probe 探测)，None 时只读取探测缓存，不运行 ffprobe
         :return: 是否成功
         """
         try:
             audio_id = self._generate_id()
+            if media_info is None:
+                media_info = media_probe.cached(file_path)
+            # 未探测或探测失败时沿用默认 10s
+            audio_duration = duration_us(media_info)
             
             # 1. 添加到 materials.audios
             audio_material = {
@@ -90,7 +151,7 @@ class DraftEditor:
                     "upper_right_x": 1.0,
                     "upper_right_y": 0.0
                 },
-                "duration": 10000000, # 默认 10s，后面应该读取真实文件时长，这里简化
+                "duration": audio_duration or 10000000,
                 "effect_id": audio_id,
                 "extra_info": "",
                 "formula_id": "",
@@ -115,32 +176,30 @@ class DraftEditor:
                 "update_time": 0,
                 "version": 0
             }
-            self.materials["audios"].append(audio_material)
+            self.index.add_material("audios", audio_material)
 
             # 2. 计算时长
             # 如果 duration 为 -1，则尝试对齐视频最大时长
             if duration == -1:
                 duration = self._get_track_max_duration()
                 if duration == 0:
-                    duration = 10000000 # 默认 10s
+                    duration = audio_duration or 10000000
+            # 片段不能超出素材本身
+            if audio_duration:
+                duration = min(duration, audio_duration)
 
             # 3. 添加到 tracks
             # 查找现有的音频轨道，或者新建
-            target_track = None
-            for track in self.tracks:
-                if track.get("type") == "audio":
-                    target_track = track
-                    break
+            target_track = self.index.first_track("audio")
             
             if not target_track:
-                target_track = {
+                target_track = self.index.add_track({
                     "attribute": 0,
                     "flag": 0,
                     "id": self._generate_id(),
                     "segments": [],
                     "type": "audio"
-                }
-                self.tracks.append(target_track)
+                })
 
             segment_id = self._generate_id()
             segment = {
@@ -180,7 +239,7 @@ class DraftEditor:
                 "volume": volume
             }
             
-            target_track["segments"].append(segment)
+            self.index.append_segment(target_track, segment)
             logger.info(f"已添加背景音乐: {file_path}")
             return True
 
@@ -188,12 +247,16 @@ class DraftEditor:
             logger.error(f"添加背景音乐失败: {e}")
             return False
 
-    def deduplicate(self, config: Dict = None) -> bool:
+    def deduplicate(self, config: Dict = None, seed: Optional[int] = None) -> bool:
         """
         智能去重
         :param config: 配置字典，支持 speed, mirror, crop, filter
+        :param seed: 随机种子, 相同的草稿、配置与种子得到相同的结果
         :return: 是否成功
         """
+        if seed is not None:
+            self._rng = random.Random(seed)
+
         if config is None:
             config = {
                 "speed": True, 
@@ -204,15 +267,14 @@ class DraftEditor:
             
         try:
             # 遍历所有视频轨道的主视频片段
-            for track in self.tracks:
-                if track.get("type") == "video":
-                    for segment in track.get("segments", []):
-                        if config.get("speed"):
-                            self._apply_speed(segment)
-                        if config.get("mirror"):
-                            self._apply_mirror(segment)
-                        if config.get("crop"):
-                            self._apply_crop(segment)
+            for track in self.index.tracks("video"):
+                for segment in track.get("segments", []):
+                    if config.get("speed"):
+                        self._apply_speed(segment)
+                    if config.get("mirror"):
+                        self._apply_mirror(segment)
+                    if config.get("crop"):
+                        self._apply_crop(segment)
             
             if config.get("filter"):
                 self._apply_random_filter()
@@ -227,7 +289,7 @@ class DraftEditor:
     def _apply_speed(self, segment: Dict):
         """应用微变变速"""
         # 随机 0.95 - 1.05 之间
-        speed_factor = 1.0 + (random.random() * 0.1 - 0.05)
+        speed_factor = 1.0 + (self._rng.random() * 0.1 - 0.05)
         segment["speed"] = speed_factor
         # 注意：变速后需要调整 target_timerange 的 duration
         # duration / speed = new_duration (视觉时长变了)
@@ -237,7 +299,7 @@ class DraftEditor:
         
     def _apply_mirror(self, segment: Dict):
         """应用随机镜像"""
-        if random.random() > 0.5:
+        if self._rng.random() > 0.5:
             # 查找或创建 clip 属性
             if "clip" not in segment:
                 segment["clip"] = {}
@@ -249,7 +311,7 @@ class DraftEditor:
     def _apply_crop(self, segment: Dict):
         """应用随机轻微裁剪 (Zoom in)"""
         # scale 1.02 - 1.05
-        scale_factor = 1.02 + random.random() * 0.03
+        scale_factor = 1.02 + self._rng.random() * 0.03
         if "clip" not in segment:
             segment["clip"] = {}
         if "scale" not in segment["clip"]:
@@ -264,7 +326,7 @@ class DraftEditor:
         from .filter_library import FilterLibrary
         
         # 获取随机滤镜
-        filter_name = FilterLibrary.get_random_filter()
+        filter_name = FilterLibrary.get_random_filter(rng=self._rng)
         if not filter_name:
             return
         
@@ -273,30 +335,28 @@ class DraftEditor:
             return
         
         # 遍历所有视频轨道的片段
-        for track in self.tracks:
-            if track.get("type") == "video":
-                for segment in track.get("segments", []):
-                    # 添加滤镜到片段
-                    if "extra_material_refs" not in segment:
-                        segment["extra_material_refs"] = []
-                    
-                    # 添加滤镜引用
-                    segment["extra_material_refs"].append(filter_id)
-                    
-                    # 添加滤镜到 materials.filters (如果需要)
-                    if "filters" not in self.materials:
-                        self.materials["filters"] = []
-                    
-                    # 检查滤镜是否已存在
-                    filter_exists = any(f.get("id") == filter_id for f in self.materials["filters"])
-                    if not filter_exists:
-                        filter_material = {
-                            "id": filter_id,
-                            "name": filter_name,
-                            "type": "filter",
-                            "intensity": 0.5 + random.random() * 0.5,  # 0.5-1.0 随机强度
-                        }
-                        self.materials["filters"].append(filter_material)
+        segments = [
+            segment
+            for track in self.index.tracks("video")
+            for segment in track.get("segments", [])
+        ]
+        for segment in segments:
+            # 添加滤镜到片段
+            if "extra_material_refs" not in segment:
+                segment["extra_material_refs"] = []
+            
+            # 添加滤镜引用
+            segment["extra_material_refs"].append(filter_id)
+        
+        # 添加滤镜到 materials.filters (如果需要)
+        if segments and not self.index.material(filter_id, "filters"):
+            filter_material = {
+                "id": filter_id,
+                "name": filter_name,
+                "type": "filter",
+                "intensity": 0.5 + self._rng.random() * 0.5,  # 0.5-1.0 随机强度
+            }
+            self.material_registry.intern("filters", filter_material)
     
     def add_filter(self, filter_name: str, intensity: float = 1.0, segment_id: Optional[str] = None) -> bool:
         """
@@ -316,35 +376,39 @@ class DraftEditor:
                 return False
             
             # 添加滤镜到 materials
-            if "filters" not in self.materials:
-                self.materials["filters"] = []
-            
-            filter_exists = any(f.get("id") == filter_id for f in self.materials["filters"])
-            if not filter_exists:
+            if not self.index.material(filter_id, "filters"):
                 filter_material = {
                     "id": filter_id,
                     "name": filter_name,
                     "type": "filter",
                     "intensity": max(0.0, min(1.0, intensity)),
                 }
-                self.materials["filters"].append(filter_material)
+                self.material_registry.intern("filters", filter_material)
+            
+            # 如果指定了 segment_id,只应用到该片段 (必须位于视频轨道)
+            if segment_id:
+                found = self.index.locate(segment_id)
+                if found and found[0].get("type") == "video":
+                    segments = [found[0]["segments"][found[1]]]
+                else:
+                    segments = []
+            else:
+                segments = [
+                    segment
+                    for track in self.index.tracks("video")
+                    for segment in track.get("segments", [])
+                ]
             
             # 应用到片段
             applied = False
-            for track in self.tracks:
-                if track.get("type") == "video":
-                    for segment in track.get("segments", []):
-                        # 如果指定了 segment_id,只应用到该片段
-                        if segment_id and segment.get("id") != segment_id:
-                            continue
-                        
-                        if "extra_material_refs" not in segment:
-                            segment["extra_material_refs"] = []
-                        
-                        # 避免重复添加
-                        if filter_id not in segment["extra_material_refs"]:
-                            segment["extra_material_refs"].append(filter_id)
-                            applied = True
+            for segment in segments:
+                if "extra_material_refs" not in segment:
+                    segment["extra_material_refs"] = []
+                
+                # 避免重复添加
+                if filter_id not in segment["extra_material_refs"]:
+                    segment["extra_material_refs"].append(filter_id)
+                    applied = True
             
             if applied:
                 logger.info(f"已添加滤镜: {filter_name}")
@@ -380,43 +444,33 @@ class DraftEditor:
             # 转换秒为微秒
             duration_us = int(duration * 1000000)
             
-            # 添加转场到 materials
-            if "transitions" not in self.materials:
-                self.materials["transitions"] = []
-            
+            # 添加转场到 materials (相同转场与时长只保留一份)
             transition_material = {
                 "id": transition_id,
                 "name": transition_name,
                 "type": "transition",
                 "duration": duration_us,
             }
-            self.materials["transitions"].append(transition_material)
+            self.material_registry.intern("transitions", transition_material)
             
-            # 查找视频轨道
-            for track in self.tracks:
-                if track.get("type") == "video":
+            # 如果没有指定片段,自动在每条视频轨道的相邻片段间添加转场
+            if not from_segment_id and not to_segment_id:
+                for track in self.index.tracks("video"):
                     segments = track.get("segments", [])
-                    
-                    # 如果没有指定片段,自动在相邻片段间添加转场
-                    if not from_segment_id and not to_segment_id:
-                        for i in range(len(segments) - 1):
-                            self._add_transition_between_segments(
-                                segments[i], segments[i + 1], transition_id, duration_us
-                            )
-                    else:
-                        # 查找指定的片段
-                        from_seg = None
-                        to_seg = None
-                        for seg in segments:
-                            if seg.get("id") == from_segment_id:
-                                from_seg = seg
-                            if seg.get("id") == to_segment_id:
-                                to_seg = seg
-                        
-                        if from_seg and to_seg:
-                            self._add_transition_between_segments(
-                                from_seg, to_seg, transition_id, duration_us
-                            )
+                    for i in range(len(segments) - 1):
+                        self._add_transition_between_segments(
+                            segments[i], segments[i + 1], transition_id, duration_us
+                        )
+            else:
+                # 查找指定的片段 (须位于同一条视频轨道)
+                from_found = self.index.locate(from_segment_id) if from_segment_id else None
+                to_found = self.index.locate(to_segment_id) if to_segment_id else None
+                if from_found and to_found and from_found[0] is to_found[0] \
+                        and from_found[0].get("type") == "video":
+                    segments = from_found[0]["segments"]
+                    self._add_transition_between_segments(
+                        segments[from_found[1]], segments[to_found[1]], transition_id, duration_us
+                    )
             
             logger.info(f"已添加转场: {transition_name}")
             return True
@@ -425,6 +479,180 @@ class DraftEditor:
             logger.error(f"添加转场失败: {e}")
             return False
     
+    def compact_materials(self, categories: Optional[List[str]] = None) -> bool:
+        """
+        清理素材: 删除没有被引用的素材以及完全相同的重复素材
+        
+        :param categories: 需要清理的素材类别 (如 ["filters", "transitions"]), 为 None 则清理全部
+        :return: 是否成功
+        """
+        try:
+            removed = self.material_registry.compact(categories)
+            logger.info(f"素材清理完成, 删除 {removed} 个素材")
+            return True
+        except Exception as e:
+            logger.error(f"素材清理失败: {e}")
+            return False
+    
+    def ripple_delete(self, ranges: List[Tuple[float, float]]) -> bool:
+        """
+        波纹删除: 一次删除多个时间线区间, 后面的内容前移填补, 所有轨道保持同步
+        
+        :param ranges: 要删除的区间 [(开始时间, 结束时间), ...] (秒), 可无序、可重叠
+        :return: 是否成功
+        """
+        try:
+            stats = RippleEngine(self.index).delete(self._to_us_ranges(ranges))
+            logger.info(f"波纹删除完成: {stats}")
+            return True
+        except Exception as e:
+            logger.error(f"波纹删除失败: {e}")
+            return False
+    
+    def ripple_keep(self, ranges: List[Tuple[float, float]]) -> bool:
+        """
+        波纹保留: 只保留给定的时间线区间, 其余部分删除并前移, 所有轨道保持同步
+        
+        :param ranges: 要保留的区间 [(开始时间, 结束时间), ...] (秒)
+        :return: 是否成功
+        """
+        try:
+            stats = RippleEngine(self.index).keep(self._to_us_ranges(ranges))
+            logger.info(f"波纹保留完成: {stats}")
+            return True
+        except Exception as e:
+            logger.error(f"波纹保留失败: {e}")
+            return False
+    
+    @staticmethod
+    def _to_us_ranges(ranges: List[Tuple[float, float]]) -> List[Tuple[int, int]]:
+        """秒 -> 微秒"""
+        return [(int(start * 1000000), int(end * 1000000)) for start, end in ranges]
+    
+    def import_subtitles(self, file_path: Optional[str] = None, content: Optional[str] = None,
+                         subtitle_format: Optional[str] = None, font_size: int = 48,
+                         font_color: str = "#FFFFFF", position_x: float = 0.5, position_y: float = 0.9,
+                         time_offset: float = 0.0) -> bool:
+        """
+        批量导入字幕 (SRT / ASS)
+        
+        :param file_path: 字幕文件路径 (与 content 二选一)
+        :param content: 字幕文本
+        :param subtitle_format: "srt" / "ass", 为 None 则按扩展名或内容判断
+        :param font_size: 默认字体大小 (ASS 样式中的字号/颜色优先)
+        :param font_color: 默认字体颜色
+        :param position_x: X 位置 (0.0-1.0)
+        :param position_y: Y 位置 (0.0-1.0)
+        :param time_offset: 整体时间偏移(秒)
+        :return: 是否成功
+        """
+        if not file_path and not content:
+            raise ValueError("必须提供 file_path 或 content")
+        
+        try:
+            if file_path:
+                cues = iter_subtitles(file_path, subtitle_format, is_path=True)
+            else:
+                cues = iter_subtitles(content, subtitle_format)
+            count = self.add_subtitles(cues, font_size, font_color, position_x, position_y, time_offset)
+            logger.info(f"已导入字幕: {count} 条")
+            return count > 0
+        except Exception as e:
+            logger.error(f"导入字幕失败: {e}")
+            return False
+    
+    def add_subtitles(self, cues: Iterable[SubtitleCue], font_size: int = 48, font_color: str = "#FFFFFF",
+                      position_x: float = 0.5, position_y: float = 0.9, time_offset: float = 0.0,
+                      skip_empty: bool = True) -> int:
+        """
+        一次性添加多条字幕: 所有文本素材与片段在一次遍历中生成, 按给定顺序一次追加到文本轨道末尾 (与 add_text 一致)
+        
+        :param cues: 字幕列表 (可为生成器)
+        :param font_size: 默认字体大小
+        :param font_color: 默认字体颜色
+        :param position_x: X 位置 (0.0-1.0)
+        :param position_y: Y 位置 (0.0-1.0)
+        :param time_offset: 整体时间偏移(秒)
+        :param skip_empty: 是否跳过时长不大于 0 的字幕
+        :return: 添加的字幕数量
+        """
+        offset_us = int(time_offset * 1000000)
+        default_style = (font_size, font_color, position_x, position_y)
+        # 同一个样式对象只解析一次: id(样式) -> (字体大小, 字体颜色, X 位置, Y 位置)
+        styles = {}
+        
+        segments = []
+        for cue in cues:
+            duration_us = cue.end - cue.start
+            if skip_empty and duration_us <= 0:
+                continue
+            style = default_style
+            if cue.style:
+                style = styles.get(id(cue.style))
+                if style is None:
+                    style = styles[id(cue.style)] = (
+                        cue.style.get("font_size", font_size),
+                        cue.style.get("font_color", font_color),
+                        cue.style.get("position_x", position_x),
+                        cue.style.get("position_y", position_y),
+                    )
+            segments.append(self._build_text_segment(cue.text, cue.start + offset_us, duration_us, *style))
+        
+        if not segments:
+            return 0
+        
+        text_track = self._text_track()
+        self.index.set_segments(text_track, list(text_track.get("segments") or []) + segments)
+        return len(segments)
+    
+    def _text_track(self) -> Dict:
+        """查找或创建文本轨道"""
+        text_track = self.index.first_track("text")
+        if not text_track:
+            text_track = self.index.add_track({
+                "attribute": 0,
+                "flag": 0,
+                "id": self._generate_id(),
+                "segments": [],
+                "type": "text"
+            })
+        return text_track
+    
+    def _build_text_segment(self, text: str, start_us: int, duration_us: int, font_size: int,
+                            font_color: str, position_x: float, position_y: float) -> Dict:
+        """
+        添加文本素材 (materials.texts) 并生成引用它的文本片段 (不写入轨道)
+        
+        :param text: 文本内容
+        :param start_us: 开始时间(微秒)
+        :param duration_us: 持续时长(微秒)
+        :param font_size: 字体大小
+        :param font_color: 字体颜色
+        :param position_x: X 位置 (0.0-1.0)
+        :param position_y: Y 位置 (0.0-1.0)
+        :return: 文本片段
+        """
+        text_id = self._generate_id()
+        self.index.add_material("texts", {
+            "id": text_id,
+            "type": "text",
+            "content": text,
+            "font_size": font_size,
+            "font_color": font_color,
+        })
+        return {
+            "id": self._generate_id(),
+            "material_id": text_id,
+            "target_timerange": {"start": start_us, "duration": duration_us},
+            "source_timerange": {"start": 0, "duration": duration_us},
+            "clip": {
+                "alpha": 1.0,
+                "transform": {"x": position_x, "y": position_y},
+                "scale": {"x": 1.0, "y": 1.0}
+            },
+            "visible": True,
+        }
+    
     def _add_transition_between_segments(self, from_segment: Dict, to_segment: Dict, 
                                         transition_id: str, duration_us: int):
         """在两个片段之间添加转场"""
@@ -446,45 +674,47 @@ class DraftEditor:
         try:
             split_time_us = int(split_time * 1000000)
             
-            for track in self.tracks:
-                for i, segment in enumerate(track.get("segments", [])):
-                    if segment.get("id") == segment_id:
-                        # 获取原片段的时间范围
-                        source_range = segment.get("source_timerange", {})
-                        target_range = segment.get("target_timerange", {})
-                        
-                        source_start = source_range.get("start", 0)
-                        source_duration = source_range.get("duration", 0)
-                        target_start = target_range.get("start", 0)
-                        target_duration = target_range.get("duration", 0)
-                        
-                        # 检查分割点是否有效
-                        if split_time_us <= 0 or split_time_us >= target_duration:
-                            logger.error(f"分割时间点无效: {split_time}秒")
-                            return False
-                        
-                        # 创建第二个片段
-                        new_segment = copy.deepcopy(segment)
-                        new_segment["id"] = self._generate_id()
-                        
-                        # 调整第一个片段的时间范围
-                        segment["source_timerange"]["duration"] = split_time_us
-                        segment["target_timerange"]["duration"] = split_time_us
-                        
-                        # 调整第二个片段的时间范围
-                        new_segment["source_timerange"]["start"] = source_start + split_time_us
-                        new_segment["source_timerange"]["duration"] = source_duration - split_time_us
-                        new_segment["target_timerange"]["start"] = target_start + split_time_us
-                        new_segment["target_timerange"]["duration"] = target_duration - split_time_us
-                        
-                        # 插入新片段
-                        track["segments"].insert(i + 1, new_segment)
-                        
-                        logger.info(f"已分割片段: {segment_id} 在 {split_time}秒")
-                        return True
-            
-            logger.error(f"未找到片段: {segment_id}")
-            return False
+            found = self.index.locate(segment_id)
+            if not found:
+                logger.error(f"未找到片段: {segment_id}")
+                return False
+            
+            track, i = found
+            segment = track["segments"][i]
+            
+            # 获取原片段的时间范围
+            source_range = segment.get("source_timerange", {})
+            target_range = segment.get("target_timerange", {})
+            
+            source_start = source_range.get("start", 0)
+            source_duration = source_range.get("duration", 0)
+            target_start = target_range.get("start", 0)
+            target_duration = target_range.get("duration", 0)
+            
+            # 检查分割点是否有效
+            if split_time_us <= 0 or split_time_us >= target_duration:
+                logger.error(f"分割时间点无效: {split_time}秒")
+                return False
+            
+            # 创建第二个片段
+            new_segment = clone_segments([segment])[0]
+            new_segment["id"] = self._generate_id()
+            
+            # 调整第一个片段的时间范围
+            segment["source_timerange"]["duration"] = split_time_us
+            segment["target_timerange"]["duration"] = split_time_us
+            
+            # 调整第二个片段的时间范围
+            new_segment["source_timerange"]["start"] = source_start + split_time_us
+            new_segment["source_timerange"]["duration"] = source_duration - split_time_us
+            new_segment["target_timerange"]["start"] = target_start + split_time_us
+            new_segment["target_timerange"]["duration"] = target_duration - split_time_us
+            
+            # 插入新片段
+            self.index.insert_segment(track, i + 1, new_segment)
+            
+            logger.info(f"已分割片段: {segment_id} 在 {split_time}秒")
+            return True
             
         except Exception as e:
             logger.error(f"分割片段失败: {e}")
@@ -503,30 +733,29 @@ class DraftEditor:
             start_time_us = int(start_time * 1000000)
             end_time_us = int(end_time * 1000000)
             
-            for track in self.tracks:
-                for segment in track.get("segments", []):
-                    if segment.get("id") == segment_id:
-                        source_range = segment.get("source_timerange", {})
-                        target_range = segment.get("target_timerange", {})
-                        
-                        source_start = source_range.get("start", 0)
-                        target_start = target_range.get("start", 0)
-                        
-                        new_duration = end_time_us - start_time_us
-                        if new_duration <= 0:
-                            logger.error(f"裁剪时间范围无效")
-                            return False
-                        
-                        # 更新时间范围
-                        segment["source_timerange"]["start"] = source_start + start_time_us
-                        segment["source_timerange"]["duration"] = new_duration
-                        segment["target_timerange"]["duration"] = new_duration
-                        
-                        logger.info(f"已裁剪片段: {segment_id}")
-                        return True
-            
-            logger.error(f"未找到片段: {segment_id}")
-            return False
+            segment = self.index.segment(segment_id)
+            if not segment:
+                logger.error(f"未找到片段: {segment_id}")
+                return False
+            
+            source_range = segment.get("source_timerange", {})
+            target_range = segment.get("target_timerange", {})
+            
+            source_start = source_range.get("start", 0)
+            target_start = target_range.get("start", 0)
+            
+            new_duration = end_time_us - start_time_us
+            if new_duration <= 0:
+                logger.error(f"裁剪时间范围无效")
+                return False
+            
+            # 更新时间范围
+            segment["source_timerange"]["start"] = source_start + start_time_us
+            segment["source_timerange"]["duration"] = new_duration
+            segment["target_timerange"]["duration"] = new_duration
+            
+            logger.info(f"已裁剪片段: {segment_id}")
+            return True
             
         except Exception as e:
             logger.error(f"裁剪片段失败: {e}")
@@ -562,6 +791,20 @@ class DraftEditor:
         """
         return self._adjust_color_property(segment_id, "saturation", value)
     
+    def adjust_color(self, segment_id: str, adjustments: Dict[str, float]) -> bool:
+        """
+        批量调整片段颜色属性
+        
+        :param segment_id: 片段 ID
+        :param adjustments: 调整参数 {"brightness": 0.5, "contrast": 0.3, "saturation": -0.2}
+        :return: 是否全部成功
+        """
+        success = True
+        for property_name in ("brightness", "contrast", "saturation"):
+            if property_name in adjustments:
+                success = self._adjust_color_property(segment_id, property_name, adjustments[property_name]) and success
+        return success
+    
     def _adjust_color_property(self, segment_id: str, property_name: str, value: float) -> bool:
         """
         调整颜色属性
@@ -574,21 +817,20 @@ class DraftEditor:
         try:
             value = max(-1.0, min(1.0, value))
             
-            for track in self.tracks:
-                for segment in track.get("segments", []):
-                    if segment.get("id") == segment_id:
-                        # 创建或更新颜色调整属性
-                        if "color_adjust" not in segment:
-                            segment["color_adjust"] = {}
-                        
-                        segment["color_adjust"][property_name] = value
-                        segment["enable_adjust"] = True
-                        
-                        logger.info(f"已调整{property_name}: {segment_id} = {value}")
-                        return True
-            
-            logger.error(f"未找到片段: {segment_id}")
-            return False
+            segment = self.index.segment(segment_id)
+            if not segment:
+                logger.error(f"未找到片段: {segment_id}")
+                return False
+            
+            # 创建或更新颜色调整属性
+            if "color_adjust" not in segment:
+                segment["color_adjust"] = {}
+            
+            segment["color_adjust"][property_name] = value
+            segment["enable_adjust"] = True
+            
+            logger.info(f"已调整{property_name}: {segment_id} = {value}")
+            return True
             
         except Exception as e:
             logger.error(f"调整{property_name}失败: {e}")
@@ -610,65 +852,12 @@ class DraftEditor:
         :return: 是否成功
         """
         try:
-            text_id = self._generate_id()
-            start_time_us = int(start_time * 1000000)
-            duration_us = int(duration * 1000000)
-            
-            # 添加到 materials.texts
-            if "texts" not in self.materials:
-                self.materials["texts"] = []
-            
-            text_material = {
-                "id": text_id,
-                "type": "text",
-                "content": text,
-                "font_size": font_size,
-                "font_color": font_color,
-            }
-            self.materials["texts"].append(text_material)
-            
-            # 查找或创建文本轨道
-            text_track = None
-            for track in self.tracks:
-                if track.get("type") == "text":
-                    text_track = track
-                    break
-            
-            if not text_track:
-                text_track = {
-                    "attribute": 0,
-                    "flag": 0,
-                    "id": self._generate_id(),
-                    "segments": [],
-                    "type": "text"
-                }
-                self.tracks.append(text_track)
-            
-            # 创建文本片段
-            segment_id = self._generate_id()
-            segment = {
-                "id": segment_id,
-                "material_id": text_id,
-                "target_timerange": {
-                    "start": start_time_us,
-                    "duration": duration_us
-                },
-                "source_timerange": {
-                    "start": 0,
-                    "duration": duration_us
-                },
-                "clip": {
-                    "alpha": 1.0,
-                    "transform": {
-                        "x": position_x,
-                        "y": position_y
-                    },
-                    "scale": {"x": 1.0, "y": 1.0}
-                },
-                "visible": True,
-            }
-            
-            text_track["segments"].append(segment)
+            segment = self._build_text_segment(
+                text, int(start_time * 1000000), int(duration * 1000000),
+                font_size, font_color, position_x, position_y
+            )
+            text_track = self._text_track()
+            self.index.append_segment(text_track, segment)
             logger.info(f"已添加文本: {text}")
             return True
             
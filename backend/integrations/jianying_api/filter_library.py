@@ -167,17 +167,18 @@ class FilterLibrary:
         return filters
     
     @classmethod
-    def get_random_filter(cls, category: Optional[FilterCategory] = None) -> Optional[str]:
+    def get_random_filter(cls, category: Optional[FilterCategory] = None, rng=None) -> Optional[str]:
         """
         获取随机滤镜名称
         
         :param category: 滤镜分类过滤
+        :param rng: 随机数生成器 (random.Random), 为 None 则使用全局 random
         :return: 随机滤镜名称
         """
         import random
         filters = cls.list_filters(category)
         if filters:
-            return random.choice(filters)["name"]
+            return (rng or random).choice(filters)["name"]
         return None
 
 
@@ -0,0 +1,239 @@
+"""
+媒体信息探测
+
+NOTE: 素材的时长/分辨率/帧率原本没有来源，上传时不填写，DraftEditor.add_audio 固定写入 10 秒
+1. ffprobe -show_format -show_streams 输出 JSON，只取容器信息与第一条视频流（跳过封面图）/音频流
+2. 结果写入 analysis_cache（键为内容哈希），同一素材被复制、改名或多次引用都不会重复探测
+3. ffprobe 是子进程，探测在有界线程池中执行（线程只负责等待），probe_many 对路径去重后并行探测
+"""
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+from typing import Any, Dict, Iterable, Optional
+
+from loguru import logger
+
+from backend.common.analysis_cache import analysis_cache
+from backend.core.conf import app_config
+from backend.integrations.jianying_api.audio_decoder import ffmpeg_binary
+
+# 探测结果版本，解析字段变化时更换
+PROBE_ANALYZER = "probe:1"
+
+
+def ffprobe_binary() -> Optional[str]:
+    """
+    ffprobe 可执行文件路径
+
+    :return: 配置 media_probe.ffprobe_path、ffmpeg 同目录下或 PATH 中的 ffprobe，不存在时返回 None
+    """
+    configured = app_config.get('media_probe.ffprobe_path')
+    if configured:
+        return configured
+    ffmpeg = ffmpeg_binary()
+    if ffmpeg:
+        sibling = os.path.join(os.path.dirname(ffmpeg), "ffprobe" + os.path.splitext(ffmpeg)[1])
+        if os.path.isfile(sibling):
+            return sibling
+    return shutil.which("ffprobe")
+
+
+def _number(value: Any, kind: type = float) -> Optional[Any]:
+    """ffprobe 的数值字段（字符串）-> 数值，缺失或为 N/A 时返回 None"""
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _frame_rate(stream: Dict) -> Optional[float]:
+    """帧率: 优先 avg_frame_rate（可变帧率时更接近实际），其次 r_frame_rate"""
+    for key in ("avg_frame_rate", "r_frame_rate"):
+        try:
+            rate = Fraction(stream.get(key) or "")
+        except (ValueError, ZeroDivisionError):
+            continue
+        if rate > 0:
+            return round(float(rate), 3)
+    return None
+
+
+def _rotation(stream: Dict) -> int:
+    """视频旋转角度（手机竖拍视频存储为横向画面 + 旋转信息）"""
+    for side_data in stream.get("side_data_list") or []:
+        if "rotation" in side_data:
+            return int(_number(side_data["rotation"]) or 0)
+    return int(_number((stream.get("tags") or {}).get("rotate")) or 0)
+
+
+def parse_probe(data: Dict) -> Dict[str, Any]:
+    """
+    解析 ffprobe JSON 输出
+
+    :param data: ffprobe -print_format json -show_format -show_streams 的输出
+    :return: {"duration": 秒, "format", "bit_rate", "has_video", "has_audio",
+              "width", "height", "fps", "video_codec", "audio_codec", "sample_rate", "channels"}，
+             没有对应流的字段为 None；width/height 为旋转后的显示尺寸
+    """
+    streams = data.get("streams") or []
+    container = data.get("format") or {}
+    video = next(
+        (
+            stream for stream in streams
+            if stream.get("codec_type") == "video" and not (stream.get("disposition") or {}).get("attached_pic")
+        ),
+        None
+    )
+    audio = next((stream for stream in streams if stream.get("codec_type") == "audio"), None)
+
+    duration = _number(container.get("duration"))
+    if duration is None:
+        stream_durations = [_number(stream.get("duration")) for stream in (video, audio) if stream]
+        duration = max((value for value in stream_durations if value is not None), default=None)
+
+    width = height = None
+    if video:
+        width, height = _number(video.get("width"), int), _number(video.get("height"), int)
+        if abs(_rotation(video)) % 180 == 90:
+            width, height = height, width
+
+    return {
+        "duration": round(duration, 6) if duration is not None else None,
+        "format": container.get("format_name"),
+        "bit_rate": _number(container.get("bit_rate"), int),
+        "has_video": video is not None,
+        "has_audio": audio is not None,
+        "width": width,
+        "height": height,
+        "fps": _frame_rate(video) if video else None,
+        "video_codec": video.get("codec_name") if video else None,
+        "audio_codec": audio.get("codec_name") if audio else None,
+        "sample_rate": _number(audio.get("sample_rate"), int) if audio else None,
+        "channels": _number(audio.get("channels"), int) if audio else None,
+    }
+
+
+def run_ffprobe(media_path: str, timeout: float = 30.0) -> Dict[str, Any]:
+    """
+    运行 ffprobe（不经过缓存）
+
+    :param media_path: 媒体文件路径
+    :param timeout: 超时时间（秒）
+    :return: 媒体信息，见 parse_probe
+    """
+    binary = ffprobe_binary()
+    if not binary:
+        raise RuntimeError("未找到 ffprobe, 请安装 ffmpeg 或配置 media_probe.ffprobe_path")
+
+    completed = subprocess.run(
+        [binary, "-v", "error", "-print_format", "json", "-show_format", "-show_streams", media_path],
+        stdin=subprocess.DEVNULL, capture_output=True, timeout=timeout
+    )
+    if completed.returncode != 0:
+        error = completed.stderr.decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"ffprobe 执行失败: {error or completed.returncode}")
+    return parse_probe(json.loads(completed.stdout))
+
+
+def duration_us(info: Optional[Dict[str, Any]]) -> Optional[int]:
+    """
+    媒体时长（微秒，剪映草稿的时间单位）
+
+    :param info: 媒体信息，None 表示探测失败
+    :return: 时长，未知时返回 None
+    """
+    if not info or not info.get("duration"):
+        return None
+    return int(round(info["duration"] * 1000000))
+
+
+class MediaProbe:
+    """带缓存的媒体信息探测（有界线程池）"""
+
+    def __init__(self, workers: Optional[int] = None, timeout: Optional[float] = None):
+        """
+        :param workers: 同时运行的 ffprobe 进程数
+        :param timeout: 单个文件的超时时间（秒）
+        """
+        self.workers = workers or app_config.get('media_probe.workers', 4)
+        self.timeout = timeout or app_config.get('media_probe.timeout', 30)
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        """探测线程池（按需创建）"""
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="media-probe")
+        return self._pool
+
+    def probe(self, media_path: str) -> Optional[Dict[str, Any]]:
+        """
+        探测单个文件（阻塞，命中缓存时不运行 ffprobe）
+
+        :param media_path: 媒体文件路径
+        :return: 媒体信息，失败时返回 None（失败不缓存）
+        """
+        try:
+            return analysis_cache.get_or_compute(
+                media_path, PROBE_ANALYZER, {}, lambda: run_ffprobe(media_path, self.timeout)
+            )
+        except (OSError, RuntimeError, ValueError, subprocess.TimeoutExpired) as e:
+            logger.warning(f"探测媒体信息失败: {media_path}, {e}")
+            return None
+
+    def cached(self, media_path: str) -> Optional[Dict[str, Any]]:
+        """
+        只读取已缓存的探测结果（不运行 ffprobe，可在持有草稿锁时调用）
+
+        :param media_path: 媒体文件路径
+        :return: 媒体信息，未探测过或文件不存在时返回 None
+        """
+        try:
+            return analysis_cache.get(media_path, PROBE_ANALYZER, {})
+        except OSError:
+            return None
+
+    def probe_many(self, media_paths: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        批量探测（阻塞，路径去重后并行）
+
+        :param media_paths: 媒体文件路径
+        :return: {路径: 媒体信息或 None}
+        """
+        unique = list(dict.fromkeys(media_paths))
+        return dict(zip(unique, self.pool.map(self.probe, unique)))
+
+    async def aprobe_many(self, media_paths: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        批量探测（异步，不阻塞事件循环）
+
+        :param media_paths: 媒体文件路径
+        :return: {路径: 媒体信息或 None}
+        """
+        unique = list(dict.fromkeys(media_paths))
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*(loop.run_in_executor(self.pool, self.probe, path) for path in unique))
+        return dict(zip(unique, results))
+
+    async def aprobe(self, media_path: str) -> Optional[Dict[str, Any]]:
+        """
+        探测单个文件（异步）
+
+        :param media_path: 媒体文件路径
+        :return: 媒体信息，失败时返回 None
+        """
+        return (await self.aprobe_many([media_path]))[media_path]
+
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭线程池"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+
+# 全局媒体探测实例
+media_probe = MediaProbe()
@@ -0,0 +1,195 @@
+"""
+镜头切换检测
+
+NOTE: SmartEditor 只分析音频，没有声音的空镜头（B-roll）无法自动剪切
+1. ffmpeg 按低帧率（默认 4fps）、低分辨率（默认 64x36）输出灰度原始帧，按块从管道读取，
+   内存占用只取决于块大小，与视频时长无关
+2. 每块内向量化计算相邻帧的差异（块之间保留上一帧）:
+   - 分块 SAD: 画面分为 grid x grid 个区域，区域平均绝对差超过 block_threshold 的区域占比
+   - 直方图差: 灰度直方图 L1 距离（归一化到 0-1）
+3. 两项都超过阈值才判定为切换（镜头平移时区域变化大但直方图接近）；
+   与前两帧比较直方图，变化后立即恢复原画面的视为闪光而不是切换；相邻切换点间隔不小于 min_scene_duration
+"""
+from typing import Iterator, List, Optional
+
+from backend.core.conf import app_config
+from backend.integrations.jianying_api.audio_decoder import iter_ffmpeg_blocks
+from backend.integrations.jianying_api.audio_envelope import np
+
+# 灰度右移 3 位: 256 级 -> 32 个直方图分桶
+HISTOGRAM_SHIFT = 3
+HISTOGRAM_BINS = 256 >> HISTOGRAM_SHIFT
+
+
+def iter_frame_blocks(
+    media_path: str,
+    width: int = 64,
+    height: int = 36,
+    fps: float = 4.0,
+    block_frames: int = 256
+) -> Iterator["np.ndarray"]:
+    """
+    流式解码为低分辨率灰度帧
+
+    NOTE: 产出的数组引用同一个缓冲区，只在下一次迭代前有效
+
+    :param media_path: 视频文件路径
+    :param width: 输出宽度
+    :param height: 输出高度
+    :param fps: 输出帧率
+    :param block_frames: 每块帧数
+    :return: uint8 帧块生成器，形状 (帧数, height, width)
+    """
+    if np is None:
+        raise ImportError("需要安装 numpy: pip install numpy")
+
+    arguments = [
+        "-i", media_path, "-an", "-vf", f"fps={fps},scale={width}:{height}:flags=area",
+        "-pix_fmt", "gray", "-f", "rawvideo", "-",
+    ]
+    frame_bytes = width * height
+    for buffer, filled in iter_ffmpeg_blocks(arguments, frame_bytes * block_frames):
+        # 不完整的尾帧丢弃
+        count = filled // frame_bytes
+        if count:
+            yield np.frombuffer(buffer, dtype=np.uint8, count=count * frame_bytes).reshape(count, height, width)
+
+
+class SceneScorer:
+    """按块增量计算相邻帧差异"""
+
+    def __init__(self, grid: int = 4, block_threshold: float = 0.12):
+        """
+        :param grid: 每个方向的区域数
+        :param block_threshold: 区域平均绝对差（归一化到 0-1）超过该值视为变化
+        """
+        self.grid = grid
+        self.block_threshold = block_threshold * 255
+        self._previous: Optional["np.ndarray"] = None
+        self._changed: List["np.ndarray"] = []
+        # 每帧直方图（每帧 HISTOGRAM_BINS 个值，结束时统一计算相隔 1 帧与 2 帧的差异）
+        self._frame_histograms: List["np.ndarray"] = []
+
+    def _regions(self, frames: "np.ndarray") -> "np.ndarray":
+        """裁掉不能整除的边缘后按 grid x grid 划分，返回形状 (帧数, grid, 区域高, grid, 区域宽)"""
+        count, height, width = frames.shape
+        region_height, region_width = max(1, height // self.grid), max(1, width // self.grid)
+        rows, cols = height // region_height, width // region_width
+        cropped = frames[:, :rows * region_height, :cols * region_width]
+        return cropped.reshape(count, rows, region_height, cols, region_width)
+
+    @staticmethod
+    def _histograms(frames: "np.ndarray") -> "np.ndarray":
+        """每帧的归一化灰度直方图，形状 (帧数, HISTOGRAM_BINS)"""
+        count = len(frames)
+        bins = (frames.reshape(count, -1) >> HISTOGRAM_SHIFT).astype(np.int64)
+        bins += np.arange(count)[:, None] * HISTOGRAM_BINS
+        counts = np.bincount(bins.ravel(), minlength=count * HISTOGRAM_BINS).reshape(count, HISTOGRAM_BINS)
+        return counts / frames[0].size
+
+    def feed(self, frames: "np.ndarray") -> None:
+        """
+        送入一块帧（调用返回后即可复用该缓冲区）
+
+        :param frames: uint8 帧，形状 (帧数, 高, 宽)
+        """
+        if not len(frames):
+            return
+        self._frame_histograms.append(self._histograms(frames))
+        if self._previous is not None:
+            frames = np.concatenate((self._previous[None], frames))
+        else:
+            self._changed.append(np.zeros(1))
+        self._previous = frames[-1].copy()
+        if len(frames) < 2:
+            return
+
+        # 分块 SAD: 各区域平均绝对差超过阈值的占比
+        regions = self._regions(frames).astype(np.int16)
+        region_sad = np.abs(np.diff(regions, axis=0)).mean(axis=(2, 4))
+        self._changed.append((region_sad > self.block_threshold).mean(axis=(1, 2)))
+
+    def finish(self) -> "np.ndarray":
+        """
+        :return: 每帧与之前帧的差异，形状 (帧数, 3)，
+                 列为 (与上一帧的变化区域占比, 与上一帧的直方图差, 与前两帧的直方图差)，没有对应帧时为 0
+        """
+        if not self._frame_histograms:
+            return np.zeros((0, 3))
+        histograms = np.concatenate(self._frame_histograms)
+        count = len(histograms)
+        lag1 = np.zeros(count)
+        lag2 = np.zeros(count)
+        lag1[1:] = np.abs(histograms[1:] - histograms[:-1]).sum(axis=1) / 2
+        lag2[2:] = np.abs(histograms[2:] - histograms[:-2]).sum(axis=1) / 2
+        return np.column_stack((np.concatenate(self._changed), lag1, lag2))
+
+
+def scene_cuts(
+    scores: "np.ndarray",
+    fps: float,
+    threshold: float = 0.3,
+    region_ratio: float = 0.5,
+    min_scene_duration: float = 1.0
+) -> List[float]:
+    """
+    由帧差异得到切换点
+
+    :param scores: SceneScorer.finish 的结果
+    :param fps: 帧率
+    :param threshold: 直方图差阈值（0-1）
+    :param region_ratio: 变化区域占比阈值（0-1）
+    :param min_scene_duration: 最短镜头时长（秒），距上一个切换点更近的切换点忽略
+    :return: 切换点时间列表（秒）
+    """
+    changed, histogram, histogram_lag2 = scores.T
+    candidates = (changed >= region_ratio) & (histogram >= threshold)
+    # 闪光: 下一帧恢复为变化前的画面（第 i+1 帧与第 i-1 帧接近），或本帧恢复为前两帧的画面
+    returned = np.zeros(len(scores), dtype=bool)
+    returned[2:] = histogram_lag2[2:] < threshold
+    flash = returned.copy()
+    flash[:-1] |= returned[1:]
+    candidates = np.flatnonzero(candidates & ~flash)
+    cuts: List[float] = []
+    last = 0.0
+    for frame in candidates.tolist():
+        time = frame / fps
+        if time - last >= min_scene_duration - 1e-9:
+            cuts.append(round(time, 6))
+            last = time
+    return cuts
+
+
+def frame_params() -> dict:
+    """影响检测结果的采样参数（作为分析缓存键的一部分）"""
+    return {
+        "width": app_config.get('video_analysis.width', 64),
+        "height": app_config.get('video_analysis.height', 36),
+        "fps": app_config.get('video_analysis.fps', 4.0),
+        "grid": app_config.get('video_analysis.grid', 4),
+    }
+
+
+def detect_scene_cuts(
+    media_path: str,
+    threshold: float = 0.3,
+    region_ratio: float = 0.5,
+    min_scene_duration: float = 1.0
+) -> List[float]:
+    """
+    流式解码视频并检测镜头切换
+
+    :param media_path: 视频文件路径
+    :param threshold: 直方图差阈值（0-1）
+    :param region_ratio: 变化区域占比阈值（0-1）
+    :param min_scene_duration: 最短镜头时长（秒）
+    :return: 切换点时间列表（秒，素材时间）
+    """
+    params = frame_params()
+    scorer = SceneScorer(params["grid"])
+    for frames in iter_frame_blocks(
+        media_path, params["width"], params["height"], params["fps"],
+        app_config.get('video_analysis.block_frames', 256)
+    ):
+        scorer.feed(frames)
+    return scene_cuts(scorer.finish(), params["fps"], threshold, region_ratio, min_scene_duration)
@@ -5,17 +5,127 @@
 1. 静音片段检测与删除
 2. 智能高光片段识别
 3. 音频分析工具
+4. 镜头切换检测
+5. 音乐节拍检测与卡点
 """
 
 import os
 import json
+import threading
+from collections import OrderedDict
 from typing import List, Dict, Tuple, Optional
 from loguru import logger
 
+from backend.common.analysis_cache import analysis_cache
+from backend.common.draft_index import DraftIndex
+from backend.common.draft_ripple import RippleEngine, merge_ranges, subtract_ranges
+from backend.common.draft_timeline import TrackTimeline, np
+from backend.core.conf import app_config
+from backend.integrations.jianying_api.audio_decoder import decode_envelope, ffmpeg_binary
+from backend.integrations.jianying_api.audio_envelope import AudioEnvelope
+from backend.integrations.jianying_api.beat_detector import SpectralFluxBuilder, beat_analysis, decode_onsets
+from backend.integrations.jianying_api.scene_detector import detect_scene_cuts, frame_params
+
+
+# 轨道类型 -> 素材分类
+MEDIA_CATEGORIES = {"video": "videos", "audio": "audios"}
+
+# 删除静音的检测模式: 固定电平阈值 / 语音活动检测
+SILENCE_MODES = ("threshold", "vad")
+
 
 class AudioAnalyzer:
-    """音频分析器"""
+    """
+    音频分析器
+
+    NOTE: 每个文件只解码一次并计算包络 (AudioEnvelope), 静音/高光/响度检测都基于包络向量化计算;
+    优先通过 ffmpeg 管道流式解码 (单声道、降采样), 未找到 ffmpeg 时回退到 pydub;
+    最近使用的包络保留在进程内, 同一文件的多种检测不重复解码
+    分析结果按 (媒体内容哈希, 分析器, 参数) 缓存在磁盘上, 见 analysis_cache
+    分析算法变化时需要更新分析器名称中的版本号, 使旧结果失效
+    """
+
+    SILENCE_ANALYZER = "silence:2"
+    HIGHLIGHTS_ANALYZER = "highlights:3"
+    LOUDNESS_ANALYZER = "loudness:1"
+    SPEECH_ANALYZER = "vad:1"
+    BEATS_ANALYZER = "beats:1"
+
+    # 进程内保留的包络数量
+    ENVELOPE_CACHE_SIZE = 4
+    _envelopes: "OrderedDict[tuple, AudioEnvelope]" = OrderedDict()
+    _envelopes_lock = threading.Lock()
+
+    @staticmethod
+    def hop() -> float:
+        """包络帧长 (秒)"""
+        return app_config.get('audio_analysis.hop', 0.01)
+
+    @classmethod
+    def envelope(cls, audio_path: str, hop: Optional[float] = None) -> AudioEnvelope:
+        """
+        解码音频并计算包络 (同一文件未变化时复用)
+        
+        :param audio_path: 音频/视频文件路径
+        :param hop: 帧长(秒), 为 None 则使用配置 audio_analysis.hop
+        :return: 音频包络
+        """
+        hop = hop or cls.hop()
+        stat = os.stat(audio_path)
+        key = (os.path.abspath(audio_path), stat.st_mtime_ns, stat.st_size, hop)
+        with cls._envelopes_lock:
+            envelope = cls._envelopes.get(key)
+            if envelope is not None:
+                cls._envelopes.move_to_end(key)
+                return envelope
+
+        if ffmpeg_binary():
+            # ffmpeg 管道流式解码, 内存占用与媒体时长无关
+            envelope = decode_envelope(audio_path, hop)
+        else:
+            envelope = cls._decode_with_pydub(audio_path, hop)
+
+        with cls._envelopes_lock:
+            cls._envelopes[key] = envelope
+            while len(cls._envelopes) > cls.ENVELOPE_CACHE_SIZE:
+                cls._envelopes.popitem(last=False)
+        return envelope
     
+    @staticmethod
+    def _pydub_samples(audio_path: str) -> tuple:
+        """
+        未找到 ffmpeg 时的回退: pydub 整体解码 (WAV 等不需要 ffmpeg 的格式)
+        
+        :return: (交错采样, 采样率, 声道数, 满刻度幅度), 满刻度为 None 时按数据类型推断
+        """
+        from pydub import AudioSegment
+        import numpy as np
+
+        audio = AudioSegment.from_file(audio_path)
+        # 直接引用解码后的 PCM 缓冲区, 不再复制为 Python 数组
+        if audio.sample_width == 1:
+            # 8 位 PCM 为无符号整数
+            samples = np.frombuffer(audio.raw_data, dtype=np.uint8).astype(np.int16) - 128
+            full_scale = 128.0
+        else:
+            samples = np.frombuffer(audio.raw_data, dtype={2: np.int16, 4: np.int32}[audio.sample_width])
+            full_scale = None
+        return samples, audio.frame_rate, audio.channels, full_scale
+
+    @staticmethod
+    def _decode_with_pydub(audio_path: str, hop: float) -> AudioEnvelope:
+        """pydub 整体解码并计算包络"""
+        samples, sample_rate, channels, full_scale = AudioAnalyzer._pydub_samples(audio_path)
+        return AudioEnvelope.from_samples(samples, sample_rate, channels, hop, full_scale)
+
+    @staticmethod
+    def _decode_params() -> Dict[str, float]:
+        """影响包络的解码参数 (作为分析缓存键的一部分)"""
+        return {
+            "hop": AudioAnalyzer.hop(),
+            "sample_rate": app_config.get('audio_analysis.sample_rate', 16000) if ffmpeg_binary() else 0,
+        }
+
     @staticmethod
     def detect_silence(
         audio_path: str,
@@ -26,36 +136,28 @@ class AudioAnalyzer:
         检测音频中的静音片段
         
         :param audio_path: 音频文件路径
-        :param silence_threshold: 静音阈值 (dB)
+        :param silence_threshold: 静音阈值 (dBFS)
         :param min_silence_duration: 最小静音时长(秒)
         :return: 静音片段列表 [(start_time, end_time), ...]
         """
+        def compute() -> List[Tuple[float, float]]:
+            silence_ranges = AudioAnalyzer.envelope(audio_path).silence(silence_threshold, min_silence_duration)
+            logger.info(f"检测到 {len(silence_ranges)} 个静音片段")
+            return silence_ranges
+
         try:
-            # NOTE: 需要安装 pydub 和 ffmpeg
-            from pydub import AudioSegment
-            from pydub.silence import detect_silence as pydub_detect_silence
-            
-            # 加载音频
-            audio = AudioSegment.from_file(audio_path)
-            
-            # 检测静音片段 (返回毫秒)
-            silence_ranges = pydub_detect_silence(
-                audio,
-                min_silence_len=int(min_silence_duration * 1000),
-                silence_thresh=silence_threshold
+            params = {
+                "silence_threshold": silence_threshold,
+                "min_silence_duration": min_silence_duration,
+                **AudioAnalyzer._decode_params(),
+            }
+            silence_ranges = analysis_cache.get_or_compute(
+                audio_path, AudioAnalyzer.SILENCE_ANALYZER, params, compute
             )
-            
-            # 转换为秒
-            silence_ranges_sec = [
-                (start / 1000.0, end / 1000.0) 
-                for start, end in silence_ranges
-            ]
-            
-            logger.info(f"检测到 {len(silence_ranges_sec)} 个静音片段")
-            return silence_ranges_sec
+            return [tuple(silence_range) for silence_range in silence_ranges]
             
         except ImportError:
-            logger.error("需要安装 pydub: pip install pydub")
+            logger.error("需要安装 pydub 和 numpy: pip install pydub numpy")
             return []
         except Exception as e:
             logger.error(f"静音检测失败: {e}")
@@ -65,66 +167,54 @@ class AudioAnalyzer:
     def detect_highlights(
         audio_path: str,
         threshold_percentile: float = 80.0,
-        min_highlight_duration: float = 2.0
-    ) -> List[Tuple[float, float]]:
+        min_highlight_duration: float = 2.0,
+        window: float = 1.0,
+        hop: Optional[float] = None,
+        top_k: Optional[int] = None,
+        max_duration: Optional[float] = None
+    ) -> List[Tuple[float, ...]]:
         """
         检测音频中的高光片段(音量峰值)
         
+        NOTE: 指定 hop / top_k / max_duration 任一参数时使用滑动窗口模式 (AudioEnvelope.top_highlights),
+        返回得分最高的 K 个互不重叠片段 (总时长不超过 max_duration), 每个片段附带得分;
+        否则返回全部 window 窗口 RMS 不低于百分位阈值的片段
+        
         :param audio_path: 音频文件路径
         :param threshold_percentile: 音量阈值百分位 (0-100)
         :param min_highlight_duration: 最小高光时长(秒)
-        :return: 高光片段列表 [(start_time, end_time), ...]
+        :param window: 窗口长度(秒), 可小于 1 秒
+        :param hop: 滑动窗口步长(秒)
+        :param top_k: 最多返回的片段数
+        :param max_duration: 片段总时长上限(秒)
+        :return: 高光片段列表 [(start_time, end_time), ...], 滑动窗口模式为 [(start_time, end_time, score_dbfs), ...]
         """
-        try:
-            from pydub import AudioSegment
-            import numpy as np
-            
-            # 加载音频
-            audio = AudioSegment.from_file(audio_path)
-            
-            # 获取音频数据
-            samples = np.array(audio.get_array_of_samples())
-            
-            # 计算每秒的平均音量
-            sample_rate = audio.frame_rate
-            chunk_size = sample_rate  # 1秒
-            
-            volumes = []
-            for i in range(0, len(samples), chunk_size):
-                chunk = samples[i:i + chunk_size]
-                if len(chunk) > 0:
-                    volume = np.abs(chunk).mean()
-                    volumes.append(volume)
-            
-            # 计算阈值
-            threshold = np.percentile(volumes, threshold_percentile)
-            
-            # 查找高光片段
-            highlights = []
-            start_idx = None
-            
-            for i, volume in enumerate(volumes):
-                if volume >= threshold:
-                    if start_idx is None:
-                        start_idx = i
-                else:
-                    if start_idx is not None:
-                        duration = (i - start_idx)
-                        if duration >= min_highlight_duration:
-                            highlights.append((
-                                start_idx,
-                                i
-                            ))
-                        start_idx = None
-            
-            # 处理最后一个片段
-            if start_idx is not None:
-                duration = (len(volumes) - start_idx)
-                if duration >= min_highlight_duration:
-                    highlights.append((start_idx, len(volumes)))
-            
+        sliding = hop is not None or top_k is not None or max_duration is not None
+
+        def compute() -> List[Tuple[float, ...]]:
+            envelope = AudioAnalyzer.envelope(audio_path)
+            if sliding:
+                highlights = envelope.top_highlights(
+                    window, hop or window, top_k, max_duration, threshold_percentile, min_highlight_duration
+                )
+            else:
+                highlights = envelope.highlights(threshold_percentile, min_highlight_duration, window=window)
             logger.info(f"检测到 {len(highlights)} 个高光片段")
             return highlights
+
+        try:
+            params = {
+                "threshold_percentile": threshold_percentile,
+                "min_highlight_duration": min_highlight_duration,
+                "window": window,
+                **AudioAnalyzer._decode_params(),
+            }
+            if sliding:
+                params.update({"window_hop": hop or window, "top_k": top_k, "max_duration": max_duration})
+            highlights = analysis_cache.get_or_compute(
+                audio_path, AudioAnalyzer.HIGHLIGHTS_ANALYZER, params, compute
+            )
+            return [tuple(highlight) for highlight in highlights]
             
         except ImportError:
             logger.error("需要安装 pydub 和 numpy: pip install pydub numpy")
@@ -133,6 +223,242 @@ class AudioAnalyzer:
             logger.error(f"高光检测失败: {e}")
             return []
 
+    @staticmethod
+    def detect_speech(
+        audio_path: str,
+        min_silence_duration: float = 0.5,
+        margin_db: float = 12.0,
+        hangover: float = 0.3
+    ) -> Optional[List[Tuple[float, float]]]:
+        """
+        语音活动检测 (VAD): 短时能量 + 过零率, 自适应噪声底, 不需要按素材调整静音阈值
+        
+        :param audio_path: 音频文件路径
+        :param min_silence_duration: 最小静音时长(秒), 更短的停顿保留在语音内
+        :param margin_db: 语音高出噪声底的电平 (dB)
+        :param hangover: 语音结束后保留的拖尾时长(秒)
+        :return: 语音片段列表 [(start_time, end_time), ...], 失败时返回 None (空列表表示整段无语音)
+        """
+        def compute() -> List[Tuple[float, float]]:
+            speech_ranges = AudioAnalyzer.envelope(audio_path).speech(margin_db, min_silence_duration, hangover)
+            logger.info(f"检测到 {len(speech_ranges)} 个语音片段")
+            return speech_ranges
+
+        try:
+            params = {
+                "min_silence_duration": min_silence_duration,
+                "margin_db": margin_db,
+                "hangover": hangover,
+                **AudioAnalyzer._decode_params(),
+            }
+            speech_ranges = analysis_cache.get_or_compute(
+                audio_path, AudioAnalyzer.SPEECH_ANALYZER, params, compute
+            )
+            return [tuple(speech_range) for speech_range in speech_ranges]
+
+        except ImportError:
+            logger.error("需要安装 pydub 和 numpy: pip install pydub numpy")
+            return None
+        except Exception as e:
+            logger.error(f"语音检测失败: {e}")
+            return None
+
+    @staticmethod
+    def detect_beats(audio_path: str) -> Optional[Dict]:
+        """
+        检测音乐的节拍与起音 (分块 FFT 频谱通量)
+        
+        :param audio_path: 音频文件路径
+        :return: {"tempo": BPM, "beats": 节拍时间列表, "onsets": 起音时间列表} (秒), 失败时返回 None
+        """
+        def compute() -> Dict:
+            if ffmpeg_binary():
+                onset_envelope = decode_onsets(audio_path)
+            else:
+                samples, sample_rate, channels, full_scale = AudioAnalyzer._pydub_samples(audio_path)
+                builder = SpectralFluxBuilder(sample_rate, channels, full_scale=full_scale)
+                builder.feed(samples)
+                onset_envelope = builder.finish()
+            result = beat_analysis(onset_envelope)
+            logger.info(f"检测到 {len(result['beats'])} 个节拍, {result['tempo']} BPM")
+            return result
+
+        try:
+            params = {"sample_rate": AudioAnalyzer._decode_params()["sample_rate"]}
+            return analysis_cache.get_or_compute(audio_path, AudioAnalyzer.BEATS_ANALYZER, params, compute)
+        except ImportError:
+            logger.error("需要安装 pydub 和 numpy: pip install pydub numpy")
+            return None
+        except Exception as e:
+            logger.error(f"节拍检测失败: {e}")
+            return None
+
+    @staticmethod
+    def detect_loudness(audio_path: str) -> Optional[Dict[str, float]]:
+        """
+        测量音频整体响度
+        
+        :param audio_path: 音频文件路径
+        :return: {"rms_dbfs", "peak_dbfs", "silence_ratio"}, 失败时返回 None
+        """
+        try:
+            params = AudioAnalyzer._decode_params()
+            return analysis_cache.get_or_compute(
+                audio_path, AudioAnalyzer.LOUDNESS_ANALYZER, params,
+                lambda: AudioAnalyzer.envelope(audio_path).loudness()
+            )
+        except ImportError:
+            logger.error("需要安装 pydub 和 numpy: pip install pydub numpy")
+            return None
+        except Exception as e:
+            logger.error(f"响度测量失败: {e}")
+            return None
+
+
+class VideoAnalyzer:
+    """
+    视频分析器
+
+    NOTE: 低分辨率、低帧率灰度帧流式解码, 见 scene_detector;
+    结果按 (媒体内容哈希, 分析器, 参数) 缓存在磁盘上, 同一素材重复运行模板时不再解码
+    """
+
+    SCENES_ANALYZER = "scenes:1"
+
+    @staticmethod
+    def detect_scenes(
+        video_path: str,
+        threshold: float = 0.3,
+        region_ratio: float = 0.5,
+        min_scene_duration: float = 1.0
+    ) -> Optional[List[float]]:
+        """
+        检测视频中的镜头切换点
+        
+        :param video_path: 视频文件路径
+        :param threshold: 相邻帧灰度直方图差阈值 (0-1)
+        :param region_ratio: 相邻帧变化区域占比阈值 (0-1)
+        :param min_scene_duration: 最短镜头时长(秒)
+        :return: 切换点列表 (素材时间, 秒), 失败时返回 None
+        """
+        try:
+            params = {
+                "threshold": threshold,
+                "region_ratio": region_ratio,
+                "min_scene_duration": min_scene_duration,
+                **frame_params(),
+            }
+            return analysis_cache.get_or_compute(
+                video_path, VideoAnalyzer.SCENES_ANALYZER, params,
+                lambda: detect_scene_cuts(video_path, threshold, region_ratio, min_scene_duration)
+            )
+        except ImportError:
+            logger.error("需要安装 numpy: pip install numpy")
+            return None
+        except Exception as e:
+            logger.error(f"镜头切换检测失败: {e}")
+            return None
+
+
+def analyze_scenes(
+    media_paths: List[str],
+    threshold: float = 0.3,
+    region_ratio: float = 0.5,
+    min_scene_duration: float = 1.0
+) -> Dict[str, Optional[List[float]]]:
+    """
+    批量检测镜头切换点 (可在进程池中执行)
+    
+    :param media_paths: 视频文件路径列表
+    :param threshold: 直方图差阈值 (0-1)
+    :param region_ratio: 变化区域占比阈值 (0-1)
+    :param min_scene_duration: 最短镜头时长(秒)
+    :return: {路径: 切换点列表}, 检测失败的素材为 None
+    """
+    return {
+        path: VideoAnalyzer.detect_scenes(path, threshold, region_ratio, min_scene_duration)
+        for path in media_paths
+    }
+
+
+def analyze_silence(
+    media_paths: List[str],
+    silence_threshold: float = -40.0,
+    min_silence_duration: float = 0.5
+) -> Dict[str, List[Tuple[float, float]]]:
+    """
+    批量检测静音片段 (可在进程池中执行)
+    
+    :param media_paths: 媒体文件路径列表
+    :param silence_threshold: 静音阈值 (dB)
+    :param min_silence_duration: 最小静音时长(秒)
+    :return: {路径: 静音片段列表}
+    """
+    return {
+        path: AudioAnalyzer.detect_silence(path, silence_threshold, min_silence_duration)
+        for path in media_paths
+    }
+
+
+def analyze_speech(
+    media_paths: List[str],
+    min_silence_duration: float = 0.5,
+    margin_db: float = 12.0,
+    hangover: float = 0.3
+) -> Dict[str, Optional[List[Tuple[float, float]]]]:
+    """
+    批量检测语音片段 (可在进程池中执行)
+    
+    :param media_paths: 媒体文件路径列表
+    :param min_silence_duration: 最小静音时长(秒)
+    :param margin_db: 语音高出噪声底的电平 (dB)
+    :param hangover: 拖尾时长(秒)
+    :return: {路径: 语音片段列表}, 检测失败的素材为 None
+    """
+    return {
+        path: AudioAnalyzer.detect_speech(path, min_silence_duration, margin_db, hangover)
+        for path in media_paths
+    }
+
+
+def analyze_beats(media_paths: List[str]) -> Dict[str, Optional[Dict]]:
+    """
+    批量检测节拍 (可在进程池中执行)
+    
+    :param media_paths: 音频文件路径列表
+    :return: {路径: 节拍检测结果}, 检测失败的素材为 None
+    """
+    return {path: AudioAnalyzer.detect_beats(path) for path in media_paths}
+
+
+def analyze_highlights(
+    media_paths: List[str],
+    threshold_percentile: float = 80.0,
+    min_highlight_duration: float = 2.0,
+    window: float = 1.0,
+    hop: Optional[float] = None,
+    top_k: Optional[int] = None,
+    max_duration: Optional[float] = None
+) -> Dict[str, List[Tuple[float, ...]]]:
+    """
+    批量检测高光片段 (可在进程池中执行)
+    
+    :param media_paths: 媒体文件路径列表
+    :param threshold_percentile: 音量阈值百分位
+    :param min_highlight_duration: 最小高光时长(秒)
+    :param window: 窗口长度(秒)
+    :param hop: 滑动窗口步长(秒), 见 AudioAnalyzer.detect_highlights
+    :param top_k: 每个素材最多返回的片段数
+    :param max_duration: 每个素材的片段总时长上限(秒)
+    :return: {路径: 高光片段列表}
+    """
+    return {
+        path: AudioAnalyzer.detect_highlights(
+            path, threshold_percentile, min_highlight_duration, window, hop, top_k, max_duration
+        )
+        for path in media_paths
+    }
+
 
 class SmartEditor:
     """智能编辑器"""
@@ -140,121 +466,329 @@ class SmartEditor:
     def __init__(self):
         self.audio_analyzer = AudioAnalyzer()
     
+    @staticmethod
+    def collect_video_paths(draft_content: Dict) -> List[str]:
+        """
+        收集视频轨道引用的、存在于磁盘上的素材路径 (去重)
+        
+        :param draft_content: 草稿内容
+        :return: 素材路径列表
+        """
+        return SmartEditor.collect_media_paths(draft_content, "video")
+    
+    @staticmethod
+    def collect_media_paths(draft_content: Dict, track_type: str) -> List[str]:
+        """
+        收集指定类型轨道引用的、存在于磁盘上的素材路径 (去重)
+        
+        :param draft_content: 草稿内容
+        :param track_type: 轨道类型 "video" / "audio"
+        :return: 素材路径列表
+        """
+        materials = {
+            material.get("id"): material.get("path")
+            for material in draft_content.get("materials", {}).get(MEDIA_CATEGORIES[track_type], [])
+        }
+        paths = {}
+        for track in draft_content.get("tracks", []):
+            if track.get("type") != track_type:
+                continue
+            for segment in track.get("segments", []):
+                path = materials.get(segment.get("material_id"))
+                if path and path not in paths:
+                    paths[path] = os.path.exists(path)
+        return [path for path, exists in paths.items() if exists]
+    
+    @staticmethod
+    def _silence_timeline(
+        index: DraftIndex,
+        analysis: Dict[str, List[Tuple[float, float]]],
+        speech: bool = False
+    ) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+        """
+        把素材的静音区间映射到时间线
+        
+        NOTE: 每个素材的静音区间只排序合并一次 (微秒), 每个视频片段用二分查找取出与其素材区间相交的部分,
+        按片段速度换算为时间线时间
+        
+        :param index: 草稿索引
+        :param analysis: {路径: 静音片段列表 (秒)}, speech 为 True 时为语音片段列表
+        :param speech: analysis 是否为语音片段 (见 analyze_speech), 语音之外的部分视为静音
+        :return: (静音区间列表, 有声区间列表), 时间线时间 (微秒)
+        """
+        silences = {}
+        for path, ranges in analysis.items():
+            if speech and ranges is not None:
+                # 语音区间的补集 (到素材末尾之后); 检测失败 (None) 的素材整段保留
+                starts, ends = merge_ranges((int(start * 1000000), int(end * 1000000)) for start, end in ranges)
+                silences[path] = (np.concatenate(([0], ends)), np.concatenate((starts, [np.iinfo(np.int64).max])))
+            elif ranges and not speech:
+                silences[path] = merge_ranges((int(start * 1000000), int(end * 1000000)) for start, end in ranges)
+
+        silent: List[Tuple[int, int]] = []
+        sound: List[Tuple[int, int]] = []
+        for track in index.tracks("video"):
+            timeline = TrackTimeline(track)
+            for row, segment in enumerate(track.get("segments", [])):
+                target_start = int(timeline.target_start[row])
+                target_end = target_start + int(timeline.target_duration[row])
+                material = index.material(segment.get("material_id"), "videos")
+                silence = silences.get(material.get("path")) if material else None
+                if silence is None:
+                    sound.append((target_start, target_end))
+                    continue
+
+                source_start = int(timeline.source_start[row])
+                source_end = source_start + int(timeline.source_duration[row])
+                starts, ends = silence
+                lo = np.searchsorted(ends, source_start, side='right')
+                hi = np.searchsorted(starts, source_end, side='left')
+                # 素材时间 -> 时间线时间
+                speed = timeline.speed[row]
+                mute_starts = target_start + np.rint(
+                    (np.maximum(starts[lo:hi], source_start) - source_start) / speed).astype(np.int64)
+                mute_ends = np.minimum(target_start + np.rint(
+                    (np.minimum(ends[lo:hi], source_end) - source_start) / speed).astype(np.int64), target_end)
+                silent.extend(zip(mute_starts.tolist(), mute_ends.tolist()))
+                # 片段内静音区间之间的部分为有声
+                sound.extend(zip(
+                    np.concatenate(([target_start], mute_ends)).tolist(),
+                    np.concatenate((mute_starts, [target_end])).tolist()
+                ))
+        return silent, sound
+    
     def remove_silence(
         self,
         draft_content: Dict,
         silence_threshold: float = -40.0,
-        min_silence_duration: float = 0.5
-    ) -> Dict:
+        min_silence_duration: float = 0.5,
+        analysis: Optional[Dict[str, List[Tuple[float, float]]]] = None,
+        mode: str = "threshold"
+    ) -> Optional[Dict]:
         """
         删除草稿中的静音片段
         
+        NOTE: 视频素材的静音区间映射到时间线后, 由 RippleEngine 一次排序扫描应用到所有轨道,
+        音频、文本与特效轨道随视频同步剪切并前移
+        
         :param draft_content: 草稿内容
-        :param silence_threshold: 静音阈值 (dB)
+        :param silence_threshold: 静音阈值 (dB), 仅 threshold 模式使用
         :param min_silence_duration: 最小静音时长(秒)
-        :return: 处理后的草稿内容
+        :param analysis: 预先计算的分析结果, threshold 模式为 {路径: 静音片段列表} (见 analyze_silence),
+                         vad 模式为 {路径: 语音片段列表} (见 analyze_speech); 为 None 则按素材路径去重后分析
+        :param mode: "threshold" 按固定电平阈值检测静音; "vad" 按语音活动检测保留语音 (保留换气, 去除底噪)
+        :return: 处理后的草稿内容, 失败时返回 None (草稿可能已被部分修改, 调用方不得保存)
         """
         try:
-            tracks = draft_content.get("tracks", [])
-            materials = draft_content.get("materials", {})
+            index = DraftIndex(draft_content)
+            if analysis is None:
+                # 每个素材文件只分析一次 (多个片段可能引用同一素材)
+                media_paths = self.collect_video_paths(draft_content)
+                if mode == "vad":
+                    analysis = analyze_speech(media_paths, min_silence_duration)
+                else:
+                    analysis = analyze_silence(media_paths, silence_threshold, min_silence_duration)
             
-            for track in tracks:
-                if track.get("type") != "video":
-                    continue
-                
-                new_segments = []
-                
-                for segment in track.get("segments", []):
-                    material_id = segment.get("material_id")
-                    
-                    # 查找对应的素材
-                    material = None
-                    for video in materials.get("videos", []):
-                        if video.get("id") == material_id:
-                            material = video
-                            break
-                    
-                    if not material:
-                        new_segments.append(segment)
-                        continue
-                    
-                    # 获取音频路径
-                    video_path = material.get("path")
-                    if not video_path or not os.path.exists(video_path):
-                        new_segments.append(segment)
-                        continue
-                    
-                    # 检测静音片段
-                    silence_ranges = self.audio_analyzer.detect_silence(
-                        video_path,
-                        silence_threshold,
-                        min_silence_duration
-                    )
-                    
-                    if not silence_ranges:
-                        new_segments.append(segment)
-                        continue
-                    
-                    # 分割片段,移除静音部分
-                    source_range = segment.get("source_timerange", {})
-                    source_start = source_range.get("start", 0) / 1000000.0  # 转为秒
-                    source_duration = source_range.get("duration", 0) / 1000000.0
-                    source_end = source_start + source_duration
-                    
-                    # 计算非静音片段
-                    non_silence_ranges = []
-                    current_start = source_start
-                    
-                    for silence_start, silence_end in silence_ranges:
-                        # 检查静音片段是否在当前片段范围内
-                        if silence_end <= source_start or silence_start >= source_end:
-                            continue
-                        
-                        # 调整静音范围到片段范围内
-                        silence_start = max(silence_start, source_start)
-                        silence_end = min(silence_end, source_end)
-                        
-                        # 添加静音前的片段
-                        if current_start < silence_start:
-                            non_silence_ranges.append((current_start, silence_start))
-                        
-                        current_start = silence_end
-                    
-                    # 添加最后一个片段
-                    if current_start < source_end:
-                        non_silence_ranges.append((current_start, source_end))
-                    
-                    # 创建新片段
-                    target_start = segment.get("target_timerange", {}).get("start", 0)
-                    
-                    for ns_start, ns_end in non_silence_ranges:
-                        import copy
-                        new_segment = copy.deepcopy(segment)
-                        
-                        duration_us = int((ns_end - ns_start) * 1000000)
-                        
-                        new_segment["source_timerange"]["start"] = int(ns_start * 1000000)
-                        new_segment["source_timerange"]["duration"] = duration_us
-                        new_segment["target_timerange"]["start"] = target_start
-                        new_segment["target_timerange"]["duration"] = duration_us
-                        
-                        new_segments.append(new_segment)
-                        target_start += duration_us
-                
-                track["segments"] = new_segments
+            silent, sound = self._silence_timeline(index, analysis, speech=mode == "vad")
+            # 只删除所有视频轨道都静音的时间段 (任一轨道在该时间有声音或没有分析结果则保留)
+            cut_starts, cut_ends = subtract_ranges(*merge_ranges(silent), *merge_ranges(sound))
+            # 视频、音频、文本、特效等所有轨道按同一映射剪切并前移, 保持同步
+            RippleEngine(index).delete(zip(cut_starts.tolist(), cut_ends.tolist()))
             
             logger.info("静音片段删除完成")
             return draft_content
             
         except Exception as e:
             logger.error(f"删除静音片段失败: {e}")
-            return draft_content
+            return None
+    
+    @staticmethod
+    def _points_on_timeline(timeline: TrackTimeline, row: int, points: List[float]) -> Tuple[List[float], List[float]]:
+        """
+        素材时间点 -> 时间线时间点
+        
+        :param timeline: 轨道时间线
+        :param row: 片段行号
+        :param points: 有序的素材时间点 (秒)
+        :return: (落在片段素材区间内的素材时间点, 对应的时间线时间点), 单位秒
+        """
+        # 二分查找片段素材区间内的部分, 按速度换算为时间线时间
+        values = np.asarray(points, dtype=np.float64) * 1000000
+        source_start = timeline.source_start[row]
+        source_end = source_start + timeline.source_duration[row]
+        inside = values[np.searchsorted(values, source_start, side='left'):
+                        np.searchsorted(values, source_end, side='left')]
+        target = timeline.target_start[row] + (inside - source_start) / timeline.speed[row]
+        return np.round(inside / 1000000, 6).tolist(), np.round(target / 1000000, 6).tolist()
+    
+    def beat_times(self, draft_content: Dict, analysis: Dict[str, Optional[Dict]], key: str = "beats") -> List[float]:
+        """
+        音频轨道中音乐的节拍在时间线上的位置
+        
+        :param draft_content: 草稿内容
+        :param analysis: {路径: 节拍检测结果}, 见 analyze_beats
+        :param key: "beats" 节拍 / "onsets" 起音
+        :return: 时间线时间列表 (秒, 递增且去重)
+        """
+        index = DraftIndex(draft_content)
+        times: List[float] = []
+        for track in index.tracks("audio"):
+            timeline = TrackTimeline(track)
+            for row, segment in enumerate(track.get("segments", [])):
+                material = index.material(segment.get("material_id"), "audios")
+                result = analysis.get(material.get("path")) if material else None
+                if result and result.get(key):
+                    times.extend(self._points_on_timeline(timeline, row, result[key])[1])
+        return sorted(set(times))
+    
+    def snap_to_beats(
+        self,
+        draft_content: Dict,
+        beats: List[float],
+        max_shift: float = 0.5,
+        min_duration: float = 0.5
+    ) -> Dict[str, int]:
+        """
+        把视频片段之间的切点对齐到最近的节拍 (一次处理整条轨道)
+        
+        NOTE: 切点移动时前一片段的出点与后一片段的入点同时移动 (滚动剪辑), 轨道总时长不变;
+        超出 max_shift、素材长度不足或会使片段短于 min_duration 的切点保持不变
+        
+        :param draft_content: 草稿内容
+        :param beats: 节拍的时间线时间 (秒), 见 beat_times
+        :param max_shift: 切点最大移动距离 (秒)
+        :param min_duration: 片段最短时长 (秒)
+        :return: {"boundaries": 首尾相接的切点数, "snapped": 移动的切点数}
+        """
+        stats = {"boundaries": 0, "snapped": 0}
+        if not beats:
+            return stats
+        beat_points = np.unique(np.rint(np.asarray(beats) * 1000000).astype(np.int64))
+        index = DraftIndex(draft_content)
+
+        for track in index.tracks("video"):
+            timeline = TrackTimeline(track)
+            count = len(timeline)
+            if count < 2:
+                continue
+            starts, durations, speed = timeline.target_start, timeline.target_duration, timeline.speed
+            ends = starts + durations
+            # 首尾相接的相邻片段之间才有切点: 第 i 个切点位于 rows[i] 与 rows[i] + 1 之间
+            rows = np.flatnonzero(ends[:-1] == starts[1:])
+            stats["boundaries"] += len(rows)
+            if not len(rows):
+                continue
+
+            cuts = ends[rows]
+            position = np.searchsorted(beat_points, cuts)
+            left = beat_points[np.maximum(position - 1, 0)]
+            right = beat_points[np.minimum(position, len(beat_points) - 1)]
+            delta = np.where(np.abs(left - cuts) <= np.abs(right - cuts), left, right) - cuts
+
+            # 素材长度限制: 前一片段延长出点不能超过素材时长, 后一片段提前入点不能早于素材起点
+            material_end = np.array([
+                (index.material(segment.get("material_id"), "videos") or {}).get("duration") or 0
+                for segment in track["segments"]
+            ], dtype=np.int64)
+            source_end = timeline.source_start + timeline.source_duration
+            material_end = np.maximum(material_end, source_end)
+            valid = (delta != 0) & (np.abs(delta) <= int(max_shift * 1000000))
+            valid &= source_end[rows] + np.rint(delta * speed[rows]) <= material_end[rows]
+            valid &= timeline.source_start[rows + 1] + np.rint(delta * speed[rows + 1]) >= 0
+
+            # 使片段过短的切点撤销 (每轮至少撤销一个, 直到稳定)
+            min_us = int(min_duration * 1000000)
+            while True:
+                shift = np.where(valid, delta, 0)
+                end_shift = np.zeros(count, dtype=np.int64)
+                start_shift = np.zeros(count, dtype=np.int64)
+                end_shift[rows] = shift
+                start_shift[rows + 1] = shift
+                new_durations = durations + end_shift - start_shift
+                short = (new_durations < min_us) & (new_durations < durations)
+                revert = valid & (short[rows] | short[rows + 1])
+                if not revert.any():
+                    break
+                valid &= ~revert
+
+            if not valid.any():
+                continue
+            # 原地修改列, commit 时只写回变化的片段
+            source_start_shift = np.rint(start_shift * speed).astype(np.int64)
+            source_end_shift = np.rint(end_shift * speed).astype(np.int64)
+            timeline.source_duration += source_end_shift - source_start_shift
+            timeline.source_start += source_start_shift
+            timeline.target_start += start_shift
+            timeline.target_duration[:] = new_durations
+            timeline.commit(index)
+            stats["snapped"] += int(valid.sum())
+
+        logger.info(f"切点对齐节拍: {stats['snapped']}/{stats['boundaries']}")
+        return stats
+    
+    def detect_scenes(
+        self,
+        draft_content: Dict,
+        threshold: float = 0.3,
+        region_ratio: float = 0.5,
+        min_scene_duration: float = 1.0,
+        analysis: Optional[Dict[str, Optional[List[float]]]] = None
+    ) -> List[Dict]:
+        """
+        检测草稿视频片段中的镜头切换点
+        
+        :param draft_content: 草稿内容
+        :param threshold: 直方图差阈值 (0-1)
+        :param region_ratio: 变化区域占比阈值 (0-1)
+        :param min_scene_duration: 最短镜头时长(秒)
+        :param analysis: 预先计算的 {路径: 切换点列表}, 见 analyze_scenes; 为 None 则按素材路径去重后分析
+        :return: 落在片段素材区间内的切换点 [{"segment_id", "material_id", "source_time", "timeline_time"}, ...],
+                 按时间线时间排序
+        """
+        try:
+            index = DraftIndex(draft_content)
+            if analysis is None:
+                # 每个素材文件只分析一次 (多个片段可能引用同一素材)
+                analysis = analyze_scenes(
+                    self.collect_video_paths(draft_content), threshold, region_ratio, min_scene_duration
+                )
+
+            scenes = []
+            for track in index.tracks("video"):
+                timeline = TrackTimeline(track)
+                for row, segment in enumerate(track.get("segments", [])):
+                    material = index.material(segment.get("material_id"), "videos")
+                    cuts = analysis.get(material.get("path")) if material else None
+                    if not cuts:
+                        continue
+
+                    inside, target = self._points_on_timeline(timeline, row, cuts)
+                    for source_time, timeline_time in zip(inside, target):
+                        scenes.append({
+                            "segment_id": segment.get("id"),
+                            "material_id": segment.get("material_id"),
+                            "source_time": source_time,
+                            "timeline_time": timeline_time
+                        })
+
+            scenes.sort(key=lambda scene: scene["timeline_time"])
+            logger.info(f"检测到 {len(scenes)} 个镜头切换点")
+            return scenes
+
+        except Exception as e:
+            logger.error(f"镜头切换检测失败: {e}")
+            return []
     
     def extract_highlights(
         self,
         draft_content: Dict,
         threshold_percentile: float = 80.0,
-        min_highlight_duration: float = 2.0
+        min_highlight_duration: float = 2.0,
+        analysis: Optional[Dict[str, List[Tuple[float, ...]]]] = None,
+        window: float = 1.0,
+        hop: Optional[float] = None,
+        top_k: Optional[int] = None,
+        max_duration: Optional[float] = None
     ) -> List[Dict]:
         """
         提取草稿中的高光片段信息
@@ -262,51 +796,52 @@ class SmartEditor:
         :param draft_content: 草稿内容
         :param threshold_percentile: 音量阈值百分位
         :param min_highlight_duration: 最小高光时长(秒)
+        :param window: 窗口长度(秒)
+        :param hop: 滑动窗口步长(秒), 见 AudioAnalyzer.detect_highlights
+        :param top_k: 每个素材最多返回的片段数
+        :param max_duration: 每个素材的片段总时长上限(秒)
+        :param analysis: 预先计算的 {路径: 高光片段列表}, 见 analyze_highlights; 为 None 则按素材路径去重后分析
         :return: 高光片段信息列表
         """
         try:
-            tracks = draft_content.get("tracks", [])
-            materials = draft_content.get("materials", {})
+            index = DraftIndex(draft_content)
+            if analysis is None:
+                # 每个素材文件只分析一次 (多个片段可能引用同一素材)
+                analysis = analyze_highlights(
+                    self.collect_video_paths(draft_content), threshold_percentile, min_highlight_duration,
+                    window, hop, top_k, max_duration
+                )
             
             highlights = []
             
-            for track in tracks:
-                if track.get("type") != "video":
-                    continue
-                
+            for track in index.tracks("video"):
                 for segment in track.get("segments", []):
                     material_id = segment.get("material_id")
                     
                     # 查找对应的素材
-                    material = None
-                    for video in materials.get("videos", []):
-                        if video.get("id") == material_id:
-                            material = video
-                            break
+                    material = index.material(material_id, "videos")
                     
                     if not material:
                         continue
                     
-                    # 获取视频路径
+                    # 获取视频路径对应的高光片段
                     video_path = material.get("path")
-                    if not video_path or not os.path.exists(video_path):
+                    highlight_ranges = analysis.get(video_path) if video_path else None
+                    if not highlight_ranges:
                         continue
                     
-                    # 检测高光片段
-                    highlight_ranges = self.audio_analyzer.detect_highlights(
-                        video_path,
-                        threshold_percentile,
-                        min_highlight_duration
-                    )
-                    
-                    for start_sec, end_sec in highlight_ranges:
-                        highlights.append({
+                    for start_sec, end_sec, *score in highlight_ranges:
+                        highlight = {
                             "segment_id": segment.get("id"),
                             "material_id": material_id,
                             "start_time": start_sec,
                             "end_time": end_sec,
                             "duration": end_sec - start_sec
-                        })
+                        }
+                        if score:
+                            # 滑动窗口模式的得分 (dBFS)
+                            highlight["score"] = score[0]
+                        highlights.append(highlight)
             
             logger.info(f"提取到 {len(highlights)} 个高光片段")
             return highlights
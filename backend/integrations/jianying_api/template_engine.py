@@ -11,8 +11,14 @@ import json
 import os
 from typing import Dict, List, Any, Optional
 from loguru import logger
+from backend.common.draft_lock import draft_lock_registry
+from backend.common.draft_store import draft_content_store
+from backend.common.subtitle_parser import SubtitleCue
 from backend.integrations.jianying_api.draft_editor import DraftEditor
 
+# 模板字幕中的样式字段
+SUBTITLE_STYLE_KEYS = ("font_size", "font_color", "position_x", "position_y")
+
 
 class TemplateEngine:
     """模板应用引擎"""
@@ -24,13 +30,13 @@ class TemplateEngine:
         self,
         draft_content: Dict,
         template_config: Dict[str, Any]
-    ) -> Dict:
+    ) -> Optional[Dict]:
         """
         应用模板到草稿
         
         :param draft_content: 草稿内容
         :param template_config: 模板配置
-        :return: 应用模板后的草稿内容
+        :return: 应用模板后的草稿内容，失败时返回 None（草稿可能已被部分修改，不应保存）
         """
         try:
             editor = DraftEditor(draft_content)
@@ -53,43 +59,43 @@ class TemplateEngine:
             
             # 添加字幕
             if "subtitles" in template_config:
+                # 一次性添加, 相同样式的字幕共享同一个样式对象
+                styles = {}
+                cues = []
                 for subtitle in template_config["subtitles"]:
-                    editor.add_text(
-                        subtitle.get("text", ""),
-                        subtitle.get("start_time", 0.0),
-                        subtitle.get("duration", 3.0),
-                        subtitle.get("font_size", 48),
-                        subtitle.get("font_color", "#FFFFFF"),
-                        subtitle.get("position_x", 0.5),
-                        subtitle.get("position_y", 0.9)
-                    )
+                    style_key = tuple(subtitle.get(key) for key in SUBTITLE_STYLE_KEYS)
+                    style = styles.setdefault(style_key, {
+                        key: subtitle[key] for key in SUBTITLE_STYLE_KEYS if subtitle.get(key) is not None
+                    })
+                    start = int(subtitle.get("start_time", 0.0) * 1000000)
+                    cues.append(SubtitleCue(
+                        start, start + int(subtitle.get("duration", 3.0) * 1000000), subtitle.get("text", ""), style
+                    ))
+                # 与逐条 add_text 的结果一致: 保留时长为 0 的字幕, 按模板顺序追加
+                editor.add_subtitles(cues, skip_empty=False)
             
             # 调整颜色
             if "color_adjustments" in template_config:
                 adjustments = template_config["color_adjustments"]
-                # 应用到所有视频片段
-                for track in editor.tracks:
-                    if track.get("type") == "video":
-                        for segment in track.get("segments", []):
-                            segment_id = segment.get("id")
-                            if "brightness" in adjustments:
-                                editor.adjust_brightness(segment_id, adjustments["brightness"])
-                            if "contrast" in adjustments:
-                                editor.adjust_contrast(segment_id, adjustments["contrast"])
-                            if "saturation" in adjustments:
-                                editor.adjust_saturation(segment_id, adjustments["saturation"])
+                # 应用到所有视频片段 (按 ID 查找走编辑器索引, 整体为 O(n))
+                for track in editor.index.tracks("video"):
+                    for segment in track.get("segments", []):
+                        editor.adjust_color(segment.get("id"), adjustments)
             
             # 应用智能去重
             if template_config.get("smart_dedup", False):
                 dedup_config = template_config.get("dedup_config", {})
                 editor.deduplicate(dedup_config)
             
+            # 重复应用模板不会让滤镜/转场素材不断累积
+            editor.compact_materials(["filters", "transitions"])
+            
             logger.info("模板应用成功")
             return editor.get_content()
             
         except Exception as e:
             logger.error(f"应用模板失败: {e}")
-            return draft_content
+            return None
     
     def batch_apply_template(
         self,
@@ -119,28 +125,30 @@ class TemplateEngine:
                     })
                     continue
                 
-                with open(content_path, "r", encoding="utf-8") as f:
-                    content = json.load(f)
-                
-                # 应用模板
-                new_content = self.apply_template(content, template_config)
-                
-                # 保存结果
-                if output_dir:
-                    # 保存到输出目录
-                    draft_name = os.path.basename(draft_path)
-                    output_path = os.path.join(output_dir, draft_name)
-                    os.makedirs(output_path, exist_ok=True)
+                with draft_lock_registry.write(content_path):
+                    content = draft_content_store.load(content_path)
                     
-                    output_content_path = os.path.join(output_path, "draft_content.json")
-                else:
-                    # 备份并覆盖原文件
-                    import shutil
-                    shutil.copy(content_path, content_path + ".bak")
-                    output_content_path = content_path
-                
-                with open(output_content_path, "w", encoding="utf-8") as f:
-                    json.dump(new_content, f, ensure_ascii=False, indent=2)
+                    # 应用模板
+                    new_content = self.apply_template(content, template_config)
+                    if new_content is None:
+                        raise ValueError("应用模板失败")
+                    
+                    # 保存结果
+                    if output_dir:
+                        # 保存到输出目录
+                        draft_name = os.path.basename(draft_path)
+                        output_path = os.path.join(output_dir, draft_name)
+                        os.makedirs(output_path, exist_ok=True)
+                        
+                        output_content_path = os.path.join(output_path, "draft_content.json")
+                    else:
+                        # 覆盖原文件（旧版本轮转为 .bak.N）
+                        output_content_path = content_path
+                    
+                    # 模板是在缓存的草稿对象上原地应用的
+                    if output_dir:
+                        draft_content_store.invalidate(content_path)
+                    draft_content_store.save(output_content_path, new_content)
                 
                 results.append({
                     "draft_path": draft_path,
@@ -151,6 +159,7 @@ class TemplateEngine:
                 logger.info(f"批量应用模板成功: {draft_path}")
                 
             except Exception as e:
+                draft_content_store.invalidate(os.path.join(draft_path, "draft_content.json"))
                 logger.error(f"批量应用模板失败 {draft_path}: {e}")
                 results.append({
                     "draft_path": draft_path,
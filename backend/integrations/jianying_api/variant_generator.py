@@ -0,0 +1,212 @@
+"""
+草稿变体生成器
+
+NOTE: 发布同一剪辑的多个版本时，原本对每个副本单独调用智能去重，每个变体都要重新读取、解析基础草稿
+1. 基础草稿只解析一次；多进程时序列化一次，变体按进程数分组，每组在工作进程中解析一次，之后的变体都在内存中克隆
+2. 写时复制克隆: 只复制视频片段中去重会修改的路径与素材列表，其余子树（时间范围、音频/文本轨道、素材对象）与基础草稿共享
+3. 每个变体使用独立的随机种子执行 DraftEditor.deduplicate，种子写入变体目录的 draft_variant.json，
+   以相同的种子再次生成即可复现（变体目录名包含种子，复现时覆盖同一目录）
+4. 变体的复制、去重与写入分组提交到 blocking_executor 的 CPU 进程池并行执行（进程数受 executor.cpu_workers 限制）
+"""
+import gc
+import json
+import os
+import random
+import shutil
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+from backend.common.draft_serializer import draft_serializer
+from backend.integrations.jianying_api.draft_editor import DraftEditor
+from backend.utils.file_utils import atomic_write
+
+CONTENT_FILE = "draft_content.json"
+META_FILE = "draft_meta_info.json"
+VARIANT_FILE = "draft_variant.json"
+# 去重会原地修改的 clip 子对象
+COW_CLIP_KEYS = ("flip", "scale")
+
+
+def _cow_segment(segment: dict) -> dict:
+    """复制片段中会被去重修改的路径（speed、clip.flip、clip.scale、extra_material_refs），其余字段共享"""
+    clone = dict(segment)
+    clip = segment.get("clip")
+    if isinstance(clip, dict):
+        clip = clone["clip"] = dict(clip)
+        for key in COW_CLIP_KEYS:
+            if isinstance(clip.get(key), dict):
+                clip[key] = dict(clip[key])
+    if isinstance(segment.get("extra_material_refs"), list):
+        clone["extra_material_refs"] = list(segment["extra_material_refs"])
+    return clone
+
+
+def cow_clone(content: dict) -> dict:
+    """
+    写时复制克隆草稿
+
+    NOTE: 只复制 deduplicate 会修改的路径（视频片段的 speed / clip / extra_material_refs，
+    素材列表浅复制以便追加），其余对象与原草稿共享，克隆后不得修改其它部分
+
+    :param content: 基础草稿
+    :return: 克隆的草稿
+    """
+    # 克隆会分配大量容器对象，期间暂停循环垃圾回收（基础草稿很大时每次回收都要扫描它）
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _cow_clone(content)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _cow_clone(content: dict) -> dict:
+    clone = dict(content)
+    clone["tracks"] = [
+        {**track, "segments": [_cow_segment(segment) for segment in track.get("segments") or []]}
+        if track.get("type") == "video" else track
+        for track in content.get("tracks") or []
+    ]
+    clone["materials"] = {
+        category: list(materials) if isinstance(materials, list) else materials
+        for category, materials in (content.get("materials") or {}).items()
+    }
+    return clone
+
+
+def _ignore_content_files(directory: str, names: List[str]) -> List[str]:
+    """复制草稿目录时跳过草稿内容、备份与补丁日志（变体单独写入）"""
+    return [name for name in names if name.startswith(CONTENT_FILE)]
+
+
+def _update_meta(variant_dir: str) -> None:
+    """更新变体目录中的草稿元数据（名称、路径与 ID 不能与基础草稿相同）"""
+    meta_path = os.path.join(variant_dir, META_FILE)
+    if not os.path.exists(meta_path):
+        return
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        # 新版本剪映的元数据可能已加密，保持原样
+        return
+    name = os.path.basename(variant_dir)
+    if "draft_name" in meta:
+        meta["draft_name"] = name
+    if "draft_fold_path" in meta:
+        meta["draft_fold_path"] = variant_dir.replace("\\", "/")
+    if "draft_id" in meta:
+        meta["draft_id"] = str(uuid.uuid4()).upper()
+    atomic_write(meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+
+
+def build_variant(base: dict, source_dir: str, variant_dir: str, config: Optional[Dict], seed: int) -> Dict[str, Any]:
+    """
+    生成一个变体并写入变体目录
+
+    :param base: 基础草稿（不会被修改）
+    :param source_dir: 基础草稿目录（复制其中除草稿内容外的文件）
+    :param variant_dir: 变体目录
+    :param config: 去重配置，见 DraftEditor.deduplicate
+    :param seed: 随机种子
+    :return: 变体信息
+    """
+    content = cow_clone(base)
+    if not DraftEditor(content).deduplicate(config, seed):
+        raise RuntimeError("去重处理失败")
+
+    shutil.copytree(source_dir, variant_dir, ignore=_ignore_content_files, dirs_exist_ok=True)
+    _update_meta(variant_dir)
+    content_path = os.path.join(variant_dir, CONTENT_FILE)
+    atomic_write(content_path, draft_serializer.dumps(content))
+    info = {"source": source_dir, "seed": seed, "config": config}
+    atomic_write(os.path.join(variant_dir, VARIANT_FILE), json.dumps(info, ensure_ascii=False).encode("utf-8"))
+    return {"variant_path": variant_dir, "content_path": content_path, "seed": seed}
+
+
+def _build_safely(base: dict, source_dir: str, variant_dir: str, config: Optional[Dict], seed: int) -> Dict[str, Any]:
+    try:
+        return {"success": True, **build_variant(base, source_dir, variant_dir, config, seed)}
+    except Exception as e:
+        return {"success": False, "variant_path": variant_dir, "seed": seed, "error": str(e)}
+
+
+def build_variants(jobs: List[tuple], payload: bytes) -> List[Dict[str, Any]]:
+    """
+    进程池入口: 解析一次基础草稿，依次生成一组变体
+
+    :param jobs: 变体任务，见 VariantGenerator.plan
+    :param payload: 序列化的基础草稿
+    :return: 每个变体的结果
+    """
+    base = draft_serializer.loads(payload)
+    return [_build_safely(base, *job) for job in jobs]
+
+
+class VariantGenerator:
+    """草稿变体生成器"""
+
+    @staticmethod
+    def make_seeds(count: int) -> List[int]:
+        """生成 count 个互不相同的随机种子"""
+        generator = random.SystemRandom()
+        seeds: List[int] = []
+        while len(seeds) < count:
+            seed = generator.randrange(2 ** 31)
+            if seed not in seeds:
+                seeds.append(seed)
+        return seeds
+
+    def plan(
+        self,
+        source_dir: str,
+        output_dir: str,
+        count: int = 1,
+        config: Optional[Dict] = None,
+        seeds: Optional[Iterable[int]] = None,
+    ) -> List[tuple]:
+        """
+        规划变体任务并创建输出目录
+
+        :param source_dir: 基础草稿目录
+        :param output_dir: 变体输出目录，每个变体写入 {基础草稿目录名}_variant_{种子}
+        :param count: 变体数量（指定 seeds 时忽略）
+        :param config: 去重配置，见 DraftEditor.deduplicate
+        :param seeds: 随机种子列表，用于复现已生成的变体
+        :return: 变体任务 [(source_dir, variant_dir, config, seed), ...]
+        """
+        seeds = list(seeds) if seeds else self.make_seeds(count)
+        base_name = os.path.basename(os.path.normpath(source_dir))
+        os.makedirs(output_dir, exist_ok=True)
+        return [
+            (source_dir, os.path.join(output_dir, f"{base_name}_variant_{seed}"), config, seed)
+            for seed in seeds
+        ]
+
+    @staticmethod
+    def partition(jobs: List[tuple], parts: int) -> List[List[tuple]]:
+        """
+        把任务按顺序分为至多 parts 组（每组在一个工作进程中只解析一次基础草稿）
+
+        :param jobs: 变体任务
+        :param parts: 组数上限（CPU 进程数）
+        :return: 任务分组，依次拼接即为原顺序
+        """
+        parts = max(1, min(parts, len(jobs)))
+        size = -(-len(jobs) // parts)
+        return [jobs[start:start + size] for start in range(0, len(jobs), size)]
+
+    def generate(self, content: dict, jobs: List[tuple]) -> List[Dict[str, Any]]:
+        """
+        在当前进程中顺序生成变体
+
+        :param content: 基础草稿（只读，不会被修改）
+        :param jobs: 变体任务，见 plan
+        :return: 每个变体的结果 [{"success", "variant_path", "content_path", "seed"}, ...]
+        """
+        return [_build_safely(content, *job) for job in jobs]
+
+
+# 全局变体生成器实例
+variant_generator = VariantGenerator()
@@ -0,0 +1,270 @@
+"""
+波形峰值金字塔
+
+NOTE: 审阅界面显示长素材的波形时，每次缩放都解码整个文件代价太高
+1. 每个素材只解码一次: 流式读取 PCM，第 0 层为每 bucket_samples 个采样的 (最小值, 最大值)，
+   之后每层的桶数减半（相邻两桶取最小/最大），直到只剩一个桶
+2. 每层保存为一个 .npy 文件（int16，形状 (桶数, 2)），目录以媒体内容哈希命名，写完后整体重命名（原子）
+3. 读取时 np.load(mmap_mode="r")，只有请求范围内的页会被读入内存；
+   按 (结束 - 开始) / width 选择每像素至少一个桶的最粗层，再用 reduceat 归并到 width 个像素
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from backend.common.analysis_cache import analysis_cache
+from backend.core.conf import app_config, settings
+from backend.integrations.jianying_api.audio_decoder import ffmpeg_binary, iter_pcm_blocks
+from backend.integrations.jianying_api.audio_envelope import np, to_mono
+
+META_FILE = "meta.json"
+# 波形版本，金字塔格式变化时更换（旧目录自然失效）
+WAVEFORM_VERSION = 1
+
+
+class PeakBuilder:
+    """按块增量计算第 0 层 (最小值, 最大值)"""
+
+    def __init__(self, bucket_samples: int):
+        """
+        :param bucket_samples: 每个桶的采样数
+        """
+        self.bucket_samples = bucket_samples
+        self._carry = np.zeros(0, dtype=np.int16)
+        self._peaks: List["np.ndarray"] = []
+        self.samples = 0
+
+    def feed(self, samples: "np.ndarray") -> None:
+        """
+        送入一块单声道 int16 采样（调用返回后即可复用该缓冲区）
+
+        :param samples: 采样数组
+        """
+        self.samples += len(samples)
+        if len(self._carry):
+            samples = np.concatenate((self._carry, samples))
+        usable = len(samples) // self.bucket_samples * self.bucket_samples
+        self._carry = samples[usable:].copy()
+        if usable:
+            buckets = samples[:usable].reshape(-1, self.bucket_samples)
+            self._peaks.append(np.column_stack((buckets.min(axis=1), buckets.max(axis=1))))
+
+    def finish(self) -> "np.ndarray":
+        """
+        :return: 第 0 层，int16，形状 (桶数, 2)（最后一个桶可能不足 bucket_samples 个采样）
+        """
+        if len(self._carry):
+            self._peaks.append(np.array([[self._carry.min(), self._carry.max()]], dtype=np.int16))
+            self._carry = self._carry[:0]
+        if not self._peaks:
+            return np.zeros((0, 2), dtype=np.int16)
+        return np.concatenate(self._peaks).astype(np.int16, copy=False)
+
+
+def build_levels(base: "np.ndarray") -> List["np.ndarray"]:
+    """
+    由第 0 层逐层减半
+
+    :param base: 第 0 层
+    :return: [第 0 层, 第 1 层, ...]，最后一层只有一个桶
+    """
+    levels = [base]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        if len(level) % 2:
+            level = np.concatenate((level, level[-1:]))
+        pairs = level.reshape(-1, 2, 2)
+        levels.append(np.column_stack((pairs[:, :, 0].min(axis=1), pairs[:, :, 1].max(axis=1))))
+    return levels
+
+
+def _decode_peaks(media_path: str, sample_rate: int, bucket_samples: int) -> PeakBuilder:
+    """流式解码并计算第 0 层；未找到 ffmpeg 时回退到 pydub 整体解码"""
+    builder = PeakBuilder(bucket_samples)
+    if ffmpeg_binary():
+        for block in iter_pcm_blocks(media_path, sample_rate, app_config.get('audio_analysis.block_seconds', 10.0)):
+            builder.feed(block)
+        return builder
+
+    from pydub import AudioSegment
+    audio = AudioSegment.from_file(media_path).set_frame_rate(sample_rate).set_sample_width(2)
+    samples = np.frombuffer(audio.raw_data, dtype=np.int16)
+    builder.feed(np.rint(to_mono(samples, audio.channels, 1.0)).astype(np.int16))
+    return builder
+
+
+def build_waveform(media_path: str, directory: str, sample_rate: int, bucket_samples: int) -> str:
+    """
+    解码素材并写入波形金字塔（可在进程池中执行）
+
+    :param media_path: 媒体文件路径
+    :param directory: 金字塔目录（已存在时直接返回）
+    :param sample_rate: 解码采样率
+    :param bucket_samples: 第 0 层每个桶的采样数
+    :return: 金字塔目录
+    """
+    if os.path.exists(os.path.join(directory, META_FILE)):
+        return directory
+
+    builder = _decode_peaks(media_path, sample_rate, bucket_samples)
+    levels = build_levels(builder.finish())
+
+    parent = os.path.dirname(directory)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".waveform-", dir=parent)
+    try:
+        for number, level in enumerate(levels):
+            np.save(os.path.join(staging, f"level_{number}.npy"), level)
+        meta = {
+            "version": WAVEFORM_VERSION,
+            "sample_rate": sample_rate,
+            "bucket_samples": bucket_samples,
+            "samples": builder.samples,
+            "levels": len(levels),
+        }
+        with open(os.path.join(staging, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        try:
+            os.rename(staging, directory)
+        except OSError:
+            # 并发构建时其他进程已完成
+            if not os.path.exists(os.path.join(directory, META_FILE)):
+                raise
+    finally:
+        if os.path.exists(staging):
+            shutil.rmtree(staging, ignore_errors=True)
+
+    logger.info(f"生成波形金字塔: {media_path}, {len(levels)} 层, {builder.samples / sample_rate:.1f} 秒")
+    return directory
+
+
+class WaveformPyramid:
+    """内存映射的波形金字塔（只读）"""
+
+    def __init__(self, directory: str):
+        """
+        :param directory: 金字塔目录
+        """
+        with open(os.path.join(directory, META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.directory = directory
+        self.sample_rate: int = meta["sample_rate"]
+        self.bucket_samples: int = meta["bucket_samples"]
+        self.samples: int = meta["samples"]
+        self.levels = [
+            np.load(os.path.join(directory, f"level_{number}.npy"), mmap_mode="r")
+            for number in range(meta["levels"])
+        ]
+
+    @property
+    def duration(self) -> float:
+        """时长（秒）"""
+        return self.samples / self.sample_rate
+
+    def peaks(self, start: float = 0.0, end: Optional[float] = None, width: int = 1000) -> Dict:
+        """
+        查询任意缩放级别的波形
+
+        :param start: 开始时间（秒）
+        :param end: 结束时间（秒），None 表示素材末尾
+        :param width: 像素数（返回的点数，范围内的桶数更少时按实际桶数返回）
+        :return: {"start", "end", "level", "bucket_duration", "min": [...], "max": [...]}，幅度归一化到 -1 ~ 1
+        """
+        end = self.duration if end is None else min(end, self.duration)
+        start = max(0.0, min(start, end))
+        width = max(1, width)
+        samples_per_pixel = (end - start) * self.sample_rate / width
+        # 每像素至少一个桶的最粗层
+        ratio = max(samples_per_pixel / self.bucket_samples, 1.0)
+        number = min(int(np.floor(np.log2(ratio))), len(self.levels) - 1)
+        level = self.levels[number]
+        bucket = self.bucket_samples << number
+
+        first = int(start * self.sample_rate // bucket)
+        last = min(len(level), int(np.ceil(end * self.sample_rate / bucket)))
+        window = np.asarray(level[first:last])
+        if len(window) > width:
+            edges = np.linspace(0, len(window), width + 1).astype(np.int64)[:-1]
+            minimum = np.minimum.reduceat(window[:, 0], edges)
+            maximum = np.maximum.reduceat(window[:, 1], edges)
+        else:
+            minimum, maximum = window[:, 0], window[:, 1]
+        return {
+            "start": round(start, 6),
+            "end": round(end, 6),
+            "level": number,
+            "bucket_duration": bucket / self.sample_rate,
+            "min": np.round(minimum / 32768.0, 4).tolist(),
+            "max": np.round(maximum / 32768.0, 4).tolist(),
+        }
+
+
+class WaveformStore:
+    """波形金字塔存储: 每个素材（按内容哈希）只生成一次，打开的金字塔在进程内复用"""
+
+    # 进程内保留的已打开金字塔数量
+    OPEN_LIMIT = 32
+
+    def __init__(self, root: Optional[str] = None):
+        """
+        :param root: 存储目录
+        """
+        self.root = root or app_config.get(
+            'waveform.path', os.path.join(settings.storage_root, 'cache', 'waveforms')
+        )
+        self.sample_rate = app_config.get('waveform.sample_rate', 16000)
+        self.bucket_samples = app_config.get('waveform.bucket_samples', 64)
+        self._open: "OrderedDict[str, WaveformPyramid]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def directory(self, media_path: str) -> str:
+        """
+        素材的金字塔目录
+
+        :param media_path: 媒体文件路径
+        :return: 目录路径（可能尚未生成）
+        """
+        name = f"{analysis_cache.content_hash(media_path)}-v{WAVEFORM_VERSION}-{self.sample_rate}-{self.bucket_samples}"
+        return os.path.join(self.root, name[:2], name)
+
+    def exists(self, directory: str) -> bool:
+        """金字塔是否已生成"""
+        return os.path.exists(os.path.join(directory, META_FILE))
+
+    def build(self, media_path: str, directory: str) -> str:
+        """生成金字塔（CPU 密集，可在进程池中执行）"""
+        return build_waveform(media_path, directory, self.sample_rate, self.bucket_samples)
+
+    def open(self, directory: str) -> WaveformPyramid:
+        """
+        打开金字塔（内存映射，最近使用的保留在进程内）
+
+        :param directory: 金字塔目录
+        :return: 波形金字塔
+        """
+        with self._lock:
+            pyramid = self._open.get(directory)
+            if pyramid is not None:
+                self._open.move_to_end(directory)
+                return pyramid
+        pyramid = WaveformPyramid(directory)
+        with self._lock:
+            self._open[directory] = pyramid
+            while len(self._open) > self.OPEN_LIMIT:
+                self._open.popitem(last=False)
+        return pyramid
+
+
+def build_material_waveform(media_path: str, directory: str) -> str:
+    """进程池入口: 生成素材的波形金字塔"""
+    return waveform_store.build(media_path, directory)
+
+
+# 全局波形存储实例
+waveform_store = WaveformStore()
@@ -3,8 +3,7 @@
 """
 import json
 import os
-from pathlib import Path
-from typing import Dict, Optional
+from typing import Optional
 
 from loguru import logger
 
@@ -4,13 +4,15 @@
 NOTE: 此模块用于管理剪映草稿中的特效、滤镜、转场等
 支持常用特效的添加和管理
 """
-import json
 import os
 import uuid
-from typing import Dict, List, Optional, Any
+from typing import Optional
 
 from loguru import logger
 
+from backend.common.draft_index import DraftIndex
+from backend.common.draft_lock import draft_locked
+from backend.common.draft_store import draft_content_store
 from backend.core.conf import settings
 
 
@@ -54,10 +56,7 @@ class EffectManager:
                 logger.error(f"草稿内容文件不存在: {content_file}")
                 return None
             
-            with open(content_file, 'r', encoding='utf-8') as f:
-                content = json.load(f)
-            
-            return content
+            return draft_content_store.load(content_file)
         
         except Exception as e:
             logger.error(f"加载草稿内容失败: {e}")
@@ -68,19 +67,13 @@ class EffectManager:
         try:
             content_file = os.path.join(draft_path, "draft_content.json")
             
-            # 备份原文件
-            if os.path.exists(content_file):
-                backup_file = content_file + ".backup"
-                import shutil
-                shutil.copy2(content_file, backup_file)
-            
-            with open(content_file, 'w', encoding='utf-8') as f:
-                json.dump(content, f, ensure_ascii=False, indent=2)
-            
+            # 原子写入，旧版本轮转为 .bak.N
+            draft_content_store.save(content_file, content)
             logger.info(f"保存草稿内容成功: {content_file}")
             return True
         
         except Exception as e:
+            draft_content_store.invalidate(os.path.join(draft_path, "draft_content.json"))
             logger.error(f"保存草稿内容失败: {e}")
             return False
     
@@ -90,17 +83,9 @@ class EffectManager:
     
     def _find_segment(self, content: dict, track_id: str, segment_id: str) -> Optional[dict]:
         """查找片段"""
-        if 'tracks' not in content:
-            return None
-        
-        for track in content['tracks']:
-            if track.get('id') == track_id:
-                for segment in track.get('segments', []):
-                    if segment.get('id') == segment_id:
-                        return segment
-        
-        return None
+        return DraftIndex(content).segment(segment_id, track_id=track_id)
     
+    @draft_locked()
     def add_filter(
         self,
         draft_path: str,
@@ -152,6 +137,7 @@ class EffectManager:
             logger.error(f"添加滤镜失败: {e}")
             return False
     
+    @draft_locked()
     def add_transition(
         self,
         draft_path: str,
@@ -199,6 +185,7 @@ class EffectManager:
             logger.error(f"添加转场失败: {e}")
             return False
     
+    @draft_locked()
     def add_sticker(
         self,
         draft_path: str,
@@ -265,6 +252,7 @@ class EffectManager:
             logger.error(f"添加贴纸失败: {e}")
             return None
     
+    @draft_locked()
     def remove_filter(
         self,
         draft_path: str,
@@ -307,6 +295,7 @@ class EffectManager:
             logger.error(f"删除滤镜失败: {e}")
             return False
     
+    @draft_locked()
     def remove_transition(
         self,
         draft_path: str,
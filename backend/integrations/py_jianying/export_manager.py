@@ -3,12 +3,13 @@
 """
 import os
 import time
-from pathlib import Path
 from typing import Callable, List, Optional
 
 import uiautomation as auto
 from loguru import logger
 
+from backend.common.draft_lock import draft_lock_registry
+from backend.common.draft_store import draft_content_store
 from backend.core.conf import app_config, settings
 
 
@@ -45,6 +46,12 @@ class ExportManager:
         logger.info(f"开始导出草稿: {draft_id}")
         
         try:
+            # 0. 剪映只读取 draft_content.json，先合并补丁日志
+            content_path = os.path.join(settings.jianying_draft_path, draft_id, "draft_content.json")
+            if os.path.exists(content_path):
+                with draft_lock_registry.write(content_path):
+                    draft_content_store.compact(content_path)
+            
             # 1. 启动剪映
             if not self._launch_jianying():
                 logger.error("启动剪映失败")
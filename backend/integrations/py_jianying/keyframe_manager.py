@@ -4,12 +4,14 @@
 NOTE: 此模块用于管理剪映草稿中的关键帧动画
 支持位置、缩放、旋转、透明度等关键帧的添加和管理
 """
-import json
 import os
-from typing import Dict, List, Optional, Any
+from typing import Optional
 
 from loguru import logger
 
+from backend.common.draft_index import DraftIndex
+from backend.common.draft_lock import draft_locked
+from backend.common.draft_store import draft_content_store
 from backend.core.conf import settings
 
 
@@ -51,10 +53,7 @@ class KeyframeManager:
                 logger.error(f"草稿内容文件不存在: {content_file}")
                 return None
             
-            with open(content_file, 'r', encoding='utf-8') as f:
-                content = json.load(f)
-            
-            return content
+            return draft_content_store.load(content_file)
         
         except Exception as e:
             logger.error(f"加载草稿内容失败: {e}")
@@ -65,19 +64,13 @@ class KeyframeManager:
         try:
             content_file = os.path.join(draft_path, "draft_content.json")
             
-            # 备份原文件
-            if os.path.exists(content_file):
-                backup_file = content_file + ".backup"
-                import shutil
-                shutil.copy2(content_file, backup_file)
-            
-            with open(content_file, 'w', encoding='utf-8') as f:
-                json.dump(content, f, ensure_ascii=False, indent=2)
-            
+            # 原子写入，旧版本轮转为 .bak.N
+            draft_content_store.save(content_file, content)
             logger.info(f"保存草稿内容成功: {content_file}")
             return True
         
         except Exception as e:
+            draft_content_store.invalidate(os.path.join(draft_path, "draft_content.json"))
             logger.error(f"保存草稿内容失败: {e}")
             return False
     
@@ -90,17 +83,9 @@ class KeyframeManager:
         :param segment_id: 片段 ID
         :return: 片段对象
         """
-        if 'tracks' not in content:
-            return None
-        
-        for track in content['tracks']:
-            if track.get('id') == track_id:
-                for segment in track.get('segments', []):
-                    if segment.get('id') == segment_id:
-                        return segment
-        
-        return None
+        return DraftIndex(content).segment(segment_id, track_id=track_id)
     
+    @draft_locked()
     def add_keyframe(
         self,
         draft_path: str,
@@ -170,6 +155,7 @@ class KeyframeManager:
             logger.error(f"添加关键帧失败: {e}")
             return False
     
+    @draft_locked()
     def remove_keyframe(
         self,
         draft_path: str,
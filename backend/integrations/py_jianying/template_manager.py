@@ -6,12 +6,12 @@ NOTE: 此模块用于管理剪映草稿模板
 """
 import json
 import os
-import shutil
-from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional
 
 from loguru import logger
 
+from backend.common.draft_lock import draft_locked
+from backend.common.draft_store import draft_content_store
 from backend.core.conf import settings
 
 
@@ -36,10 +36,7 @@ class TemplateManager:
                 logger.error(f"草稿内容文件不存在: {content_file}")
                 return None
             
-            with open(content_file, 'r', encoding='utf-8') as f:
-                content = json.load(f)
-            
-            return content
+            return draft_content_store.load(content_file)
         
         except Exception as e:
             logger.error(f"加载草稿内容失败: {e}")
@@ -50,21 +47,17 @@ class TemplateManager:
         try:
             content_file = os.path.join(draft_path, "draft_content.json")
             
-            # 备份原文件
-            if os.path.exists(content_file):
-                backup_file = content_file + ".backup"
-                shutil.copy2(content_file, backup_file)
-            
-            with open(content_file, 'w', encoding='utf-8') as f:
-                json.dump(content, f, ensure_ascii=False, indent=2)
-            
+            # 原子写入，旧版本轮转为 .bak.N
+            draft_content_store.save(content_file, content)
             logger.info(f"保存草稿内容成功: {content_file}")
             return True
         
         except Exception as e:
+            draft_content_store.invalidate(os.path.join(draft_path, "draft_content.json"))
             logger.error(f"保存草稿内容失败: {e}")
             return False
     
+    @draft_locked(exclusive=False)
     def create_template_from_draft(
         self,
         draft_path: str,
@@ -173,6 +166,7 @@ class TemplateManager:
             logger.error(f"加载模板失败: {e}")
             return None
     
+    @draft_locked()
     def apply_template(
         self,
         draft_path: str,
@@ -244,6 +238,7 @@ class TemplateManager:
         
         return new_tracks
     
+    @draft_locked()
     def replace_materials(
         self,
         draft_path: str,
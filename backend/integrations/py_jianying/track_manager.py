@@ -4,15 +4,16 @@
 NOTE: 此模块用于管理剪映草稿中的轨道和片段
 支持视频、音频、文本等轨道的添加、删除和修改操作
 """
-import json
 import os
 import uuid
-from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import List, Optional
 
 from loguru import logger
 
+from backend.common.draft_lock import draft_locked
+from backend.common.draft_store import draft_content_store
 from backend.core.conf import settings
+from backend.integrations.jianying_api.media_probe import media_probe
 
 
 class TrackType:
@@ -49,10 +50,7 @@ class TrackManager:
                 logger.error(f"草稿内容文件不存在: {content_file}")
                 return None
             
-            with open(content_file, 'r', encoding='utf-8') as f:
-                content = json.load(f)
-            
-            return content
+            return draft_content_store.load(content_file)
         
         except Exception as e:
             logger.error(f"加载草稿内容失败: {e}")
@@ -69,19 +67,13 @@ class TrackManager:
         try:
             content_file = os.path.join(draft_path, "draft_content.json")
             
-            # 备份原文件
-            if os.path.exists(content_file):
-                backup_file = content_file + ".backup"
-                import shutil
-                shutil.copy2(content_file, backup_file)
-            
-            with open(content_file, 'w', encoding='utf-8') as f:
-                json.dump(content, f, ensure_ascii=False, indent=2)
-            
+            # 原子写入，旧版本轮转为 .bak.N
+            draft_content_store.save(content_file, content)
             logger.info(f"保存草稿内容成功: {content_file}")
             return True
         
         except Exception as e:
+            draft_content_store.invalidate(os.path.join(draft_path, "draft_content.json"))
             logger.error(f"保存草稿内容失败: {e}")
             return False
     
@@ -89,6 +81,22 @@ class TrackManager:
         """生成唯一 ID"""
         return str(uuid.uuid4()).replace('-', '')
     
+    @staticmethod
+    def _material_duration(material_path: str, duration: Optional[float]) -> Optional[float]:
+        """
+        未指定时长时探测素材原始时长（media_probe，有缓存）
+        
+        NOTE: 在获取草稿锁之前调用，ffprobe 运行期间不阻塞该草稿的其他读写
+        
+        :param material_path: 素材文件路径
+        :param duration: 指定的时长(秒)
+        :return: 时长(秒)，探测失败时返回 None
+        """
+        if duration is not None:
+            return duration
+        info = media_probe.probe(material_path)
+        return info["duration"] if info else None
+    
     def add_video_track(
         self,
         draft_path: str,
@@ -105,12 +113,26 @@ class TrackManager:
         :param draft_path: 草稿路径
         :param material_id: 素材 ID
         :param material_path: 素材文件路径
-        :param start_time: 开始时间(微秒)
-        :param duration: 时长(微秒),None 表示使用素材原始时长
+        :param start_time: 开始时间(秒)
+        :param duration: 时长(秒),None 表示使用素材原始时长（media_probe 探测，有缓存）
         :param volume: 音量 (0.0-1.0)
         :param speed: 速度 (0.1-10.0)
         :return: 轨道 ID
         """
+        duration = self._material_duration(material_path, duration)
+        return self._add_video_track(draft_path, material_id, start_time, duration, volume, speed)
+    
+    @draft_locked()
+    def _add_video_track(
+        self,
+        draft_path: str,
+        material_id: str,
+        start_time: float,
+        duration: Optional[float],
+        volume: float,
+        speed: float
+    ) -> Optional[str]:
+        """添加视频轨道（持有草稿写锁），参数见 add_video_track"""
         try:
             content = self._load_draft_content(draft_path)
             if not content:
@@ -184,12 +206,27 @@ class TrackManager:
         :param material_id: 素材 ID
         :param material_path: 素材文件路径
         :param start_time: 开始时间(秒)
-        :param duration: 时长(秒)
+        :param duration: 时长(秒),None 表示使用素材原始时长（media_probe 探测，有缓存）
         :param volume: 音量 (0.0-1.0)
         :param fade_in: 淡入时长(秒)
         :param fade_out: 淡出时长(秒)
         :return: 轨道 ID
         """
+        duration = self._material_duration(material_path, duration)
+        return self._add_audio_track(draft_path, material_id, start_time, duration, volume, fade_in, fade_out)
+    
+    @draft_locked()
+    def _add_audio_track(
+        self,
+        draft_path: str,
+        material_id: str,
+        start_time: float,
+        duration: Optional[float],
+        volume: float,
+        fade_in: float,
+        fade_out: float
+    ) -> Optional[str]:
+        """添加音频轨道（持有草稿写锁），参数见 add_audio_track"""
         try:
             content = self._load_draft_content(draft_path)
             if not content:
@@ -235,6 +272,7 @@ class TrackManager:
             logger.error(f"添加音频轨道失败: {e}")
             return None
     
+    @draft_locked()
     def add_text_track(
         self,
         draft_path: str,
@@ -306,6 +344,7 @@ class TrackManager:
             logger.error(f"添加文本轨道失败: {e}")
             return None
     
+    @draft_locked()
     def remove_track(self, draft_path: str, track_id: str) -> bool:
         """
         删除轨道
@@ -337,6 +376,7 @@ class TrackManager:
             logger.error(f"删除轨道失败: {e}")
             return False
     
+    @draft_locked(exclusive=False)
     def get_tracks(self, draft_path: str, track_type: Optional[str] = None) -> List[dict]:
         """
         获取轨道列表
@@ -346,8 +386,14 @@ class TrackManager:
         :return: 轨道列表
         """
         try:
-            content = self._load_draft_content(draft_path)
-            if not content or 'tracks' not in content:
+            content_file = os.path.join(draft_path, "draft_content.json")
+            if not os.path.exists(content_file):
+                logger.error(f"草稿内容文件不存在: {content_file}")
+                return []
+            
+            # 只读查询: 大草稿只解析 tracks，不构建素材等其他子树
+            content = draft_content_store.query(content_file, ("tracks",))
+            if 'tracks' not in content:
                 return []
             
             tracks = content['tracks']
@@ -361,6 +407,7 @@ class TrackManager:
             logger.error(f"获取轨道列表失败: {e}")
             return []
     
+    @draft_locked()
     def update_track_volume(self, draft_path: str, track_id: str, volume: float) -> bool:
         """
         更新轨道音量
@@ -393,6 +440,7 @@ class TrackManager:
             logger.error(f"更新轨道音量失败: {e}")
             return False
     
+    @draft_locked()
     def update_track_speed(self, draft_path: str, track_id: str, speed: float) -> bool:
         """
         更新轨道速度
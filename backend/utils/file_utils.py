@@ -3,6 +3,8 @@
 """
 import os
 import shutil
+import tempfile
+from contextlib import suppress
 from pathlib import Path
 from typing import List
 
@@ -107,6 +109,81 @@ def move_file(src: str, dst: str) -> None:
     shutil.move(src, dst)
 
 
+def backup_file_path(file_path: str, generation: int) -> str:
+    """
+    获取第 N 代备份文件路径（1 为最近一代）
+    
+    :param file_path: 文件路径
+    :param generation: 备份代数
+    :return: 备份文件路径
+    """
+    return f"{file_path}.bak.{generation}"
+
+
+def atomic_write(file_path: str, data: bytes, keep_generations: int = 0) -> None:
+    """
+    原子写入文件
+    
+    先写入同目录临时文件并 fsync，再通过 rename 替换目标文件，
+    进程中途退出时目标文件要么是旧版本要么是新版本，不会被截断。
+    旧版本轮转为 {file}.bak.1 ... {file}.bak.N: 第 1 代为硬链接（文件系统不支持时复制），
+    其余各代 rename 后移，目标文件在任何时刻都存在。
+    
+    :param file_path: 文件路径
+    :param data: 文件内容
+    :param keep_generations: 保留的历史版本数量，0 表示不保留
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=os.path.basename(file_path) + ".",
+        suffix=".tmp",
+        dir=directory
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        
+        if os.path.exists(file_path):
+            with suppress(OSError):
+                shutil.copymode(file_path, tmp_path)
+            if keep_generations > 0:
+                # 由旧到新依次后移，最旧的一代被覆盖
+                for generation in range(keep_generations - 1, 0, -1):
+                    older = backup_file_path(file_path, generation)
+                    if os.path.exists(older):
+                        os.replace(older, backup_file_path(file_path, generation + 1))
+                # 硬链接生成第 1 代（不支持时复制），目标文件在整个过程中始终存在
+                newest = backup_file_path(file_path, 1)
+                with suppress(FileNotFoundError):
+                    os.remove(newest)
+                try:
+                    os.link(file_path, newest)
+                except OSError:
+                    shutil.copy2(file_path, newest)
+        
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        with suppress(OSError):
+            os.remove(tmp_path)
+        raise
+    
+    _fsync_directory(directory)
+
+
+def _fsync_directory(directory: str) -> None:
+    """同步目录项，保证 rename 落盘（Windows 不支持，忽略）"""
+    if os.name == "nt":
+        return
+    with suppress(OSError):
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
 def get_unique_filename(directory: str, filename: str) -> str:
     """
     获取唯一文件名（如果文件已存在，则添加数字后缀）
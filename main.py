@@ -10,9 +10,11 @@ from fastapi.responses import JSONResponse
 from loguru import logger
 
 from backend.common.exception import BaseAPIException
+from backend.common.executor import blocking_executor, loop_lag_monitor
 from backend.common.response import response_base
 from backend.core.conf import app_config, settings
 from backend.core.database import close_db, create_tables, init_db
+from backend.integrations.jianying_api.media_probe import media_probe
 
 
 @asynccontextmanager
@@ -29,10 +31,16 @@ async def lifespan(app: FastAPI):
     await create_tables()
     logger.info("数据库表创建完成")
 
+    # 启动事件循环延迟监控
+    loop_lag_monitor.start()
+
     yield
 
     # 关闭时执行
     logger.info("应用关闭中...")
+    await loop_lag_monitor.stop()
+    blocking_executor.shutdown()
+    media_probe.shutdown()
     await close_db()
     logger.info("数据库连接已关闭")
 
@@ -94,7 +102,11 @@ async def global_exception_handler(request: Request, exc: Exception):
 @app.get("/health", tags=["系统"])
 async def health_check():
     """健康检查接口"""
-    return response_base.success(data={"status": "healthy"})
+    return response_base.success(data={
+        "status": "healthy",
+        "loop_lag": loop_lag_monitor.stats(),
+        "executor": blocking_executor.stats(),
+    })
 
 
 # 根路径
@@ -0,0 +1,137 @@
+"""
+草稿只读查询基准测试
+
+构造带有大量特效/画布素材的大草稿，在独立子进程中分别执行
+完整加载（DraftContentStore.load）与部分查询（DraftContentStore.query），
+对比耗时与进程峰值内存（RSS）:
+    python scripts/bench_draft_query.py --segments 20000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.bench_draft_serializer import build_synthetic_draft
+
+QUERY_PATHS = ("tracks", "materials.videos")
+
+
+def build_heavy_draft(segment_count: int) -> dict:
+    """在合成草稿上追加每个片段对应的特效、画布、变速素材（只读查询用不到的子树）"""
+    content = build_synthetic_draft(segment_count)
+    materials = content["materials"]
+    materials["effects"] = [
+        {
+            "id": f"EFFECT_{i}",
+            "type": "video_effect",
+            "path": f"C:/Users/剪映/Cache/effect/{i:08d}/",
+            "adjust_params": [
+                {"name": f"effect_param_{j}", "value": 0.5, "default_value": 0.5}
+                for j in range(20)
+            ],
+        }
+        for i in range(segment_count)
+    ]
+    materials["canvases"] = [
+        {"id": f"CANVAS_{i}", "type": "canvas_color", "color": "", "blur": 0.0, "image": "", "album_image": ""}
+        for i in range(segment_count)
+    ]
+    materials["speeds"] = [
+        {"id": f"SPEED_{i}", "type": "speed", "speed": 1.0, "mode": 0, "curve_speed": None}
+        for i in range(segment_count)
+    ]
+    return content
+
+
+def peak_rss_mb() -> float:
+    """当前进程峰值内存（MB）"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 单位为 KB，macOS 为字节
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024 / 1024
+
+
+def run_child(mode: str, content_path: str, segment_count: int) -> None:
+    """子进程: 生成草稿，或执行一次加载/查询并输出结果"""
+    from backend.common.draft_serializer import DraftSerializer, draft_serializer
+    from backend.common.draft_store import DraftContentStore
+
+    if mode == "write":
+        with open(content_path, "wb") as f:
+            f.write(draft_serializer.dumps(build_heavy_draft(segment_count)))
+        return
+
+    backend = "json" if mode == "load-json" else None
+    store = DraftContentStore(max_memory=0, persistence="snapshot", serializer=DraftSerializer(backend=backend))
+    # 流式解析只在 query 中使用，完整加载的用例把阈值设为无穷大
+    store.stream_min_size = 0 if mode == "stream" else float("inf")
+
+    start = time.perf_counter()
+    if mode.startswith("load"):
+        content = store.load(content_path)
+    else:
+        content = store.query(content_path, QUERY_PATHS)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "elapsed_ms": elapsed * 1000,
+        "peak_rss_mb": peak_rss_mb(),
+        "segments": len(content["tracks"][0]["segments"]),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="草稿只读查询基准测试")
+    parser.add_argument("--segments", type=int, default=20000, help="片段数量")
+    parser.add_argument("--child", choices=["write", "load", "load-json", "query", "stream"], help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.path, args.segments)
+        return
+
+    from backend.common.draft_serializer import draft_serializer
+
+    def child(mode: str, content_path: str) -> str:
+        # 每个用例在独立进程中执行，峰值内存互不影响（草稿也在子进程中生成）
+        return subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", mode, "--path", content_path,
+             "--segments", str(args.segments)],
+            check=True, capture_output=True, text=True
+        ).stdout
+
+    with tempfile.TemporaryDirectory(prefix="draft_query_") as tmp:
+        content_path = os.path.join(tmp, "draft_content.json")
+        child("write", content_path)
+        size_mb = os.path.getsize(content_path) / 1024 / 1024
+        print(f"草稿: {args.segments} 个片段, {size_mb:.1f} MB, 查询路径: {', '.join(QUERY_PATHS)}")
+
+        cases = [
+            (f"完整加载({draft_serializer.backend})", "load"),
+            ("完整加载(json)", "load-json"),
+            ("查询(完整解析)", "query"),
+        ]
+        if draft_serializer.streaming:
+            cases.append(("查询(流式解析)", "stream"))
+        else:
+            print("未安装 ijson，跳过流式解析: pip install ijson")
+
+        print(f"{'方式':<16}{'耗时(ms)':>12}{'峰值RSS(MB)':>14}")
+        for name, mode in cases:
+            result = json.loads(child(mode, content_path).strip().splitlines()[-1])
+            print(f"{name:<16}{result['elapsed_ms']:>12.0f}{result['peak_rss_mb']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+草稿序列化基准测试
+
+对比不同序列化模式/后端保存大草稿的耗时与文件大小:
+    python scripts/bench_draft_serializer.py --segments 20000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.common.draft_serializer import DraftSerializer, orjson
+
+
+def build_synthetic_draft(segment_count: int) -> dict:
+    """构造包含指定数量视频片段的草稿内容"""
+    videos = []
+    segments = []
+    for i in range(segment_count):
+        material_id = str(uuid.uuid4()).upper()
+        videos.append({
+            "id": material_id,
+            "type": "video",
+            "path": f"D:/素材/镜头_{i:05d}.mp4",
+            "duration": 5000000,
+            "width": 1920,
+            "height": 1080,
+            "material_name": f"镜头_{i:05d}.mp4",
+        })
+        segments.append({
+            "id": str(uuid.uuid4()).upper(),
+            "material_id": material_id,
+            "source_timerange": {"start": 0, "duration": 3000000},
+            "target_timerange": {"start": i * 3000000, "duration": 3000000},
+            "speed": 1.0,
+            "volume": 1.0,
+            "visible": True,
+            "clip": {
+                "alpha": 1.0,
+                "flip": {"horizontal": False, "vertical": False},
+                "rotation": 0.0,
+                "scale": {"x": 1.0, "y": 1.0},
+                "transform": {"x": 0.0, "y": 0.0},
+            },
+            "extra_material_refs": [str(uuid.uuid4()).upper() for _ in range(3)],
+            "keyframe_refs": [],
+        })
+    return {
+        "canvas_config": {"width": 1920, "height": 1080, "ratio": "original"},
+        "duration": segment_count * 3000000,
+        "materials": {"videos": videos, "audios": [], "texts": [], "filters": []},
+        "tracks": [{"id": str(uuid.uuid4()).upper(), "type": "video", "segments": segments}],
+    }
+
+
+def bench(serializer: DraftSerializer, content: dict, path: str, repeat: int) -> tuple[float, int]:
+    """返回 (最佳保存耗时秒, 文件大小字节)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = serializer.dumps(content)
+        with open(path, "wb") as f:
+            f.write(data)
+        best = min(best, time.perf_counter() - start)
+    return best, os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="草稿序列化基准测试")
+    parser.add_argument("--segments", type=int, default=20000, help="片段数量")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数")
+    args = parser.parse_args()
+
+    content = build_synthetic_draft(args.segments)
+    cases = [
+        ("json pretty (原实现)", DraftSerializer("pretty", "json")),
+        ("json compact", DraftSerializer("compact", "json")),
+    ]
+    if orjson is not None:
+        cases += [
+            ("orjson pretty", DraftSerializer("pretty", "orjson")),
+            ("orjson compact", DraftSerializer("compact", "orjson")),
+        ]
+    else:
+        print("未安装 orjson，跳过原生后端: pip install orjson")
+
+    print(f"片段数量: {args.segments}")
+    print(f"{'方案':<22}{'耗时(ms)':>12}{'大小(MB)':>12}{'相对体积':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "draft_content.json")
+        baseline_size = None
+        for name, serializer in cases:
+            elapsed, size = bench(serializer, content, path, args.repeat)
+            baseline_size = baseline_size or size
+            print(f"{name:<22}{elapsed * 1000:>12.1f}{size / 1048576:>12.2f}{size / baseline_size:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+事件循环延迟基准测试
+
+模拟多个请求并发保存大草稿，对比在事件循环中直接执行与交给 I/O 线程池执行时
+事件循环的延迟:
+    python scripts/bench_loop_lag.py --segments 20000 --requests 8
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.common.draft_store import DraftContentStore
+from backend.common.executor import BlockingExecutor, LoopLagMonitor
+from scripts.bench_draft_serializer import build_synthetic_draft
+
+
+def edit_and_save(store: DraftContentStore, content_path: str) -> None:
+    """加载 -> 修改 -> 保存（阻塞）"""
+    content = store.load(content_path)
+    content["duration"] += 1
+    store.save(content_path, content)
+
+
+async def run_case(name: str, offload: bool, paths: list, store: DraftContentStore, executor: BlockingExecutor):
+    monitor = LoopLagMonitor(interval=0.01, warn_threshold=float("inf"))
+    monitor.start()
+    await asyncio.sleep(0.05)
+    monitor.reset()
+
+    start = time.perf_counter()
+
+    async def request(path: str):
+        if offload:
+            await executor.run_io(edit_and_save, store, path)
+        else:
+            edit_and_save(store, path)
+
+    await asyncio.gather(*(request(path) for path in paths))
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    stats = monitor.stats()
+    print(f"{name:<16}{elapsed * 1000:>12.0f}{stats['p50_ms']:>12.1f}{stats['p99_ms']:>12.1f}{stats['max_ms']:>12.1f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="事件循环延迟基准测试")
+    parser.add_argument("--segments", type=int, default=20000, help="每个草稿的片段数量")
+    parser.add_argument("--requests", type=int, default=8, help="并发请求数（每个请求编辑一个草稿）")
+    parser.add_argument("--workers", type=int, default=4, help="I/O 线程数")
+    args = parser.parse_args()
+
+    store = DraftContentStore(backup_generations=0)
+    executor = BlockingExecutor(io_workers=args.workers)
+    content = build_synthetic_draft(args.segments)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(args.requests):
+            path = os.path.join(tmp, f"draft_{i}", "draft_content.json")
+            os.makedirs(os.path.dirname(path))
+            store.save(path, content)
+            paths.append(path)
+
+        print(f"片段数量: {args.segments}  并发请求: {args.requests}")
+        print(f"{'方案':<16}{'总耗时(ms)':>12}{'p50(ms)':>12}{'p99(ms)':>12}{'max(ms)':>12}")
+        for name, offload in (("事件循环内执行", False), ("I/O 线程池", True)):
+            # 每轮都从磁盘重新解析，模拟冷缓存
+            store.clear()
+            await run_case(name, offload, paths, store, executor)
+
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+"""
+波纹编辑基准测试
+
+在视频/音频/字幕三条轨道上删除一组时间线区间，对比:
+1. 逐个剪切: 每个区间扫描全部片段，拆分/裁剪相交片段（deepcopy）并平移后续片段
+2. RippleEngine: 排序合并剪切区间后一次扫描所有轨道
+    python scripts/bench_ripple.py --segments 5000 --cuts 500
+"""
+import argparse
+import copy
+import os
+import random
+import sys
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.common.draft_index import DraftIndex
+from backend.common.draft_ripple import RippleEngine
+from scripts.bench_draft_serializer import build_synthetic_draft
+
+
+def build_draft(segment_count: int) -> dict:
+    """合成草稿的视频轨道复制为音频、字幕轨道"""
+    content = build_synthetic_draft(segment_count)
+    video = content["tracks"][0]
+    for track_type in ("audio", "text"):
+        track = copy.deepcopy(video)
+        track["type"] = track_type
+        content["tracks"].append(track)
+    return content
+
+
+def delete_one_by_one(content: dict, cuts: list) -> None:
+    """旧方式: 从后往前逐个删除区间，避免前面的删除影响后面区间的位置"""
+    for cut_start, cut_end in sorted(cuts, reverse=True):
+        length = cut_end - cut_start
+        for track in content["tracks"]:
+            new_segments = []
+            for segment in track["segments"]:
+                target = segment["target_timerange"]
+                start, end = target["start"], target["start"] + target["duration"]
+                if end <= cut_start:
+                    new_segments.append(segment)
+                    continue
+                if start >= cut_end:
+                    target["start"] -= length
+                    new_segments.append(segment)
+                    continue
+                for piece_start, piece_end in ((start, min(end, cut_start)), (max(start, cut_end), end)):
+                    if piece_end <= piece_start:
+                        continue
+                    piece = copy.deepcopy(segment)
+                    piece["source_timerange"]["start"] += piece_start - start
+                    piece["source_timerange"]["duration"] = piece_end - piece_start
+                    piece["target_timerange"]["start"] = piece_start if piece_start < cut_start else piece_start - length
+                    piece["target_timerange"]["duration"] = piece_end - piece_start
+                    new_segments.append(piece)
+            track["segments"] = new_segments
+
+
+def delete_with_engine(content: dict, cuts: list) -> None:
+    RippleEngine(DraftIndex(content)).delete(cuts)
+
+
+def timing(content: dict) -> list:
+    return [
+        [(s["source_timerange"]["start"], s["source_timerange"]["duration"],
+          s["target_timerange"]["start"], s["target_timerange"]["duration"]) for s in track["segments"]]
+        for track in content["tracks"]
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="波纹编辑基准测试")
+    parser.add_argument("--segments", type=int, default=5000, help="每条轨道的片段数量")
+    parser.add_argument("--cuts", type=int, default=500, help="删除的区间数量")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+
+    base = build_draft(args.segments)
+    last = base["tracks"][0]["segments"][-1]["target_timerange"]
+    end = last["start"] + last["duration"]
+    random.seed(0)
+    # 互不重叠的区间，保证两种方式结果可以逐一比较
+    points = sorted(random.sample(range(end), args.cuts * 2))
+    cuts = list(zip(points[0::2], points[1::2]))
+
+    results = []
+    for name, func in (("逐个剪切", delete_one_by_one), ("RippleEngine", delete_with_engine)):
+        content = copy.deepcopy(base)
+        start = time.perf_counter()
+        func(content, cuts)
+        results.append((name, time.perf_counter() - start, timing(content)))
+
+    print(f"轨道: 3 x {args.segments} 个片段, 删除区间: {args.cuts}")
+    for name, elapsed, _ in results:
+        print(f"{name:<14}{elapsed * 1000:>10.0f} ms")
+    print(f"加速: {results[0][1] / results[1][1]:.1f}x, 结果一致: {'是' if results[0][2] == results[1][2] else '否'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+列式时间线基准测试
+
+对比逐个遍历片段字典（每个新片段 deepcopy）与 TrackTimeline 向量化计算后一次性写回的耗时:
+1. 剪切: 每个片段去掉中间一段，拆成两个片段（与删除静音相同）
+2. 波纹平移: 时间线中点之后的片段整体后移
+3. 变速: 全部片段 1.25 倍速，后续片段随之前移
+4. 组合: 剪切 + 变速 + 波纹平移（列式只构建、写回各一次）
+    python scripts/bench_timeline.py --segments 50000
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.common.draft_timeline import TrackTimeline
+from scripts.bench_draft_serializer import build_synthetic_draft
+
+
+def cut_with_dicts(track: dict) -> None:
+    """旧实现: 每个保留区间 deepcopy 一次来源片段"""
+    new_segments = []
+    for segment in track["segments"]:
+        source = segment["source_timerange"]
+        half = source["duration"] // 4
+        target_start = segment["target_timerange"]["start"]
+        for start, duration in ((source["start"], half), (source["start"] + 3 * half, source["duration"] - 3 * half)):
+            new_segment = copy.deepcopy(segment)
+            new_segment["source_timerange"]["start"] = start
+            new_segment["source_timerange"]["duration"] = duration
+            new_segment["target_timerange"]["start"] = target_start
+            new_segment["target_timerange"]["duration"] = duration
+            new_segments.append(new_segment)
+            target_start += duration
+    track["segments"] = new_segments
+
+
+def cut_with_timeline(track: dict) -> None:
+    timeline = TrackTimeline(track)
+    count = len(timeline)
+    quarter = timeline.source_duration // 4
+    rows = [row for row in range(count) for _ in range(2)]
+    starts, durations = [], []
+    for start, duration, half in zip(timeline.source_start.tolist(), timeline.source_duration.tolist(), quarter.tolist()):
+        starts += [start, start + 3 * half]
+        durations += [half, duration - 3 * half]
+    timeline.cut(rows, starts, durations)
+    timeline.commit()
+
+
+def ripple_with_dicts(track: dict, at: int, delta: int) -> None:
+    for segment in track["segments"]:
+        if segment["target_timerange"]["start"] >= at:
+            segment["target_timerange"]["start"] += delta
+
+
+def ripple_with_timeline(track: dict, at: int, delta: int) -> None:
+    timeline = TrackTimeline(track)
+    timeline.ripple(at, delta)
+    timeline.commit()
+
+
+def scale_with_dicts(track: dict, factor: float) -> None:
+    shift = 0
+    for segment in track["segments"]:
+        segment["speed"] = segment.get("speed", 1.0) * factor
+        target = segment["target_timerange"]
+        new_duration = round(segment["source_timerange"]["duration"] / segment["speed"])
+        target["start"] -= shift
+        shift += target["duration"] - new_duration
+        target["duration"] = new_duration
+
+
+def scale_with_timeline(track: dict, factor: float) -> None:
+    timeline = TrackTimeline(track)
+    timeline.scale(factor)
+    timeline.commit()
+
+
+def combined_with_dicts(track: dict, at: int, delta: int) -> None:
+    cut_with_dicts(track)
+    scale_with_dicts(track, 1.25)
+    ripple_with_dicts(track, at, delta)
+
+
+def combined_with_timeline(track: dict, at: int, delta: int) -> None:
+    timeline = TrackTimeline(track)
+    quarter = (timeline.source_duration // 4).tolist()
+    rows = [row for row in range(len(timeline)) for _ in range(2)]
+    starts, durations = [], []
+    for start, duration, half in zip(timeline.source_start.tolist(), timeline.source_duration.tolist(), quarter):
+        starts += [start, start + 3 * half]
+        durations += [half, duration - 3 * half]
+    timeline.cut(rows, starts, durations)
+    timeline.scale(1.25)
+    timeline.ripple(at, delta)
+    timeline.commit()
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def timing(track: dict) -> list:
+    return [
+        (s["source_timerange"]["start"], s["source_timerange"]["duration"],
+         s["target_timerange"]["start"], s["target_timerange"]["duration"])
+        for s in track["segments"]
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="列式时间线基准测试")
+    parser.add_argument("--segments", type=int, default=50000, help="片段数量")
+    args = parser.parse_args()
+
+    base = build_synthetic_draft(args.segments)["tracks"][0]
+    middle = base["segments"][args.segments // 2]["target_timerange"]["start"]
+    cases = [
+        ("剪切", cut_with_dicts, cut_with_timeline, ()),
+        ("波纹平移", ripple_with_dicts, ripple_with_timeline, (middle, 1000000)),
+        ("变速", scale_with_dicts, scale_with_timeline, (1.25,)),
+        ("组合", combined_with_dicts, combined_with_timeline, (middle // 2, 1000000)),
+    ]
+
+    print(f"片段数: {args.segments}")
+    print(f"{'操作':<10}{'字典遍历(ms)':>14}{'列式(ms)':>12}{'加速':>8}  结果一致")
+    for name, with_dicts, with_timeline, extra in cases:
+        dict_track = copy.deepcopy(base)
+        timeline_track = copy.deepcopy(base)
+        dict_time = timed(with_dicts, dict_track, *extra)
+        timeline_time = timed(with_timeline, timeline_track, *extra)
+        same = timing(dict_track) == timing(timeline_track)
+        print(
+            f"{name:<10}{dict_time * 1000:>14.0f}{timeline_time * 1000:>12.0f}"
+            f"{dict_time / timeline_time:>7.1f}x  {'是' if same else '否'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
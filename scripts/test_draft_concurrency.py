@@ -0,0 +1,126 @@
+"""
+草稿并发编辑压力测试
+
+同时发起数百个针对同一草稿的编辑（EditorService 与 py_jianying 管理器混合）和读取，
+结束后从磁盘重新加载，检查没有任何一次编辑丢失:
+    python scripts/test_draft_concurrency.py --edits 300 --manager-edits 100 --reads 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loguru import logger
+
+from backend.app.task.service.editor_service import editor_service
+from backend.common.draft_lock import draft_lock_registry
+from backend.common.draft_store import DraftContentStore, draft_content_store
+from backend.common.executor import blocking_executor
+from backend.integrations.py_jianying.track_manager import track_manager
+
+
+def count_text_segments(content: dict) -> int:
+    """文本轨道上的片段数量"""
+    return sum(
+        len(track.get("segments", []))
+        for track in content.get("tracks", [])
+        if track.get("type") == "text"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="草稿并发编辑压力测试")
+    parser.add_argument("--edits", type=int, default=300, help="EditorService 编辑次数（每次添加一条字幕）")
+    parser.add_argument("--manager-edits", type=int, default=100, help="track_manager 编辑次数（每次添加一条音频轨道）")
+    parser.add_argument("--reads", type=int, default=200, help="并发读取次数")
+    parser.add_argument("--cache", action="store_true", help="启用解析缓存（默认关闭，每次加载都从磁盘解析）")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    if not args.cache:
+        # 关闭缓存后每次加载都得到独立对象，最容易暴露丢失更新
+        draft_content_store.max_memory = 0
+
+    draft_path = tempfile.mkdtemp(prefix="draft_concurrency_")
+    content_path = os.path.join(draft_path, "draft_content.json")
+    with open(content_path, "w", encoding="utf-8") as f:
+        json.dump({"tracks": [], "materials": {}}, f)
+
+    inconsistent_reads = 0
+
+    async def edit(i: int) -> bool:
+        return await editor_service._edit_draft(
+            content_path,
+            lambda editor: editor.add_text(f"字幕 {i}", i * 0.1, 1.0)
+        )
+
+    async def manager_edit(i: int) -> bool:
+        args_ = (draft_path, f"MATERIAL_{i}", "music.mp3", 0.0, 1.0)
+        if i % 2:
+            # 同步用法: 在独立线程中由 track_manager 自己阻塞加锁
+            track_id = await asyncio.to_thread(track_manager.add_audio_track, *args_)
+        else:
+            # 服务层用法: 先在事件循环中等待写锁，再交给 I/O 线程池
+            async with draft_lock_registry.write(content_path):
+                track_id = await blocking_executor.run_io(track_manager.add_audio_track, *args_)
+        return track_id is not None
+
+    async def read(_: int) -> bool:
+        nonlocal inconsistent_reads
+        async with draft_lock_registry.read(content_path):
+            content = await blocking_executor.run_io(draft_content_store.load, content_path)
+        # 写者总是同时添加字幕素材与片段，读到两者不一致说明读到了写了一半的状态
+        if len(content.get("materials", {}).get("texts", [])) != count_text_segments(content):
+            inconsistent_reads += 1
+        return True
+
+    jobs = (
+        [edit(i) for i in range(args.edits)]
+        + [manager_edit(i) for i in range(args.manager_edits)]
+        + [read(i) for i in range(args.reads)]
+    )
+    random.shuffle(jobs)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*jobs)
+    elapsed = time.perf_counter() - start
+
+    # 用新的存储实例从磁盘重新加载（patch_log 模式下会重放补丁日志）
+    final = DraftContentStore(max_memory=0).load(content_path)
+
+    texts = len(final.get("materials", {}).get("texts", []))
+    text_segments = count_text_segments(final)
+    audio_tracks = sum(1 for track in final.get("tracks", []) if track.get("type") == "audio")
+
+    print("=" * 60)
+    print(f"请求数: {len(results)}  耗时: {elapsed:.2f}s  失败: {results.count(False)}")
+    print(f"字幕素材: {texts}/{args.edits}  字幕片段: {text_segments}/{args.edits}")
+    print(f"音频轨道: {audio_tracks}/{args.manager_edits}")
+    print(f"不一致的读取: {inconsistent_reads}")
+    print(f"残留的锁: {draft_lock_registry.stats()['active']}")
+    print("=" * 60)
+
+    blocking_executor.shutdown()
+
+    ok = (
+        all(results)
+        and texts == text_segments == args.edits
+        and audio_tracks == args.manager_edits
+        and inconsistent_reads == 0
+        and draft_lock_registry.stats()['active'] == 0
+    )
+    print("✅ 没有丢失的编辑" if ok else "❌ 检测到丢失或不一致的编辑")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))